@@ -1,39 +1,141 @@
 import boto3
 import os
 import logging
-from botocore.exceptions import ClientError
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from pprint import pprint
 from dotenv import load_dotenv
 
+from pipeline.backoff import retry_call
 
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime')
+# Questions answered at once, and errors that mean "slow down" rather than "failed"
+MAX_IN_FLIGHT = 8
+THROTTLING_ERROR_CODES = ("ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException")
 
-def retrieve_and_generate(input_text, kbId, modelArn):
+bedrock_agent_runtime = boto3.client('bedrock-agent-runtime',
+                                     config=Config(max_pool_connections=4 * MAX_IN_FLIGHT))
+
+def retrieve_and_generate(input_text, kbId, modelArn, sessionId=None, client=None):
     """Retrieve and generate a response using the Bedrock Agent runtime"""
     try:
-        response = bedrock_agent_runtime.retrieve_and_generate(
-            input={
-                'text': input_text
-            },
-            retrieveAndGenerateConfiguration={
-                'type': 'KNOWLEDGE_BASE',
-                'knowledgeBaseConfiguration': {
-                    'knowledgeBaseId': kbId,
-                    'modelArn': modelArn
-                }
-            }
-        )
-        return response
+        return _retrieve_and_generate(client or bedrock_agent_runtime, input_text, kbId, modelArn, sessionId)
     except ClientError as e:
         logging.error(f"Failed to retrieve and generate response for input {input_text}: {e}")
         return None
 
-def process_questions(questions, kbId, modelArn):
-    """Process a list of questions and generate responses"""
-    responses = []
-    for question in questions:
-        response = retrieve_and_generate(question, kbId, modelArn)
-        responses.append(response)
-    return responses
+def _retrieve_and_generate(client, input_text, kbId, modelArn, sessionId=None):
+    request = {
+        'input': {
+            'text': input_text
+        },
+        'retrieveAndGenerateConfiguration': {
+            'type': 'KNOWLEDGE_BASE',
+            'knowledgeBaseConfiguration': {
+                'knowledgeBaseId': kbId,
+                'modelArn': modelArn
+            }
+        }
+    }
+    if sessionId:
+        # Continue an earlier conversation so follow-ups share its retrieval context
+        request['sessionId'] = sessionId
+    return client.retrieve_and_generate(**request)
+
+def is_throttling_error(error):
+    return isinstance(error, ClientError) and error.response['Error']['Code'] in THROTTLING_ERROR_CODES
+
+class AdaptiveLimiter:
+    """Cap on concurrent calls that halves on throttling and grows back by one per clean round
+
+    Additive increase, multiplicative decrease: after `limit` successful calls in a
+    row the limit rises by one, up to max_in_flight.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, min_in_flight=1):
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.limit = max_in_flight
+        self.in_flight = 0
+        self.throttled = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self._successes = 0
+                self.limit = max(self.min_in_flight, self.limit // 2)
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_in_flight:
+                    self._successes = 0
+                    self.limit += 1
+            self._condition.notify_all()
 
+def is_retryable_error(error):
+    # Connection failures and timeouts are worth another try, like throttling
+    return is_throttling_error(error) or isinstance(error, BotoCoreError)
 
+def _answer_with_backoff(client, limiter, question, kbId, modelArn, sessionId, max_retries, base_delay, max_delay):
+    def call():
+        limiter.acquire()
+        throttled = False
+        try:
+            return _retrieve_and_generate(client, question, kbId, modelArn, sessionId)
+        except (ClientError, BotoCoreError) as e:
+            throttled = is_throttling_error(e)
+            raise
+        finally:
+            limiter.release(throttled=throttled)
+
+    try:
+        return retry_call(call, is_retryable_error, max_retries, base_delay, max_delay, "Bedrock request")
+    except (ClientError, BotoCoreError) as e:
+        logging.error(f"Failed to retrieve and generate response for input {question}: {e}")
+        return None
+
+def process_questions(questions, kbId, modelArn, max_in_flight=MAX_IN_FLIGHT, follow_up_groups=None,
+                      client=None, max_retries=8, base_delay=0.5, max_delay=20.0):
+    """Process a list of questions and generate responses
+
+    Questions run concurrently, at most max_in_flight at a time, and the limit backs
+    off adaptively while Bedrock throttles. Responses come back in question order,
+    with None for questions that failed. follow_up_groups optionally gives a group
+    key per question (None for standalone ones): questions sharing a key are asked
+    in order within one Bedrock session so follow-ups see the earlier context.
+    """
+    client = client or bedrock_agent_runtime
+    limiter = AdaptiveLimiter(max_in_flight)
+    responses = [None] * len(questions)
+
+    # Each group of positions runs sequentially; groups run concurrently
+    groups = {}
+    for i in range(len(questions)):
+        key = follow_up_groups[i] if follow_up_groups is not None else None
+        groups.setdefault(("question", i) if key is None else ("group", key), []).append(i)
+
+    def run_group(positions):
+        sessionId = None
+        for i in positions:
+            response = _answer_with_backoff(client, limiter, questions[i], kbId, modelArn, sessionId,
+                                            max_retries, base_delay, max_delay)
+            responses[i] = response
+            if response is not None:
+                sessionId = response.get('sessionId', sessionId)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        list(executor.map(run_group, groups.values()))
+
+    if limiter.throttled:
+        logging.info(f"Bedrock throttled {limiter.throttled} calls, final concurrency {limiter.limit}")
+    return responses
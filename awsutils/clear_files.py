@@ -1,6 +1,8 @@
 import boto3
 import os
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 from pinecone import Pinecone
@@ -11,45 +13,188 @@ logging.basicConfig(level=logging.INFO)
 
 client_s3 = boto3.client('s3')
 
-def clear_s3_bucket(bucket_name):
-    """Delete all objects in an S3 bucket"""
+# Most keys a single delete_objects request accepts
+DELETE_BATCH_SIZE = 1000
+DELETE_WORKERS = 8
+PROGRESS_EVERY = 10000
+
+def _delete_batch(client, bucket_name, keys):
+    """Delete up to 1000 keys in one request, returning the number of keys that failed"""
+    response = client.delete_objects(
+        Bucket=bucket_name,
+        Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+    )
+    errors = response.get('Errors', [])
+    for error in errors[:5]:
+        logging.error(f"Failed to delete {error['Key']} from bucket {bucket_name}: {error['Code']} {error.get('Message', '')}")
+    return len(errors)
+
+def clear_s3_bucket(bucket_name, prefix="", client=None, max_workers=DELETE_WORKERS, progress=None):
+    """Delete all objects (or all objects under a prefix) in an S3 bucket
+
+    Keys are listed page by page and deleted with delete_objects in batches of 1000,
+    several batches at a time. progress, if given, is called as
+    progress(deleted, failed, elapsed_seconds) after each batch.
+    """
+    client = client or client_s3
+    start = time.perf_counter()
+    deleted = failed = 0
+    next_report = PROGRESS_EVERY
+
+    def report(future, batch_size):
+        nonlocal deleted, failed, next_report
+        errors = future.result()
+        failed += errors
+        deleted += batch_size - errors
+        elapsed = time.perf_counter() - start
+        if progress is not None:
+            progress(deleted, failed, elapsed)
+        if deleted >= next_report:
+            logging.info(f"Deleted {deleted} objects from bucket {bucket_name} ({deleted / elapsed:.0f} objects/s)")
+            next_report += PROGRESS_EVERY
+
     try:
-        # List all objects in the bucket
-        objects = client_s3.list_objects_v2(Bucket=bucket_name)
-        
-        if 'Contents' in objects:
-            for obj in objects['Contents']:
-                # Delete each object
-                client_s3.delete_object(Bucket=bucket_name, Key=obj['Key'])
-                logging.info(f"Deleted {obj['Key']} from bucket {bucket_name}")
-
-        logging.info(f"All objects in bucket {bucket_name} have been deleted")
+        paginator = client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix,
+                                   PaginationConfig={'PageSize': DELETE_BATCH_SIZE})
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            for page in pages:
+                keys = [obj['Key'] for obj in page.get('Contents', [])]
+                for i in range(0, len(keys), DELETE_BATCH_SIZE):
+                    batch = keys[i:i + DELETE_BATCH_SIZE]
+                    pending[executor.submit(_delete_batch, client, bucket_name, batch)] = len(batch)
+                # Bound the batches in flight so listing does not run far ahead of deleting
+                while len(pending) >= 2 * max_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report(future, pending.pop(future))
+            for future in list(pending):
+                report(future, pending.pop(future))
+
+        elapsed = time.perf_counter() - start
+        scope = f"under {prefix} " if prefix else ""
+        if failed:
+            logging.error(f"Deleted {deleted} objects {scope}from bucket {bucket_name}, {failed} failed")
+            return False
+        logging.info(f"All {deleted} objects {scope}in bucket {bucket_name} have been deleted "
+                     f"in {elapsed:.1f}s ({deleted / max(elapsed, 1e-9):.0f} objects/s)")
         return True
     except ClientError as e:
         logging.error(f"Failed to clear bucket {bucket_name}: {e}")
         return False
 
-def clear_pinecone_index(index_name):
-    """Delete all vectors in a Pinecone index"""
+# Most ids a single Pinecone delete request accepts
+PINECONE_DELETE_BATCH_SIZE = 1000
+PINECONE_QUERY_TOP_K = 1000
+# How long to wait for deletes to show up in the index stats
+PINECONE_VERIFY_TIMEOUT = 60
+
+def _vector_counts(index):
+    stats = index.describe_index_stats()
+    return {name: summary['vector_count'] for name, summary in stats['namespaces'].items()}
+
+def _delete_ids(index, ids, namespace, executor):
+    batches = [ids[i:i + PINECONE_DELETE_BATCH_SIZE] for i in range(0, len(ids), PINECONE_DELETE_BATCH_SIZE)]
+    futures = [executor.submit(index.delete, ids=batch, namespace=namespace) for batch in batches]
+    for future in futures:
+        future.result()
+    return len(ids)
+
+def _delete_listed_ids(index, namespace, executor):
+    """Page through the ids in a namespace with list() and delete them in concurrent batches"""
+    deleted = 0
+    pending = []
+    batch = []
+    for page in index.list(namespace=namespace, limit=100):
+        batch.extend(page)
+        if len(batch) >= PINECONE_DELETE_BATCH_SIZE:
+            pending.append(executor.submit(index.delete, ids=batch, namespace=namespace))
+            deleted += len(batch)
+            batch = []
+    if batch:
+        pending.append(executor.submit(index.delete, ids=batch, namespace=namespace))
+        deleted += len(batch)
+    for future in pending:
+        future.result()
+    return deleted
+
+def _delete_queried_ids(index, namespace, dimension, executor, max_stalls=5):
+    """Find ids with repeated queries and delete them, for indexes without list()"""
+    deleted = set()
+    stalls = 0
+    probe = [1.0 / dimension ** 0.5] * dimension
+    while True:
+        response = index.query(vector=probe, top_k=PINECONE_QUERY_TOP_K, namespace=namespace,
+                               include_values=False)
+        ids = [match['id'] for match in response['matches'] if match['id'] not in deleted]
+        if not response['matches']:
+            return len(deleted)
+        if not ids:
+            # Deletes are eventually consistent, give them time to leave the query results
+            stalls += 1
+            if stalls > max_stalls:
+                return len(deleted)
+            time.sleep(stalls)
+            continue
+        stalls = 0
+        _delete_ids(index, ids, namespace, executor)
+        deleted.update(ids)
+
+def clear_pinecone_namespace(index, namespace, dimension, executor):
+    """Delete every vector in one namespace, returning the method used"""
     try:
-        # Initialize Pinecone
-        pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-        
-        # Connect to the index
-        index = pc.Index(index_name)
-        
-        # Fetch all vector IDs (the method may vary based on the Pinecone API)
-        vector_ids = index.describe_index_stats()['index_size']
-        
-        if vector_ids > 0:
-            # Delete all vectors by ID
-            for i in range(vector_ids):
-                index.delete(ids=[f'vector_id_{i}'])
-        
+        index.delete(delete_all=True, namespace=namespace)
+        return "delete_all"
+    except Exception as e:
+        logging.info(f"delete_all not available for namespace '{namespace}' ({e}), deleting by id")
+    try:
+        deleted = _delete_listed_ids(index, namespace, executor)
+        method = "list"
+    except Exception as e:
+        logging.info(f"list not available for namespace '{namespace}' ({e}), finding ids by query")
+        deleted = _delete_queried_ids(index, namespace, dimension, executor)
+        method = "query"
+    logging.info(f"Deleted {deleted} vectors from namespace '{namespace}' by {method}")
+    return method
+
+def clear_pinecone_index(index_name, namespaces=None, index=None, max_workers=8,
+                         verify_timeout=PINECONE_VERIFY_TIMEOUT):
+    """Delete all vectors in a Pinecone index, namespace by namespace
+
+    Uses delete_all where the index supports it, otherwise lists (or queries for)
+    the real vector ids and deletes them in concurrent batches of 1000. Afterwards
+    the index stats are polled until every cleared namespace is empty.
+    """
+    try:
+        if index is None:
+            # Initialize Pinecone and connect to the index
+            pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
+            index = pc.Index(index_name)
+
+        stats = index.describe_index_stats()
+        if namespaces is None:
+            namespaces = list(stats['namespaces'])
+        dimension = stats['dimension']
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for namespace in namespaces:
+                clear_pinecone_namespace(index, namespace, dimension, executor)
+
+        # Verify the cleared namespaces are empty
+        deadline = time.monotonic() + verify_timeout
+        while True:
+            remaining = {name: count for name, count in _vector_counts(index).items()
+                         if name in namespaces and count}
+            if not remaining:
+                break
+            if time.monotonic() > deadline:
+                logging.error(f"Pinecone index {index_name} still holds vectors after clearing: {remaining}")
+                return False
+            time.sleep(1)
+
         logging.info(f"All vectors in Pinecone index {index_name} have been deleted")
         return True
     except Exception as e:
         logging.error(f"Failed to clear Pinecone index {index_name}: {e}")
         return False
-
-
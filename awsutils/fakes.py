@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+
+
+class FakePineconeIndex:
+    """In-memory stand-in for a Pinecone index client, for tests and benchmarks
+
+    Implements the parts of the client used here: upsert, describe_index_stats,
+    delete (by ids or delete_all), list and query. Each call sleeps for `latency`
+    seconds. Set supports_delete_all or supports_list to False to mimic backends
+    without those operations.
+    """
+
+    def __init__(self, dimension=8, latency=0.0, supports_delete_all=True, supports_list=True,
+                 max_delete_ids=1000):
+        self.dimension = dimension
+        self.latency = latency
+        self.supports_delete_all = supports_delete_all
+        self.supports_list = supports_list
+        self.max_delete_ids = max_delete_ids
+        self.requests = 0
+        self.namespaces = {}
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, vectors, namespace=""):
+        self._request()
+        with self._lock:
+            store = self.namespaces.setdefault(namespace, {})
+            for vector_id, values in vectors:
+                store[vector_id] = values
+        return {'upserted_count': len(vectors)}
+
+    def describe_index_stats(self):
+        self._request()
+        with self._lock:
+            namespaces = {name: {'vector_count': len(store)} for name, store in self.namespaces.items() if store}
+        return {
+            'dimension': self.dimension,
+            'namespaces': namespaces,
+            'total_vector_count': sum(ns['vector_count'] for ns in namespaces.values()),
+        }
+
+    def delete(self, ids=None, delete_all=False, namespace="", filter=None):
+        self._request()
+        if delete_all:
+            if not self.supports_delete_all:
+                raise RuntimeError("delete_all is not supported by this index")
+            with self._lock:
+                self.namespaces.pop(namespace, None)
+            return {}
+        if ids is None or len(ids) > self.max_delete_ids:
+            raise ValueError(f"delete accepts between 1 and {self.max_delete_ids} ids")
+        with self._lock:
+            store = self.namespaces.get(namespace, {})
+            for vector_id in ids:
+                store.pop(vector_id, None)
+        return {}
+
+    def list(self, prefix=None, limit=100, namespace=""):
+        """Yield pages of vector ids, like the serverless list operation"""
+        if not self.supports_list:
+            raise RuntimeError("list is only supported on serverless indexes")
+        limit = limit or 100
+        after = None
+        while True:
+            self._request()
+            with self._lock:
+                ids = sorted(vector_id for vector_id in self.namespaces.get(namespace, {})
+                             if (prefix is None or vector_id.startswith(prefix))
+                             and (after is None or vector_id > after))[:limit]
+            if not ids:
+                return
+            yield ids
+            after = ids[-1]
+
+    def query(self, vector, top_k=10, namespace="", include_values=False, include_metadata=False):
+        self._request()
+        if len(vector) != self.dimension:
+            raise ValueError(f"Query vector dimension {len(vector)} does not match the index dimension {self.dimension}")
+        with self._lock:
+            ids = list(self.namespaces.get(namespace, {}))[:top_k]
+        return {'matches': [{'id': vector_id, 'score': 0.0} for vector_id in ids], 'namespace': namespace}
+
+
+class FakeBedrockAgentRuntime:
+    """Stand-in for the bedrock-agent-runtime client's retrieve_and_generate
+
+    Each call takes `latency` seconds plus up to `jitter`. Calls beyond
+    `max_concurrent` in flight fail with a ThrottlingException ClientError, the way
+    Bedrock rejects requests over its quota. Responses carry a sessionId, reused
+    when the caller passes one back.
+    """
+
+    def __init__(self, latency=2.0, jitter=0.0, max_concurrent=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_concurrent = max_concurrent
+        self.calls = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.sessions = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def retrieve_and_generate(self, input, retrieveAndGenerateConfiguration, sessionId=None):
+        from botocore.exceptions import ClientError
+
+        with self._lock:
+            self.calls += 1
+            if self.max_concurrent is not None and self.in_flight >= self.max_concurrent:
+                self.throttled += 1
+                raise ClientError({'Error': {'Code': "ThrottlingException", 'Message': "Rate exceeded"}},
+                                  "RetrieveAndGenerate")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if sessionId is None:
+                sessionId = f"session-{len(self.sessions)}"
+            history = self.sessions.setdefault(sessionId, [])
+            history.append(input['text'])
+            turn = len(history)
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return {
+            'output': {'text': f"Answer to: {input['text']}"},
+            'sessionId': sessionId,
+            'citations': [],
+            'turn': turn,
+        }
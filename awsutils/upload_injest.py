@@ -1,6 +1,10 @@
 import boto3
 import os
 import logging
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from pprint import pprint
 from dotenv import load_dotenv
@@ -9,9 +13,32 @@ load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 
+# Files uploaded at once, and parts uploaded at once within each multipart file
+UPLOAD_WORKERS = 8
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 ** 2,
+    multipart_chunksize=16 * 1024 ** 2,
+    max_concurrency=8,
+    use_threads=True
+)
+
+# Object metadata holding the MD5 of the whole file, whatever way it was uploaded
+MD5_METADATA_KEY = "md5"
+
 client_s3 = boto3.client('s3')
 bedrock_agent_client = boto3.client('bedrock-agent')
 
+_pooled_client_s3 = None
+
+def get_s3_client():
+    """S3 client with a connection pool large enough for concurrent multipart uploads"""
+    global _pooled_client_s3
+    if _pooled_client_s3 is None:
+        pool_size = UPLOAD_WORKERS * TRANSFER_CONFIG.max_request_concurrency
+        _pooled_client_s3 = boto3.client('s3', config=Config(max_pool_connections=pool_size,
+                                                             retries={'mode': 'adaptive', 'max_attempts': 10}))
+    return _pooled_client_s3
+
 def upload_fileobj_to_s3(file_obj, bucket, object_name):
     """Upload a file-like object to an S3 bucket"""
     try:
@@ -22,10 +49,89 @@ def upload_fileobj_to_s3(file_obj, bucket, object_name):
         logging.error(f"Failed to upload file to {bucket}/{object_name}: {e}")
         return False
 
-def start_ingestion_job(knowledgeBaseId, dataSourceId):
+def file_checksums(file_path, transfer_config=TRANSFER_CONFIG):
+    """MD5 of a file and the ETag S3 gives it when uploaded with transfer_config"""
+    size = os.path.getsize(file_path)
+    whole = hashlib.md5()
+    parts = []
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(transfer_config.multipart_chunksize), b""):
+            whole.update(block)
+            parts.append(hashlib.md5(block).digest())
+    if size < transfer_config.multipart_threshold:
+        return whole.hexdigest(), whole.hexdigest()
+    # Multipart ETags are the MD5 of the part MD5s, suffixed with the part count
+    return whole.hexdigest(), f"{hashlib.md5(b''.join(parts)).hexdigest()}-{len(parts)}"
+
+def is_uploaded(client, bucket, object_name, md5, etag):
+    """True if the object exists with the same content
+
+    Without s3:ListBucket, S3 answers HEAD on a missing key with 403 rather than 404,
+    so a 403 counts as not uploaded and the upload goes ahead.
+    """
+    try:
+        head = client.head_object(Bucket=bucket, Key=object_name)
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code in ("404", "NoSuchKey", "NotFound"):
+            return False
+        if code in ("403", "Forbidden", "AccessDenied"):
+            logging.info(f"Cannot check {bucket}/{object_name} ({code}), uploading it")
+            return False
+        raise
+    if head.get('Metadata', {}).get(MD5_METADATA_KEY) == md5:
+        return True
+    return head['ETag'].strip('"') in (md5, etag)
+
+def upload_file_to_s3(file_path, bucket, object_name, client=None, transfer_config=TRANSFER_CONFIG,
+                      skip_unchanged=True):
+    """Upload one file, returning "uploaded", "skipped" or "failed" """
+    client = client or get_s3_client()
+    try:
+        md5, etag = file_checksums(file_path, transfer_config)
+        if skip_unchanged and is_uploaded(client, bucket, object_name, md5, etag):
+            logging.info(f"Skipped unchanged {bucket}/{object_name}")
+            return "skipped"
+        client.upload_file(file_path, bucket, object_name, Config=transfer_config,
+                           ExtraArgs={'Metadata': {MD5_METADATA_KEY: md5}})
+        logging.info(f"File uploaded to {bucket}/{object_name}")
+        return "uploaded"
+    except (ClientError, OSError) as e:
+        logging.error(f"Failed to upload {file_path} to {bucket}/{object_name}: {e}")
+        return "failed"
+
+def object_names(file_paths, prefix="", root=None):
+    """Object key for each file: prefix + its path relative to root, with / separators
+
+    root defaults to the deepest directory holding all the files, so files sharing a
+    name in different directories get different keys.
+    """
+    if root is None and file_paths:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in file_paths])
+    return {p: prefix + os.path.relpath(os.path.abspath(p), root).replace(os.sep, "/") for p in file_paths}
+
+def upload_files_to_s3(file_paths, bucket, prefix="", client=None, transfer_config=TRANSFER_CONFIG,
+                       max_workers=UPLOAD_WORKERS, skip_unchanged=True, root=None):
+    """Upload many files concurrently with one shared client
+
+    Objects are named by object_names. Returns a dict mapping each file path to
+    "uploaded", "skipped" or "failed".
+    """
+    client = client or get_s3_client()
+    names = object_names(file_paths, prefix, root)
+
+    def upload(file_path):
+        object_name = names[file_path]
+        return upload_file_to_s3(file_path, bucket, object_name, client, transfer_config, skip_unchanged)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(upload, file_paths)))
+
+def start_ingestion_job(knowledgeBaseId, dataSourceId, client=None):
     """Start the ingestion job with the Bedrock Agent"""
+    client = client or bedrock_agent_client
     try:
-        start_job_response = bedrock_agent_client.start_ingestion_job(
+        start_job_response = client.start_ingestion_job(
             knowledgeBaseId=knowledgeBaseId,
             dataSourceId=dataSourceId
         )
@@ -54,4 +160,24 @@ def upload_and_ingest(file_name, bucket, datasourceID, knowledgeBaseId, object_n
 
     return False, "Failed"
 
+def upload_and_ingest_many(file_names, bucket, datasourceID, knowledgeBaseId, prefix="", client=None,
+                           agent_client=None, force_ingest=False, **upload_options):
+    """Upload files from data/ concurrently and start a single ingestion job for the batch
+
+    The ingestion job is skipped when every file was already uploaded, unless
+    force_ingest is set. Returns (success, message, per-file results).
+    """
+    data_directory = os.path.join(os.getcwd(), "data")
+    file_paths = [os.path.join(data_directory, file_name) for file_name in file_names]
+    results = upload_files_to_s3(file_paths, bucket, prefix, client, root=data_directory, **upload_options)
+
+    counts = {status: list(results.values()).count(status) for status in ("uploaded", "skipped", "failed")}
+    message = f"{counts['uploaded']} uploaded, {counts['skipped']} unchanged, {counts['failed']} failed"
+    logging.info(f"Batch upload to {bucket}: {message}")
+    if counts['failed']:
+        return False, f"Failed: {message}", results
 
+    if counts['uploaded'] or force_ingest:
+        if not start_ingestion_job(knowledgeBaseId, datasourceID, agent_client):
+            return False, f"Failed to start ingestion: {message}", results
+    return True, f"Success: {message}", results
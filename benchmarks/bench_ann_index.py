@@ -0,0 +1,99 @@
+"""Recall vs latency benchmark for the vector index backends in pipeline.ann_index
+
+Builds every index kind on synthetic clustered embeddings and reports build time,
+single-query p50/p99 latency, index size and recall@k against exact search.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ann_index --sizes 10000 100000 1000000 --dim 1536
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from pipeline.ann_index import INDEX_KINDS, METRICS, build_index, index_memory_bytes
+
+
+def synthetic_embeddings(n, dimension, clusters=256, seed=0, chunk_size=100000):
+    """Gaussian clusters around random centres, generated in chunks to bound peak memory"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype('float32')
+    embeddings = np.empty((n, dimension), dtype='float32')
+    for start in range(0, n, chunk_size):
+        end = min(n, start + chunk_size)
+        labels = rng.integers(0, clusters, end - start)
+        noise = rng.standard_normal((end - start, dimension), dtype='float32') * 0.5
+        embeddings[start:end] = centres[labels] + noise
+    return embeddings
+
+
+def recall_at_k(found, expected):
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def bench_index(embeddings, queries, expected, kind, metric, k):
+    start = time.perf_counter()
+    index = build_index(embeddings, kind=kind, metric=metric)
+    build_seconds = time.perf_counter() - start
+
+    # Per-query latency, the way the app searches
+    latencies = []
+    found = np.empty((len(queries), k), dtype='int64')
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, indices = index.search(queries[i:i + 1], k)
+        latencies.append(time.perf_counter() - start)
+        found[i] = indices[0]
+
+    return {
+        'kind': kind,
+        'metric': metric,
+        'build_s': round(build_seconds, 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'memory_mb': round(index_memory_bytes(index) / 1024 ** 2, 1),
+        f'recall@{k}': round(recall_at_k(found, expected), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--kinds", nargs="+", default=list(INDEX_KINDS), choices=INDEX_KINDS)
+    parser.add_argument("--metrics", nargs="+", default=["l2", "cosine"], choices=METRICS)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        embeddings = synthetic_embeddings(n, args.dim)
+        rng = np.random.default_rng(1)
+        queries = embeddings[rng.choice(n, args.queries, replace=False)]
+        queries = queries + rng.standard_normal(queries.shape, dtype='float32') * 0.1
+
+        for metric in args.metrics:
+            # Ground truth from exact search with the same metric
+            exact = build_index(embeddings, kind="flat", metric=metric)
+            _, expected = exact.search(queries, args.k)
+            del exact
+
+            for kind in args.kinds:
+                result = bench_index(embeddings, queries, expected, kind, metric, args.k)
+                result['vectors'] = n
+                results.append(result)
+                print(f"n={n:>8} {kind:>8} {metric:>6}  build {result['build_s']:>8.3f}s  "
+                      f"p50 {result['p50_ms']:>8.3f}ms  p99 {result['p99_ms']:>8.3f}ms  "
+                      f"mem {result['memory_mb']:>8.1f}MB  recall@{args.k} {result[f'recall@{args.k}']:.4f}")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
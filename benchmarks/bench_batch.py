@@ -0,0 +1,59 @@
+"""Throughput of the batch ingestion CLI as the worker count grows
+
+Generates a directory of synthetic catalogs and converts it with
+input_process.batch at each worker count (forcing reconversion every time), then
+converts it once more to time the unchanged-file skip.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_batch --files 64 --size-mb 2 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks.bench_xml_streaming import write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--size-mb", type=float, default=1)
+    parser.add_argument("--mode", default="xml")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from input_process.batch import find_inputs, run_batch
+
+    workdir = tempfile.mkdtemp(prefix="bench_batch_")
+    try:
+        for i in range(args.files):
+            write_catalog(os.path.join(workdir, f"catalog_{i:04d}.xml"), int(args.size_mb * 1024 ** 2))
+        paths = find_inputs(workdir)
+        manifest_path = os.path.join(workdir, "batch_manifest.json")
+
+        results = []
+        for workers in args.workers:
+            manifest = run_batch(paths, args.mode, manifest_path, workers=workers, force=True)
+            results.append({'workers': workers, 'seconds': manifest['wall_seconds'], 'counts': manifest['counts']})
+        skip = run_batch(paths, args.mode, manifest_path, workers=max(args.workers))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[0]['seconds'] * results[0]['workers']
+    for result in results:
+        result['files_per_second'] = args.files / result['seconds']
+        result['scaling_efficiency'] = baseline / (result['seconds'] * result['workers'])
+        print(f"{result['workers']:>3} workers: {result['seconds']:7.2f}s  "
+              f"{result['files_per_second']:7.1f} files/s  efficiency {result['scaling_efficiency']:.0%}")
+    print(f"unchanged rerun: {skip['wall_seconds']:.2f}s ({skip['counts']['skipped']} skipped)")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump({'runs': results, 'unchanged_rerun_seconds': skip['wall_seconds']}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
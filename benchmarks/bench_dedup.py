@@ -0,0 +1,76 @@
+"""Redundancy removed by pipeline.dedup on converted catalogs
+
+Converts a synthetic catalog with each converter, chunks the output, and collapses
+duplicate extracts at each Hamming distance (0 = exact duplicates only). Reports the
+extracts left, the embedding tokens and index memory saved, and the dedup time.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_dedup --size-mb 2 --distances 0 3 6
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_xml_streaming import CONVERTERS, write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=1)
+    parser.add_argument("--converters", nargs="+", default=list(CONVERTERS))
+    parser.add_argument("--distances", type=int, nargs="+", default=[0, 3])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    import importlib
+
+    from pipeline.chunking import chunk_file
+    from pipeline.dedup import dedup_chunks
+    from pipeline.embeddings import EMBEDDING_DIMENSION, count_tokens
+
+    workdir = tempfile.mkdtemp(prefix="bench_dedup_")
+    results = []
+    try:
+        xml_path = os.path.join(workdir, "catalog.xml")
+        write_catalog(xml_path, int(args.size_mb * 1024 ** 2))
+        for name in args.converters:
+            module_name, function_name = CONVERTERS[name]
+            with contextlib.redirect_stdout(io.StringIO()):
+                output_path = getattr(importlib.import_module(module_name), function_name)(xml_path, streaming=True)
+            chunks = chunk_file(output_path, "catalog.xml", elements=name == "cleaned_json")
+            tokens = [count_tokens(chunk.text) for chunk in chunks]
+            for distance in args.distances:
+                start = time.perf_counter()
+                unique, occurrences = dedup_chunks(chunks, max_distance=distance)
+                seconds = time.perf_counter() - start
+                unique_tokens = sum(count_tokens(chunk.text) for chunk in unique)
+                result = {
+                    'converter': name,
+                    'max_distance': distance,
+                    'extracts': len(chunks),
+                    'unique_extracts': len(unique),
+                    'largest_group': max(len(group) for group in occurrences) if occurrences else 0,
+                    'tokens': sum(tokens),
+                    'unique_tokens': unique_tokens,
+                    'index_mb_saved': (len(chunks) - len(unique)) * EMBEDDING_DIMENSION * 4 / 1024 ** 2,
+                    'seconds': seconds,
+                }
+                results.append(result)
+                print(f"{name:>14} distance {distance}: {len(chunks):6d} -> {len(unique):6d} extracts "
+                      f"({1 - len(unique) / max(len(chunks), 1):.0%} fewer), tokens {sum(tokens)} -> "
+                      f"{unique_tokens}, index -{result['index_mb_saved']:.1f} MB, {seconds:.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare the enriched-XML serializer with the old JSON -> dicttoxml -> minidom path
+
+Both paths serialize the same synthetic cleaned elements (shaped like the output of
+partition_xml + convert_to_dict). Each runs in a fresh process to measure wall time
+and peak RSS, and the outputs are checked to be byte-identical.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_enriched_xml --elements 20000 100000
+"""
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import resource
+import time
+
+WORDS = ("steel zinc bracket washer flange torque hex bolt gasket bearing seal housing "
+         "thread pitch coated assembly mount valve & <M6> \"quoted\" it's").split()
+
+
+def synthetic_elements(count):
+    elements = []
+    for i in range(count):
+        text = " ".join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(5 + i % 20))
+        elements.append({
+            "type": "NarrativeText" if i % 3 else "Title",
+            "element_id": hashlib.md5(str(i).encode()).hexdigest(),
+            "text": text,
+            "metadata": {
+                "languages": ["eng"],
+                "filetype": "application/xml",
+                "page_number": None if i % 2 else i,
+                "is_continuation": bool(i % 5),
+            },
+        })
+    return elements
+
+
+def old_path(elements):
+    from dicttoxml import dicttoxml
+    from xml.dom.minidom import parseString
+
+    json_data = json.dumps(elements, indent=2)
+    json_dict = json.loads(json_data)
+    xml = dicttoxml(json_dict, custom_root='root', attr_type=False)
+    return parseString(xml).toprettyxml()
+
+
+def new_path(elements):
+    from input_process.xml_serializer import write_elements_as_xml
+
+    out = io.StringIO()
+    write_elements_as_xml(elements, out)
+    return out.getvalue()
+
+
+def _run(path_name, count, queue):
+    elements = synthetic_elements(count)
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    output = (old_path if path_name == "old" else new_path)(elements)
+    seconds = time.perf_counter() - start
+    queue.put({
+        'seconds': seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'input_rss_mb': baseline_mb,
+        'sha256': hashlib.sha256(output.encode('utf-8')).hexdigest(),
+    })
+
+
+def run_isolated(path_name, count):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(path_name, count, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.elements:
+        old = run_isolated("old", count)
+        new = run_isolated("new", count)
+        identical = old['sha256'] == new['sha256']
+        results.append({'elements': count, 'old': old, 'new': new, 'identical': identical})
+        print(f"{count:>8} elements: old {old['seconds']:>7.2f}s / {old['peak_rss_mb'] - old['input_rss_mb']:>8.1f} MB extra RSS, "
+              f"new {new['seconds']:>7.2f}s / {new['peak_rss_mb'] - new['input_rss_mb']:>8.1f} MB extra RSS, "
+              f"speedup {old['seconds'] / new['seconds']:.1f}x, identical={identical}")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
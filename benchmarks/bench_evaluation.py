@@ -0,0 +1,84 @@
+"""BERTScore evaluation: per-question bert_score.score calls against the batched scorer
+
+Scores synthetic (response, question) pairs on CPU the way run_frontend used to,
+one bert_score.score call per question, then with pipeline.evaluation's cached
+scorer, cold and again with a warm score cache.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_evaluation --pairs 1000 --model distilbert-base-uncased
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+WORDS = ("the bracket is zinc coated steel with an m6 thread and fits the housing flange "
+         "torque rating pitch bearing seal gasket valve assembly part number price").split()
+
+
+def synthetic_pairs(count, per_question=5, seed=0):
+    rng = random.Random(seed)
+    questions = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))) + "?"
+                 for _ in range(count // per_question)]
+    responses = [[" ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))) + "."
+                  for _ in range(per_question)] for _ in questions]
+    return responses, questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--model", help="bert_score model_type (default: the English default model)")
+    parser.add_argument("--baseline-questions", type=int, default=20,
+                        help="questions timed with the per-question loop, extrapolated to all of them")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from bert_score import score
+    from pipeline.evaluation import ScoreCache, load_scorer, score_responses
+
+    responses, questions = synthetic_pairs(args.pairs)
+
+    # The old loop, fixed to pass one reference per candidate
+    sample = min(args.baseline_questions, len(questions))
+    start = time.perf_counter()
+    for response, question in zip(responses[:sample], questions[:sample]):
+        score(response, [question] * len(response), model_type=args.model, lang='en')
+    loop_seconds = (time.perf_counter() - start) * len(questions) / sample
+
+    start = time.perf_counter()
+    scorer = load_scorer(args.model)
+    load_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ScoreCache(os.path.join(workdir, "scores.sqlite"))
+        start = time.perf_counter()
+        score_responses(responses, questions, scorer, cache)
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        score_responses(responses, questions, scorer, cache)
+        warm_seconds = time.perf_counter() - start
+        cache.close()
+
+    result = {
+        'pairs': len(questions) * len(responses[0]),
+        'model': scorer.model_type,
+        'per_question_loop_seconds': loop_seconds,
+        'scorer_load_seconds': load_seconds,
+        'batched_cold_seconds': cold_seconds,
+        'batched_warm_cache_seconds': warm_seconds,
+    }
+    print(f"{result['pairs']} pairs with {result['model']}:")
+    print(f"  per-question loop (extrapolated from {sample} questions): {loop_seconds:8.1f}s")
+    print(f"  batched, scorer loaded once in {load_seconds:.1f}s:           {cold_seconds:8.1f}s")
+    print(f"  batched, warm score cache:                        {warm_seconds:8.2f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Offline throughput benchmark for the completion scheduler in pipeline.generation
+
+Answers synthetic questions (k extracts each) against FakeChatClient, first one
+request at a time like the old per-extract loop, then concurrently at each of the
+given concurrency caps.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_generation --questions 200 --latency 0.5 --concurrency 8 32 64
+"""
+import argparse
+import json
+import time
+
+from pipeline.generation import (
+    CHAT_MODEL, TEMPERATURE, CompletionRequest, FakeChatClient,
+    build_messages, run_completions
+)
+
+
+def synthetic_requests(questions, k):
+    return [
+        CompletionRequest(build_messages(f"Part {q}-{i} has a torque rating of {i * 10} Nm.",
+                                         f"What is the torque rating of part {q}?"),
+                          CHAT_MODEL, TEMPERATURE)
+        for q in range(questions)
+        for i in range(k)
+    ]
+
+
+def bench(requests, concurrency, args):
+    client = FakeChatClient(latency=args.latency, jitter=args.jitter, rate_limit_rpm=args.server_rpm)
+    start = time.perf_counter()
+    results = run_completions(requests, client, max_concurrency=concurrency,
+                              requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                              base_delay=0.05, max_delay=1.0)
+    seconds = time.perf_counter() - start
+    expected = run_completions(requests[:1], FakeChatClient(latency=0))[0]
+    assert results[0] == expected, "results must come back in request order"
+    return {
+        'concurrency': concurrency,
+        'requests': len(requests),
+        'seconds': round(seconds, 3),
+        'requests_per_s': round(len(requests) / seconds, 1),
+        'failed': sum(isinstance(r, Exception) for r in results),
+        'throttled': client.throttled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--rpm", type=int, default=100000, help="client-side requests per minute")
+    parser.add_argument("--tpm", type=int, default=10000000, help="client-side tokens per minute")
+    parser.add_argument("--server-rpm", type=int, default=None, help="simulate server throttling above this rate")
+    parser.add_argument("--sequential", action="store_true", help="also time one request at a time")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    requests = synthetic_requests(args.questions, args.k)
+    results = []
+    for concurrency in ([1] if args.sequential else []) + args.concurrency:
+        result = bench(requests, concurrency, args)
+        results.append(result)
+        print(f"concurrency {concurrency:>4}: {result['requests']} completions in {result['seconds']:>8.2f}s "
+              f"({result['requests_per_s']:>7.1f}/s), {result['throttled']} throttled, {result['failed']} failed")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
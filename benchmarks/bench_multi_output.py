@@ -0,0 +1,81 @@
+"""One-pass multi-output conversion against running each converter on its own
+
+Generates a synthetic catalog and produces the plain, cleaned-JSON, enriched-XML and
+direct-JSON outputs twice: once with the four input_process converters one after
+another, once with input_process.multi_output.convert_document. Both are timed in
+streaming and in-memory mode and the outputs are checked to be byte-identical.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_multi_output --size-mb 2 --modes streaming in-memory
+"""
+import argparse
+import contextlib
+import filecmp
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_xml_streaming import CONVERTERS, write_catalog
+
+
+def run_converters(xml_path, streaming):
+    paths = {}
+    start = time.perf_counter()
+    # The converters are named after the output they produce
+    for output, (module_name, function_name) in CONVERTERS.items():
+        converter = getattr(importlib.import_module(module_name), function_name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths[output] = converter(xml_path, streaming=streaming)
+    return time.perf_counter() - start, paths
+
+
+def run_multi_output(xml_path, output_dir, streaming):
+    from input_process.multi_output import convert_document
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        paths = convert_document(xml_path, output_dir=output_dir, streaming=streaming)
+    return time.perf_counter() - start, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=1)
+    parser.add_argument("--modes", nargs="+", default=["streaming", "in-memory"], choices=["streaming", "in-memory"])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_multi_output_")
+    results = []
+    try:
+        xml_path = os.path.join(workdir, "catalog.xml")
+        write_catalog(xml_path, int(args.size_mb * 1024 ** 2))
+        for mode in args.modes:
+            streaming = mode == "streaming"
+            separate_seconds, separate = run_converters(xml_path, streaming)
+            single_seconds, single = run_multi_output(xml_path, os.path.join(workdir, f"multi_{mode}"), streaming)
+            identical = {output: bool(separate[output] and single and filecmp.cmp(separate[output], single[output],
+                                                                              shallow=False))
+                         for output in CONVERTERS}
+            results.append({'mode': mode, 'separate_seconds': separate_seconds, 'single_pass_seconds': single_seconds,
+                            'speedup': separate_seconds / single_seconds, 'identical': identical})
+            print(f"{mode:>9}: converters {separate_seconds:7.2f}s, single pass {single_seconds:7.2f}s "
+                  f"({separate_seconds / single_seconds:.1f}x), identical outputs: "
+                  f"{', '.join(name for name, same in identical.items() if same) or 'none'}")
+            different = [name for name, same in identical.items() if not same]
+            if different:
+                print(f"           DIFFERENT: {', '.join(different)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
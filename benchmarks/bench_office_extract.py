@@ -0,0 +1,160 @@
+"""Office document extraction throughput as the worker count grows
+
+Generates a multi-hundred-page PDF, a large multi-sheet spreadsheet, a slide deck
+and a Word document, extracts each with input_process.office_extract at every
+worker count, and chunks the extracted text with pipeline.chunking. Reports parts
+per second, scaling efficiency and peak memory of the extracting process.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_office_extract --pages 400 --rows 50000 --workers 1 2 4
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+WORDS = ("bearing", "housing", "torque", "valve", "flange", "gasket", "sensor", "pump", "rated", "pressure",
+         "maximum", "assembly", "replacement", "interval", "inspect", "warranty", "steel", "coupling")
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def write_pdf(path, pages, lines_per_page=40, seed=0):
+    """A plain text PDF written by hand so the benchmark needs no PDF writer"""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Section {page + 1}.{line + 1} {_sentence(rng)}" for line in range(lines_per_page)]
+        text = "".join(f"({line}) Tj T* " for line in lines)
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text}ET".encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def write_xlsx(path, sheets, rows, seed=0):
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    for sheet in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet + 1}")
+        worksheet.append(["Part", "Description", "Price", "Stock", "Supplier"])
+        for row in range(rows // sheets):
+            worksheet.append([f"P-{sheet}-{row:06d}", _sentence(rng, 6), round(rng.uniform(1, 500), 2),
+                              rng.randint(0, 1000), rng.choice(WORDS).title()])
+    workbook.save(path)
+
+
+def write_pptx(path, slides, seed=0):
+    from pptx import Presentation
+
+    rng = random.Random(seed)
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for slide_number in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {slide_number + 1}: {_sentence(rng, 4)}"
+        slide.placeholders[1].text = "\n".join(_sentence(rng) for _ in range(6))
+    presentation.save(path)
+
+
+def write_docx(path, paragraphs, seed=0):
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    for i in range(paragraphs):
+        document.add_paragraph(f"{i + 1}. {_sentence(rng, 20)}")
+    document.save(path)
+
+
+def measure(path, workers):
+    from input_process.office_extract import iter_office_text
+
+    start = time.perf_counter()
+    parts = 0
+    characters = 0
+    for _, text in iter_office_text(path, workers):
+        parts += 1
+        characters += len(text)
+    return {'workers': workers, 'seconds': time.perf_counter() - start, 'parts': parts, 'characters': characters}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=40000)
+    parser.add_argument("--sheets", type=int, default=8)
+    parser.add_argument("--slides", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from input_process.office_extract import process_office_to_txt
+    from pipeline.chunking import chunk_file
+    from pipeline.instrumentation import peak_rss_mb
+
+    workdir = tempfile.mkdtemp(prefix="bench_office_")
+    documents = {
+        "pdf": (os.path.join(workdir, "manual.pdf"), lambda p: write_pdf(p, args.pages)),
+        "xlsx": (os.path.join(workdir, "catalog.xlsx"), lambda p: write_xlsx(p, args.sheets, args.rows)),
+        "pptx": (os.path.join(workdir, "deck.pptx"), lambda p: write_pptx(p, args.slides)),
+        "docx": (os.path.join(workdir, "report.docx"), lambda p: write_docx(p, args.paragraphs)),
+    }
+    results = {}
+    try:
+        for kind, (path, write) in documents.items():
+            write(path)
+            runs = [measure(path, workers) for workers in args.workers]
+            baseline = runs[0]['seconds'] * runs[0]['workers']
+            for run in runs:
+                run['parts_per_second'] = run['parts'] / run['seconds']
+                run['scaling_efficiency'] = baseline / (run['seconds'] * run['workers'])
+                print(f"{kind:>5} {run['workers']:>3} workers: {run['seconds']:7.2f}s  {run['parts']:5d} parts  "
+                      f"{run['parts_per_second']:8.1f} parts/s  efficiency {run['scaling_efficiency']:.0%}")
+
+            start = time.perf_counter()
+            txt_path = process_office_to_txt(path, workers=max(args.workers))
+            chunks = chunk_file(txt_path)
+            results[kind] = {
+                'size_mb': os.path.getsize(path) / 1024 ** 2,
+                'runs': runs,
+                'extract_and_chunk_seconds': time.perf_counter() - start,
+                'chunks': len(chunks),
+            }
+            print(f"{kind:>5} {results[kind]['size_mb']:.1f} MB -> {len(chunks)} chunks, extract and chunk "
+                  f"{results[kind]['extract_and_chunk_seconds']:.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"peak RSS of this process: {peak_rss_mb():.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump({'documents': results, 'peak_rss_mb': peak_rss_mb()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
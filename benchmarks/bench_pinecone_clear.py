@@ -0,0 +1,72 @@
+"""Clearing a Pinecone index: the old guessed-id loop against clear_pinecone_index
+
+Runs on awsutils.fakes.FakePineconeIndex with a per-request delay. The old routine
+deletes `vector_id_{i}` one request at a time, so it is timed on a sample and
+extrapolated; the new one is timed for each backend capability (delete_all, list
+only, query only).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pinecone_clear --vectors 20000 --namespaces 4 --latency-ms 20
+"""
+import argparse
+import json
+import time
+
+from awsutils.fakes import FakePineconeIndex
+
+BACKENDS = {
+    "delete_all": {},
+    "list": {'supports_delete_all': False},
+    "query": {'supports_delete_all': False, 'supports_list': False},
+}
+
+
+def filled_index(vectors, namespaces, latency, **capabilities):
+    index = FakePineconeIndex(dimension=8, **capabilities)
+    per_namespace = vectors // namespaces
+    for n in range(namespaces):
+        index.upsert([(f"doc-{n}-{i}#chunk", [0.0] * 8) for i in range(per_namespace)], namespace=f"ns{n}")
+    index.latency = latency
+    index.requests = 0
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--namespaces", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--old-sample", type=int, default=200, help="old-style deletes actually timed")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from awsutils.clear_files import clear_pinecone_index
+
+    latency = args.latency_ms / 1000
+    index = filled_index(args.vectors, args.namespaces, latency)
+    start = time.perf_counter()
+    total = index.describe_index_stats()['total_vector_count']
+    for i in range(min(total, args.old_sample)):
+        index.delete(ids=[f'vector_id_{i}'])
+    old_seconds = (time.perf_counter() - start) * total / min(total, args.old_sample)
+    old_left = index.describe_index_stats()['total_vector_count']
+    results = {'old': {'extrapolated_seconds': old_seconds, 'requests': total + 1, 'left_behind': old_left}}
+    print(f"{'old loop':>12}: ~{old_seconds:8.1f}s, {total + 1} requests, leaves {old_left} vectors "
+          f"(ids are never vector_id_N)")
+
+    for name, capabilities in BACKENDS.items():
+        index = filled_index(args.vectors, args.namespaces, latency, **capabilities)
+        start = time.perf_counter()
+        ok = clear_pinecone_index("bench", index=index)
+        seconds = time.perf_counter() - start
+        left = index.describe_index_stats()['total_vector_count']
+        results[name] = {'seconds': seconds, 'requests': index.requests, 'left_behind': left, 'ok': ok}
+        print(f"{name:>12}: {seconds:9.2f}s, {index.requests} requests, leaves {left} vectors")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Serial against concurrent Bedrock question answering on a stubbed client
+
+Answers synthetic questions with awsutils.fakes.FakeBedrockAgentRuntime, which
+sleeps to simulate the latency of retrieve_and_generate and throttles calls over
+its concurrency quota. The serial loop is the old process_questions behaviour.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_rag --questions 500 --latency 3 --quota 10 --in-flight 8 16 32
+"""
+import argparse
+import json
+import os
+import time
+
+from awsutils.fakes import FakeBedrockAgentRuntime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--quota", type=int, default=10, help="concurrent calls before throttling")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--serial-sample", type=int, default=10, help="questions timed serially, extrapolated")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    from awsutils.RAG import process_questions, retrieve_and_generate
+
+    questions = [f"What is the torque rating of part {i}?" for i in range(args.questions)]
+
+    client = FakeBedrockAgentRuntime(args.latency, args.jitter, args.quota)
+    sample = min(args.serial_sample, len(questions))
+    start = time.perf_counter()
+    for question in questions[:sample]:
+        retrieve_and_generate(question, "kb", "model", client=client)
+    serial_seconds = (time.perf_counter() - start) * len(questions) / sample
+    results = [{'in_flight': 1, 'seconds': serial_seconds, 'extrapolated': True}]
+    print(f"serial: ~{serial_seconds:7.1f}s (extrapolated from {sample} questions)")
+
+    for in_flight in args.in_flight:
+        client = FakeBedrockAgentRuntime(args.latency, args.jitter, args.quota)
+        start = time.perf_counter()
+        responses = process_questions(questions, "kb", "model", max_in_flight=in_flight, client=client)
+        seconds = time.perf_counter() - start
+        in_order = all(r is not None and r['output']['text'] == f"Answer to: {q}" for r, q in zip(responses, questions))
+        results.append({'in_flight': in_flight, 'seconds': seconds, 'throttled': client.throttled,
+                        'peak_in_flight': client.peak_in_flight, 'in_order': in_order,
+                        'failed': sum(r is None for r in responses)})
+        print(f"in flight {in_flight:>3}: {seconds:7.1f}s  speedup {serial_seconds / seconds:5.1f}x  "
+              f"throttled {client.throttled:>4}  peak {client.peak_in_flight:>3}  in order {in_order}")
+
+    # Follow-up groups of three share one session each
+    client = FakeBedrockAgentRuntime(args.latency, args.jitter, args.quota)
+    groups = [i // 3 for i in range(len(questions))]
+    responses = process_questions(questions, "kb", "model", max_in_flight=max(args.in_flight),
+                                  follow_up_groups=groups, client=client)
+    sessions = len({r['sessionId'] for r in responses if r})
+    print(f"follow-up groups: {len(set(groups))} groups answered in {sessions} sessions")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
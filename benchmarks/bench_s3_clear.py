@@ -0,0 +1,92 @@
+"""Clearing a large bucket: the old single-page loop against the batched, parallel clear
+
+Fills a moto-mocked bucket with synthetic keys, times the old approach (one
+list_objects_v2 call, one delete_object per key) on its first page and reports
+what it leaves behind, then refills the bucket and clears it with
+clear_s3_bucket. A fixed per-request delay stands in for the network round trip.
+
+Usage (from the repository root, needs moto):
+    python -m benchmarks.bench_s3_clear --keys 200000 --latency-ms 20
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BUCKET = "bench-clear"
+
+
+def fill_bucket(client, count, prefix="processed/"):
+    def put(i):
+        client.put_object(Bucket=BUCKET, Key=f"{prefix}{i:07d}_cleaned_xml.txt", Body=b"x")
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(put, range(count)))
+
+
+def count_keys(client):
+    paginator = client.get_paginator("list_objects_v2")
+    return sum(page.get("KeyCount", 0) for page in paginator.paginate(Bucket=BUCKET))
+
+
+def old_clear(client):
+    objects = client.list_objects_v2(Bucket=BUCKET)
+    for obj in objects.get("Contents", []):
+        client.delete_object(Bucket=BUCKET, Key=obj["Key"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    from moto import mock_aws
+
+    with mock_aws():
+        import boto3
+        from botocore.config import Config
+        from awsutils.clear_files import clear_s3_bucket
+
+        client = boto3.client("s3", config=Config(max_pool_connections=32))
+        client.create_bucket(Bucket=BUCKET)
+        fill_bucket(client, args.keys)
+        client.meta.events.register("before-send.s3", lambda **kwargs: time.sleep(args.latency_ms / 1000))
+
+        start = time.perf_counter()
+        old_clear(client)
+        old_seconds = time.perf_counter() - start
+        old_left = count_keys(client)
+        old_deleted = args.keys - old_left
+
+        fill_bucket(client, args.keys)
+        start = time.perf_counter()
+        ok = clear_s3_bucket(BUCKET, client=client, max_workers=args.workers)
+        new_seconds = time.perf_counter() - start
+        new_left = count_keys(client)
+
+    result = {
+        'keys': args.keys,
+        'latency_ms': args.latency_ms,
+        'old': {'seconds': old_seconds, 'deleted': old_deleted, 'left_behind': old_left,
+                'extrapolated_seconds_for_all': old_seconds * args.keys / max(old_deleted, 1)},
+        'new': {'seconds': new_seconds, 'ok': ok, 'left_behind': new_left,
+                'objects_per_second': args.keys / new_seconds},
+    }
+    print(f"old: deleted {old_deleted} in {old_seconds:.1f}s, left {old_left} behind "
+          f"(~{result['old']['extrapolated_seconds_for_all']:.0f}s for all keys at that rate)")
+    print(f"new: cleared {args.keys - new_left} in {new_seconds:.1f}s "
+          f"({result['new']['objects_per_second']:.0f} objects/s), left {new_left}, ok={ok}")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Serial upload_and_ingest against the concurrent batch upload, on a local S3 mock
+
+Creates a directory of synthetic processed outputs and uploads it to a moto-mocked
+bucket: once file by file as upload_and_ingest does (one ingestion job per file),
+once with upload_and_ingest_many, and once more to time skipping unchanged objects.
+A fixed per-request delay stands in for the network round trip.
+
+Usage (from the repository root, needs moto):
+    python -m benchmarks.bench_s3_upload --files 200 --size-kb 256 --latency-ms 30
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+BUCKET = "bench-processed"
+
+
+class CountingAgentClient:
+    """Stands in for the bedrock-agent client and counts ingestion jobs"""
+
+    def __init__(self):
+        self.jobs = 0
+
+    def start_ingestion_job(self, knowledgeBaseId, dataSourceId):
+        self.jobs += 1
+        return {'ingestionJob': {'status': "STARTING"}}
+
+
+def add_latency(client, seconds):
+    def sleep(**kwargs):
+        time.sleep(seconds)
+    client.meta.events.register("before-send.s3", sleep)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    from moto import mock_aws
+
+    workdir = tempfile.mkdtemp(prefix="bench_s3_")
+    cwd = os.getcwd()
+    try:
+        os.makedirs(os.path.join(workdir, "data"))
+        file_names = []
+        for i in range(args.files):
+            file_names.append(f"catalog_{i:05d}_cleaned_xml.txt")
+            with open(os.path.join(workdir, "data", file_names[-1]), "wb") as f:
+                f.write(os.urandom(args.size_kb * 1024))
+        os.chdir(workdir)
+
+        with mock_aws():
+            import boto3
+            from awsutils import upload_injest
+
+            serial_client = boto3.client("s3")
+            serial_client.create_bucket(Bucket=BUCKET)
+            add_latency(serial_client, args.latency_ms / 1000)
+            agent = CountingAgentClient()
+            with mock.patch.object(upload_injest, "client_s3", serial_client), \
+                    mock.patch.object(upload_injest, "bedrock_agent_client", agent):
+                start = time.perf_counter()
+                for file_name in file_names:
+                    upload_injest.upload_and_ingest(file_name, BUCKET, "ds", "kb", object_name="serial/" + file_name)
+                serial_seconds = time.perf_counter() - start
+            serial_jobs = agent.jobs
+
+            pooled_client = upload_injest.get_s3_client()
+            add_latency(pooled_client, args.latency_ms / 1000)
+            runs = {}
+            for run in ("batch", "unchanged"):
+                agent = CountingAgentClient()
+                start = time.perf_counter()
+                ok, message, _ = upload_injest.upload_and_ingest_many(
+                    file_names, BUCKET, "ds", "kb", prefix="batch/", agent_client=agent, max_workers=args.workers)
+                runs[run] = {'seconds': time.perf_counter() - start, 'ingestion_jobs': agent.jobs, 'message': message}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        'files': args.files,
+        'size_kb': args.size_kb,
+        'latency_ms': args.latency_ms,
+        'serial': {'seconds': serial_seconds, 'ingestion_jobs': serial_jobs},
+        **runs,
+    }
+    print(f"serial upload_and_ingest: {serial_seconds:7.2f}s, {serial_jobs} ingestion jobs")
+    for run in ("batch", "unchanged"):
+        print(f"{run:>24}: {runs[run]['seconds']:7.2f}s, {runs[run]['ingestion_jobs']} ingestion jobs "
+              f"({runs[run]['message']})")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
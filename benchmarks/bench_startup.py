@@ -0,0 +1,98 @@
+"""Cold-start profile of the Streamlit frontend
+
+Runs `python -X importtime -c "import frontend"` in a fresh interpreter and reports
+the total import time, the slowest top-level imports and which heavy modules were
+loaded. Then renders the upload page with streamlit's AppTest in fresh processes
+and reports the wall time from interpreter start to a rendered page.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("bert_score", "torch", "transformers", "faiss", "openai", "pandas", "unstructured",
+                 "numpy", "tiktoken")
+
+RENDER_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file("main.py", default_timeout=120)
+app.run()
+print(time.perf_counter() - start, len(app.exception), len(app.get("file_uploader")))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.getcwd() + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_profile(top):
+    command = [sys.executable, "-X", "importtime", "-c",
+               "import sys, json, frontend; "
+               f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"]
+    result = subprocess.run(command, capture_output=True, text=True, env=_env(), check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append({'module': name.strip(), 'cumulative_ms': int(cumulative_us) / 1000, 'depth': depth})
+    total = next((i['cumulative_ms'] for i in imports if i['module'] == "frontend"), None)
+    # Direct imports of frontend and everything imported before it at top level
+    top_level = sorted((i for i in imports if i['depth'] <= 1), key=lambda i: -i['cumulative_ms'])[:top]
+    return {
+        'frontend_import_ms': total,
+        'slowest_imports': [{k: i[k] for k in ("module", "cumulative_ms")} for i in top_level],
+        'heavy_modules_loaded': json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def render_times(runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", RENDER_SCRIPT], capture_output=True, text=True,
+                                env=_env(), check=True)
+        total = time.perf_counter() - start
+        render_seconds, exceptions, uploaders = result.stdout.split()
+        times.append({'process_seconds': total, 'render_seconds': float(render_seconds),
+                      'exceptions': int(exceptions), 'uploaders': int(uploaders)})
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    profile = import_profile(args.top)
+    print(f"import frontend: {profile['frontend_import_ms']:.0f} ms")
+    for item in profile['slowest_imports']:
+        print(f"  {item['cumulative_ms']:8.1f} ms  {item['module']}")
+    print(f"heavy modules loaded at import: {', '.join(profile['heavy_modules_loaded']) or 'none'}")
+
+    runs = render_times(args.runs)
+    median = statistics.median(r['process_seconds'] for r in runs)
+    print(f"cold start to rendered upload page: median {median:.2f}s over {args.runs} runs "
+          f"(AppTest render {statistics.median(r['render_seconds'] for r in runs):.2f}s, "
+          f"{runs[0]['uploaders']} uploaders, {runs[0]['exceptions']} exceptions)")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump({'import_profile': profile, 'render_runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
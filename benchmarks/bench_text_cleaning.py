@@ -0,0 +1,107 @@
+"""Per-element cost of the fused text cleaning engine against the original cleaner chain
+
+Cleans synthetic catalog elements (shaped like partition_xml + convert_to_dict output,
+with values repeating the way catalog XML does) with the original recursive
+clean_text/process_element and with input_process.text_cleaning.clean_element, and
+checks that both produce the same elements.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_text_cleaning --elements 50000 --distinct 2000
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+
+WORDS = ("steel zinc bracket washer flange torque hex bolt gasket bearing seal housing "
+         "thread pitch coated assembly mount valve M6-20 DIN-933 A2-70 – • e").split()
+ENDINGS = ("", ".", ";", " -", ":", "  ")
+
+
+def synthetic_elements(count, distinct, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(distinct):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        if rng.random() < 0.2:
+            text = text.replace(" ", "  ", 1)
+        if rng.random() < 0.1:
+            text = text + "\n" + rng.choice(WORDS)
+        texts.append(text + rng.choice(ENDINGS))
+    elements = []
+    for i in range(count):
+        elements.append({
+            "type": "NarrativeText" if i % 3 else "Title",
+            "element_id": hashlib.md5(str(i).encode()).hexdigest(),
+            "text": texts[rng.randrange(distinct)],
+            "metadata": {
+                "languages": ["eng"],
+                "filetype": "application/xml",
+                "parent_id": hashlib.md5(str(i // 10).encode()).hexdigest(),
+                "emphasized_text_contents": [texts[rng.randrange(distinct)]] if i % 4 == 0 else None,
+            },
+        })
+    return elements
+
+
+def reference_process_element(element):
+    from input_process.text_cleaning import reference_clean_text
+
+    if isinstance(element, dict):
+        return {k: reference_process_element(v) for k, v in element.items()}
+    elif isinstance(element, list):
+        return [reference_process_element(item) for item in element]
+    elif isinstance(element, str):
+        return reference_clean_text(element)
+    else:
+        return element
+
+
+def timed(function, elements):
+    start = time.perf_counter()
+    cleaned = [function(element) for element in elements]
+    return time.perf_counter() - start, cleaned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=2000, help="number of distinct text values")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from input_process.text_cleaning import clean_element, clean_text
+
+    elements = synthetic_elements(args.elements, args.distinct)
+    old_seconds, old = timed(reference_process_element, elements)
+
+    clean_text.cache_clear()
+    cold_seconds, new = timed(clean_element, elements)
+    info = clean_text.cache_info()
+    warm_seconds, _ = timed(clean_element, elements)
+
+    result = {
+        'elements': args.elements,
+        'distinct_texts': args.distinct,
+        'reference_us_per_element': old_seconds / args.elements * 1e6,
+        'engine_cold_us_per_element': cold_seconds / args.elements * 1e6,
+        'engine_warm_us_per_element': warm_seconds / args.elements * 1e6,
+        'speedup_cold': old_seconds / cold_seconds,
+        'speedup_warm': old_seconds / warm_seconds,
+        'cache_hit_rate': info.hits / max(1, info.hits + info.misses),
+        'identical': old == new,
+    }
+    print(f"reference {result['reference_us_per_element']:8.1f} us/element")
+    print(f"engine    {result['engine_cold_us_per_element']:8.1f} us/element cold "
+          f"({result['speedup_cold']:.1f}x, cache hit rate {result['cache_hit_rate']:.0%}), "
+          f"{result['engine_warm_us_per_element']:.1f} us/element warm ({result['speedup_warm']:.1f}x)")
+    print(f"identical output: {result['identical']}")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Peak memory benchmark for the streaming mode of the input_process converters
+
+Generates a synthetic parts catalog of the requested size, then runs each converter
+in a fresh process, in-memory and streaming, reporting wall time and peak RSS.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_xml_streaming --size-mb 2048 --modes streaming
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+CONVERTERS = {
+    "plain": ("input_process.convert_xml_to_txt", "process_xml_to_txt"),
+    "cleaned_json": ("input_process.xml_to_cleaned_json_txt", "process_xml_to_json_txt"),
+    "enriched_xml": ("input_process.xml_to_cleaned_xml_txt", "process_and_clean_xml_to_txt"),
+    "direct_json": ("input_process.xml_to_json_direct_xml2json_txt", "xml_to_json_txt"),
+}
+
+WORDS = ("steel zinc bracket washer flange torque hex bolt gasket bearing seal housing "
+         "thread pitch coated assembly mount valve").split()
+
+
+def write_catalog(path, size_bytes):
+    """Write <catalog><part>...</part>...</catalog> until the file reaches size_bytes"""
+    with open(path, "w", encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<catalog version="1">\n')
+        written = 0
+        i = 0
+        while written < size_bytes:
+            description = " ".join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(24))
+            record = (
+                f'  <part id="P{i:08d}">\n'
+                f'    <name>{escape(WORDS[i % len(WORDS)].title())} part {i}</name>\n'
+                f'    <description>- {escape(description)}.</description>\n'
+                f'    <price currency="EUR">{(i % 997) / 10:.2f}</price>\n'
+                f'    <category>{WORDS[i % 5]}</category>\n'
+                f'  </part>\n'
+            )
+            f.write(record)
+            written += len(record)
+            i += 1
+        f.write('</catalog>\n')
+    return i
+
+
+def _run_converter(name, xml_path, streaming, queue):
+    import importlib
+
+    module_name, function_name = CONVERTERS[name]
+    converter = getattr(importlib.import_module(module_name), function_name)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    output_path = converter(xml_path, streaming=streaming)
+    seconds = time.perf_counter() - start
+    queue.put({
+        'seconds': seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'import_rss_mb': baseline_kb / 1024,
+        'output_mb': os.path.getsize(output_path) / 1024 ** 2 if output_path else None,
+    })
+
+
+def run_isolated(name, xml_path, streaming):
+    # A fresh process per run so peak RSS is not shared between runs
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_converter, args=(name, xml_path, streaming, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {'error': f"exit code {process.exitcode}"}
+    return queue.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=100)
+    parser.add_argument("--converters", nargs="+", default=list(CONVERTERS), choices=list(CONVERTERS))
+    parser.add_argument("--modes", nargs="+", default=["in-memory", "streaming"], choices=["in-memory", "streaming"])
+    parser.add_argument("--workdir", help="directory for the generated XML (default: a temp dir)")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_xml_")
+    xml_path = os.path.join(workdir, "catalog.xml")
+    records = write_catalog(xml_path, int(args.size_mb * 1024 ** 2))
+    input_mb = os.path.getsize(xml_path) / 1024 ** 2
+    print(f"Generated {xml_path}: {input_mb:.1f} MB, {records} records", file=sys.stderr)
+
+    results = []
+    try:
+        for name in args.converters:
+            for mode in args.modes:
+                result = run_isolated(name, xml_path, mode == "streaming")
+                result.update(converter=name, mode=mode, input_mb=round(input_mb, 1))
+                results.append(result)
+                if 'error' in result:
+                    print(f"{name:>13} {mode:>9}: failed ({result['error']})")
+                else:
+                    print(f"{name:>13} {mode:>9}: {result['seconds']:>8.1f}s  "
+                          f"peak RSS {result['peak_rss_mb']:>9.1f} MB  "
+                          f"(after imports {result['import_rss_mb']:.1f} MB)")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Synthetic, reproducible XML catalog and question CSV for the benchmark suite
+
+The same size and seed always produce byte-identical files, so timings from
+different runs and machines are measured on the same input.
+
+Usage (from the repository root):
+    python -m benchmarks.corpus corpus/ --size medium
+"""
+import argparse
+import csv
+import os
+import random
+
+from benchmarks.bench_xml_streaming import WORDS, write_catalog
+
+# XML bytes and questions per corpus size
+SIZES = {
+    "small": (256 * 1024, 20),
+    "medium": (1024 * 1024, 50),
+    "large": (4 * 1024 * 1024, 100),
+}
+
+QUESTION_TEMPLATES = (
+    "What is the price of part {part}?",
+    "Which category does part {part} belong to?",
+    "Describe the {word} used in part {part}.",
+    "Is part {part} made of {word}?",
+)
+
+
+def write_questions(path, questions, parts, seed=0):
+    """Write a one-column CSV of questions about randomly chosen parts"""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["question"])
+        for _ in range(questions):
+            template = rng.choice(QUESTION_TEMPLATES)
+            writer.writerow([template.format(part=rng.randrange(parts), word=rng.choice(WORDS))])
+
+
+def write_corpus(directory, size="small", seed=0):
+    """Write catalog.xml and questions.csv for `size` into directory and describe them"""
+    xml_bytes, questions = SIZES[size]
+    os.makedirs(directory, exist_ok=True)
+    xml_path = os.path.join(directory, "catalog.xml")
+    csv_path = os.path.join(directory, "questions.csv")
+    parts = write_catalog(xml_path, xml_bytes)
+    write_questions(csv_path, questions, parts, seed)
+    return {'size': size, 'xml_path': xml_path, 'csv_path': csv_path, 'parts': parts, 'questions': questions,
+            'xml_mb': os.path.getsize(xml_path) / 1024 ** 2}
+
+
+def read_questions(csv_path):
+    with open(csv_path, newline="", encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    # Same as the frontend: the first column holds the questions
+    return [row[0] for row in rows[1:] if row]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = write_corpus(args.directory, args.size, args.seed)
+    print(f"{corpus['xml_path']}: {corpus['xml_mb']:.2f} MB, {corpus['parts']} parts")
+    print(f"{corpus['csv_path']}: {corpus['questions']} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Offline end-to-end benchmark suite with JSON baselines and regression checks
+
+`run` generates the synthetic corpus at each size and times every pipeline stage:
+- the four input_process converters,
+- chunking and deduplication,
+- create_vectordb,
+- query_vectordb, one question at a time and batched,
+- generate_initial_responses,
+- BERTScore.
+
+Embeddings come from StubEmbeddingBackend and completions from FakeChatClient.
+Caches live in a temporary directory and the in-process memo caches are cleared
+between repeats, so every repeat starts cold and nothing touches the network.
+Stages that cannot run here are reported as skipped. That covers missing
+dependencies, such as bert_score without torch, and a scorer model that cannot be
+downloaded. Each stage records the median of its repeats.
+
+`compare` checks one results file against a baseline. It flags every stage that got
+slower than the threshold and exits non-zero when any did.
+
+Usage (from the repository root):
+    python -m benchmarks.suite run --sizes small medium --repeats 3 --output benchmarks/baselines/main.json
+    python -m benchmarks.suite run --sizes small --baseline benchmarks/baselines/main.json
+    python -m benchmarks.suite compare benchmarks/baselines/main.json current.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.bench_xml_streaming import CONVERTERS
+from benchmarks.corpus import SIZES, read_questions, write_corpus
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "baselines", "baseline.json")
+# Slowdowns below this many seconds are noise whatever their ratio
+MIN_SECONDS = 0.005
+
+# Process-wide memo caches that would leave every repeat after the first one warm
+PROCESS_CACHES = (
+    ("input_process.text_cleaning", "clean_text"),
+    ("input_process.xml_serializer", "_element_name"),
+    ("input_process.xml_serializer", "_parsed_name"),
+    ("pipeline.evaluation", "load_scorer"),
+)
+
+
+class StageSkipped(Exception):
+    """Raised by a stage that cannot run here, such as a model that cannot be downloaded"""
+
+
+@contextlib.contextmanager
+def offline_pipeline(workdir, chat_latency=0.0):
+    """Point pipeline.retrieval at fake clients and caches under workdir"""
+    from pipeline import retrieval
+    from pipeline.embeddings import StubEmbeddingBackend
+    from pipeline.generation import FakeChatClient
+
+    names = ("OpenAIEmbeddingBackend", "OpenAIChatClient", "EMBEDDING_CACHE_DIR", "VECTOR_STORE_DIR",
+             "COMPLETION_CACHE_PATH", "SCORE_CACHE_PATH", "_embedding_cache", "_completion_cache",
+             "_score_cache")
+    saved = {name: getattr(retrieval, name) for name in names}
+    retrieval.OpenAIEmbeddingBackend = lambda key: StubEmbeddingBackend()
+    retrieval.OpenAIChatClient = lambda key: FakeChatClient(latency=chat_latency)
+    retrieval.EMBEDDING_CACHE_DIR = os.path.join(workdir, "cache", "embeddings")
+    retrieval.VECTOR_STORE_DIR = os.path.join(workdir, "index")
+    retrieval.COMPLETION_CACHE_PATH = os.path.join(workdir, "cache", "completions.sqlite")
+    retrieval.SCORE_CACHE_PATH = os.path.join(workdir, "cache", "scores.sqlite")
+    retrieval._embedding_cache = retrieval._completion_cache = retrieval._score_cache = None
+    try:
+        yield retrieval
+    finally:
+        for cache in (retrieval._completion_cache, retrieval._score_cache):
+            if cache is not None:
+                cache.close()
+        for name, value in saved.items():
+            setattr(retrieval, name, value)
+
+
+class StageRunner:
+    """Time stages into a RunMetrics, recording skipped and failed ones instead of raising"""
+
+    def __init__(self, run):
+        self.run = run
+        self.skipped = {}
+        self.failed = {}
+
+    def __call__(self, name, function, *args, items=0):
+        try:
+            with self.run.stage(name, items):
+                return function(*args)
+        except (ImportError, StageSkipped) as e:
+            self.skipped[name] = str(e)
+        except Exception as e:
+            self.failed[name] = f"{type(e).__name__}: {e}"
+        # Only stages that ran to completion have timings worth comparing
+        self.run.stages.pop(name, None)
+        return None
+
+
+def _convert(name, xml_path, streaming):
+    module_name, function_name = CONVERTERS[name]
+    converter = getattr(importlib.import_module(module_name), function_name)
+    # The converters report progress by printing
+    with contextlib.redirect_stdout(io.StringIO()):
+        output_path = converter(xml_path, streaming=streaming)
+    if output_path is None:
+        raise RuntimeError(f"{name} converter returned no output")
+    return output_path
+
+
+def _load_scorer():
+    from pipeline.evaluation import BERTSCORE_MODEL, load_scorer
+
+    try:
+        return load_scorer(BERTSCORE_MODEL)
+    except OSError as e:
+        # Hugging Face reports a model it cannot download, or find offline, as an OSError
+        raise StageSkipped(f"BERTScore model is not available: {e}") from e
+
+
+def clear_process_caches():
+    """Empty the memo caches of modules already imported, so the next repeat starts cold"""
+    for module_name, function_name in PROCESS_CACHES:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            getattr(module, function_name).cache_clear()
+
+
+def run_once(corpus, workdir, args):
+    """Run every stage on one corpus, returning (metrics report, skipped, failed)"""
+    from pipeline import instrumentation
+    from pipeline.chunking import chunk_file
+    from pipeline.dedup import dedup_chunks
+    from pipeline.evaluation import score_responses
+
+    key = "offline"
+    questions = read_questions(corpus['csv_path'])
+    run = instrumentation.start_run(corpus['size'])
+    stage = StageRunner(run)
+    try:
+        with offline_pipeline(workdir, args.chat_latency) as retrieval:
+            outputs = {}
+            for name in CONVERTERS:
+                # Each converter writes into data/ next to its input, keep them apart
+                xml_path = os.path.join(workdir, name, "catalog.xml")
+                os.makedirs(os.path.dirname(xml_path), exist_ok=True)
+                shutil.copyfile(corpus['xml_path'], xml_path)
+                outputs[name] = stage(f"convert {name}", _convert, name, xml_path, args.streaming)
+
+            # Later stages need the plain converter's output and the index built from it
+            chunks = outputs.get("plain") and stage("chunking", chunk_file, outputs["plain"], "catalog.xml")
+            deduped = chunks and stage("dedup", dedup_chunks, chunks, items=len(chunks))
+            if not deduped:
+                return run.report(), stage.skipped, stage.failed
+            extracts = [chunk.text for chunk in deduped[0]]
+
+            built = stage("create_vectordb", retrieval.create_vectordb, extracts, key, items=len(extracts))
+            if built is None:
+                return run.report(), stage.skipped, stage.failed
+            vector_db, embeddings = built
+
+            question_embeddings = retrieval.embed_with_cache(questions, key)
+            stage("query_vectordb",
+                  lambda: [retrieval.query_vectordb(vector_db, embedding) for embedding in question_embeddings],
+                  items=len(questions))
+            stage("query_vectordb_batch", retrieval.query_vectordb_batch, vector_db, question_embeddings,
+                  items=len(questions))
+
+            # As the frontend calls it: embed the question, search and answer from each extract
+            responses = stage("generate_initial_responses",
+                              lambda: [retrieval.generate_initial_responses(vector_db, embeddings, extracts,
+                                                                            question, key)
+                                       for question in questions],
+                              items=len(questions))
+
+            scorer = stage("bertscore load", _load_scorer)
+            if scorer is not None and responses is not None:
+                stage("bertscore", score_responses, responses, questions, scorer, items=len(questions))
+    finally:
+        instrumentation.end_run()
+    return run.report(), stage.skipped, stage.failed
+
+
+def run_suite(args):
+    results = {}
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"bench_suite_{size}_")
+        try:
+            corpus = write_corpus(os.path.join(workdir, "corpus"), size, args.seed)
+            runs = []
+            for repeat in range(args.repeats):
+                repeat_dir = os.path.join(workdir, f"run{repeat}")
+                clear_process_caches()
+                runs.append(run_once(corpus, repeat_dir, args))
+                shutil.rmtree(repeat_dir, ignore_errors=True)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        stages = {}
+        for name in runs[-1][0]['stages']:
+            seconds = [report['stages'][name]['seconds'] for report, _, _ in runs if name in report['stages']]
+            last = runs[-1][0]['stages'][name]
+            stages[name] = {'seconds': statistics.median(seconds), 'runs': seconds,
+                            **{k: last[k] for k in ("calls", "items", "tokens_in", "tokens_out",
+                                                     "process_peak_rss_mb")}}
+        results[size] = {
+            'corpus': {k: corpus[k] for k in ("parts", "questions", "xml_mb")},
+            'stages': stages,
+            'caches': runs[-1][0]['caches'],
+            'skipped': runs[-1][1],
+            'failed': runs[-1][2],
+        }
+        print(f"{size}: {corpus['xml_mb']:.2f} MB, {corpus['parts']} parts, {corpus['questions']} questions")
+        for name, values in stages.items():
+            print(f"  {name:<28} {values['seconds']:9.3f}s  ({values['items']} items)")
+        for name, reason in results[size]['skipped'].items():
+            print(f"  {name:<28} skipped: {reason}")
+        for name, error in results[size]['failed'].items():
+            print(f"  {name:<28} FAILED: {error}")
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {'repeats': args.repeats, 'seed': args.seed, 'streaming': args.streaming,
+                     'chat_latency': args.chat_latency},
+        'sizes': results,
+    }
+
+
+def compare(baseline, current, threshold, min_seconds=MIN_SECONDS):
+    """Rows of (size, stage, baseline seconds, current seconds, status) for stages in either run"""
+    rows = []
+    for size in sorted(set(baseline['sizes']) | set(current['sizes'])):
+        before = baseline['sizes'].get(size, {}).get('stages', {})
+        after = current['sizes'].get(size, {}).get('stages', {})
+        for name in list(before) + [name for name in after if name not in before]:
+            if name not in after:
+                rows.append((size, name, before[name]['seconds'], None, "missing"))
+                continue
+            if name not in before:
+                rows.append((size, name, None, after[name]['seconds'], "new"))
+                continue
+            old, new = before[name]['seconds'], after[name]['seconds']
+            if new > old * (1 + threshold) and new - old > min_seconds:
+                status = "REGRESSION"
+            elif new < old * (1 - threshold) and old - new > min_seconds:
+                status = "faster"
+            else:
+                status = "ok"
+            rows.append((size, name, old, new, status))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    for size, name, old, new, status in rows:
+        old_text = f"{old:9.3f}s" if old is not None else " " * 10
+        new_text = f"{new:9.3f}s" if new is not None else " " * 10
+        change = f"{new / old - 1:+7.1%}" if old and new is not None else " " * 7
+        print(f"{size:<7} {name:<28} {old_text} -> {new_text} {change}  {status}")
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    print(f"{len(regressions)} regressions above {threshold:.0%}")
+    return regressions
+
+
+def _write(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def _read(path):
+    with open(path, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time every stage and write the results")
+    run_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small"])
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--streaming", action="store_true", help="time the streaming converters")
+    run_parser.add_argument("--chat-latency", type=float, default=0.0, help="simulated seconds per completion")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--baseline", help="compare the new results against this file")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+
+    compare_parser = commands.add_parser("compare", help="flag stages slower than in a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(args)
+        _write(args.output, results)
+        print(f"Results: {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = _read(args.baseline)
+    else:
+        baseline = _read(args.baseline)
+        results = _read(args.current)
+
+    regressions = print_comparison(compare(baseline, results, args.threshold), args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Convert many XML exports at once with the input_process converters
+
+Files are fanned out over a process pool. A file whose content hash, mode and
+streaming flag match a successful run in the manifest is skipped, and every run
+rewrites the manifest with per-file timings and failures.
+
+Usage (from the repository root):
+    python -m input_process.batch exports/ --mode enriched_xml
+    python -m input_process.batch "exports/**/*.xml" --mode json --workers 8 --streaming
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+MODES = {
+    "xml": ("input_process.convert_xml_to_txt", "process_xml_to_txt"),
+    "json": ("input_process.xml_to_cleaned_json_txt", "process_xml_to_json_txt"),
+    "enriched_xml": ("input_process.xml_to_cleaned_xml_txt", "process_and_clean_xml_to_txt"),
+    "direct_json": ("input_process.xml_to_json_direct_xml2json_txt", "xml_to_json_txt"),
+}
+
+MANIFEST_NAME = "batch_manifest.json"
+
+_converter = None
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_inputs(target):
+    """XML files under a directory, or matching a glob pattern"""
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "**", "*.xml")
+    else:
+        pattern = target
+    # The converters' outputs in data/ next to each input are .txt files, so every match
+    # is an input, also when the exports themselves live in a folder named data
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'files': {}}
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable manifest {path}: {e}", file=sys.stderr)
+        return {'files': {}}
+
+
+def save_manifest(path, manifest):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _init_worker(mode):
+    # Import the converter once per worker instead of once per file
+    global _converter
+    module_name, function_name = MODES[mode]
+    _converter = getattr(importlib.import_module(module_name), function_name)
+
+
+def _convert(task):
+    path, mode, streaming, previous = task
+    start = time.perf_counter()
+    entry = {'mode': mode, 'streaming': streaming}
+    try:
+        entry['sha256'] = file_sha256(path)
+        if (previous and previous.get('status') in ("ok", "skipped") and previous.get('mode') == mode
+                and previous.get('streaming') == streaming and previous.get('sha256') == entry['sha256']
+                and previous.get('output') and os.path.exists(previous['output'])):
+            entry.update(status="skipped", output=previous['output'], seconds=time.perf_counter() - start,
+                         convert_seconds=previous.get('convert_seconds'))
+            return path, entry
+
+        # The converters report progress and errors by printing, keep that out of the console
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            output = _converter(path, streaming=streaming)
+        if output is None:
+            lines = log.getvalue().strip().splitlines()
+            entry.update(status="failed", error=lines[-1] if lines else "converter returned no output")
+        else:
+            entry.update(status="ok", output=output)
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+    entry['seconds'] = time.perf_counter() - start
+    if entry['status'] != "skipped":
+        entry['convert_seconds'] = entry['seconds']
+    return path, entry
+
+
+def run_batch(paths, mode, manifest_path, workers=None, streaming=False, chunksize=None, force=False):
+    """Convert `paths` in parallel and return the updated manifest"""
+    manifest = load_manifest(manifest_path)
+    previous_files = {} if force else manifest.get('files', {})
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker balances scheduling overhead against stragglers
+    chunksize = chunksize or max(1, len(paths) // (workers * 4))
+
+    tasks = [(path, mode, streaming, previous_files.get(os.path.abspath(path))) for path in paths]
+    files = dict(manifest.get('files', {}))
+    counts = {'ok': 0, 'skipped': 0, 'failed': 0}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mode,)) as executor:
+        for i, (path, entry) in enumerate(executor.map(_convert, tasks, chunksize=chunksize), 1):
+            files[os.path.abspath(path)] = entry
+            counts[entry['status']] += 1
+            if entry['status'] == "failed":
+                print(f"[{i}/{len(tasks)}] failed {path}: {entry['error']}", file=sys.stderr)
+
+    manifest = {
+        'mode': mode,
+        'streaming': streaming,
+        'workers': workers,
+        'chunksize': chunksize,
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'wall_seconds': time.perf_counter() - start,
+        'counts': counts,
+        'files': files,
+    }
+    save_manifest(manifest_path, manifest)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", help="directory to search for *.xml recursively, or a glob pattern")
+    parser.add_argument("--mode", choices=list(MODES), default="xml")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, help="files handed to a worker at a time")
+    parser.add_argument("--streaming", action="store_true", help="use the bounded-memory streaming converters")
+    parser.add_argument("--manifest", help=f"manifest path (default: {MANIFEST_NAME} in the target directory)")
+    parser.add_argument("--force", action="store_true", help="reconvert files even if they are unchanged")
+    args = parser.parse_args(argv)
+
+    paths = find_inputs(args.target)
+    if not paths:
+        print(f"No XML files found for {args.target}", file=sys.stderr)
+        return 1
+
+    manifest_dir = args.target if os.path.isdir(args.target) else os.path.commonpath(
+        [os.path.dirname(os.path.abspath(p)) for p in paths])
+    manifest_path = args.manifest or os.path.join(manifest_dir, MANIFEST_NAME)
+
+    manifest = run_batch(paths, args.mode, manifest_path, workers=args.workers, streaming=args.streaming,
+                         chunksize=args.chunksize, force=args.force)
+    counts = manifest['counts']
+    print(f"{len(paths)} files in {manifest['wall_seconds']:.1f}s with {manifest['workers']} workers: "
+          f"{counts['ok']} converted, {counts['skipped']} unchanged, {counts['failed']} failed")
+    print(f"Manifest: {manifest_path}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,68 @@
+import io
 import os
+import xml.etree.ElementTree as ET
 from xml.dom import minidom
 
-def process_xml_to_txt(xml_file_path):
-    try:
-        # Read the XML file
-        with open(xml_file_path, 'r', encoding='utf-8') as file:
-            xml_content = file.read()
+from input_process.xml_serializer import ATTRIBUTE_ESCAPES, TEXT_ESCAPES
+from input_process.xml_stream import parse_xml_document, qualified_name, stream_pretty_xml
+
+def _write_minidom_node(node, f, prefixes, pad, indent, declarations=()):
+    # Element.writexml of minidom, with an element's text, children and their tails
+    # standing in for its child nodes
+    if node.tag is ET.Comment:
+        f.write(f"{pad}<!--{node.text}-->\n")
+        return
+    if node.tag is ET.PI:
+        target, _, data = node.text.partition(" ")
+        f.write(f"{pad}<?{target} {data}?>\n")
+        return
+
+    name = qualified_name(node.tag, prefixes)
+    f.write(pad + "<" + name)
+    for prefix, uri in declarations:
+        f.write(f' {"xmlns:" + prefix if prefix else "xmlns"}="{uri.translate(ATTRIBUTE_ESCAPES)}"')
+    for key, value in node.attrib.items():
+        f.write(f' {qualified_name(key, prefixes)}="{value.translate(ATTRIBUTE_ESCAPES)}"')
 
-        # Parse the XML content
-        xml_dom = minidom.parseString(xml_content)
+    children = [node.text] if node.text else []
+    for child in node:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+    if not children:
+        f.write("/>\n")
+        return
+    f.write(">")
+    if len(children) == 1 and isinstance(children[0], str):
+        f.write(children[0].translate(TEXT_ESCAPES))
+    else:
+        f.write("\n")
+        for child in children:
+            if isinstance(child, str):
+                f.write(f"{pad}{indent}{child}\n".translate(TEXT_ESCAPES))
+            else:
+                _write_minidom_node(child, f, prefixes, pad + indent, indent)
+        f.write(pad)
+    f.write(f"</{name}>\n")
 
-        # Pretty-print the XML
-        pretty_xml = xml_dom.toprettyxml(indent="  ")
+def pretty_xml(xml_content, document=None):
+    """The document as minidom's toprettyxml(indent="  ") writes it
 
+    document is xml_content parsed by parse_xml_document, which is done here if it is
+    not given. The tree is written directly, minidom only parses the documents the
+    tree cannot stand in for.
+    """
+    if document is None:
+        document = parse_xml_document(xml_content)
+    if document is None:
+        return minidom.parseString(xml_content).toprettyxml(indent="  ")
+    f = io.StringIO()
+    f.write('<?xml version="1.0" ?>\n')
+    _write_minidom_node(document.root, f, document.prefixes, "", "  ", document.declarations)
+    return f.getvalue()
+
+def process_xml_to_txt(xml_file_path, streaming=False):
+    try:
         # Create "data" folder
         xml_dir = os.path.dirname(xml_file_path)
         data_dir = os.path.join(xml_dir, "data")
@@ -23,9 +73,18 @@ def process_xml_to_txt(xml_file_path):
         txt_filename = os.path.splitext(xml_filename)[0] + '.txt'
         txt_file_path = os.path.join(data_dir, txt_filename)
 
-        # Save the pretty-printed XML to a TXT file in the "data" folder
-        with open(txt_file_path, "w", encoding='utf-8') as f:
-            f.write(pretty_xml)
+        if streaming:
+            # Pretty-print record by record without loading the whole document
+            with open(txt_file_path, "w", encoding='utf-8') as f:
+                stream_pretty_xml(xml_file_path, f)
+        else:
+            # Read the XML file
+            with open(xml_file_path, 'r', encoding='utf-8') as file:
+                xml_content = file.read()
+
+            # Save the pretty-printed XML to a TXT file in the "data" folder
+            with open(txt_file_path, "w", encoding='utf-8') as f:
+                f.write(pretty_xml(xml_content))
 
         print(f"Converted XML file: {xml_file_path}")
         print(f"Created TXT file with XML content: {txt_file_path}")
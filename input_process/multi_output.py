@@ -0,0 +1,196 @@
+"""Convert one XML upload into several processed outputs from a single parse
+
+The plain, cleaned-JSON, enriched-XML and direct-JSON outputs are produced by the
+writers and formatters of the individual converters, so they match the converters'
+outputs byte for byte, in both their streaming and in-memory forms.
+
+In streaming mode the document is read once, record by record, and each record goes
+to every requested output's writer. In-memory mode parses the file once into a tree
+and builds every requested output from it; only documents the tree cannot stand in
+for (a DOCTYPE, CDATA sections, comments outside the root) are parsed again by
+minidom or xmltodict.
+"""
+import os
+import shutil
+import uuid
+
+from input_process.batch import file_sha256
+from input_process.xml_stream import JsonArrayWriter, PrettyXmlWriter, parse_xml_document, stream_records
+
+OUTPUTS = ("plain", "cleaned_json", "enriched_xml", "direct_json")
+
+# File names the individual converters give each output
+OUTPUT_SUFFIXES = {
+    "plain": ".txt",
+    "cleaned_json": "_cleaned_json.txt",
+    "enriched_xml": "_cleaned_xml.txt",
+    "direct_json": "_direct_json.txt",
+}
+
+# Outputs produced together: once the document is parsed the other outputs cost
+# little next to it, and evaluating another mode on the same upload finds them cached
+COMPANION_OUTPUTS = {name: OUTPUTS for name in OUTPUTS}
+
+
+def _convert_streaming(xml_file_path, files):
+    writers = []
+    if "plain" in files:
+        writers.append(PrettyXmlWriter(files["plain"]))
+    direct = None
+    if "direct_json" in files:
+        from input_process.xml_to_json_direct_xml2json_txt import DirectJsonWriter
+
+        direct = DirectJsonWriter(files["direct_json"], xml_file_path)
+        writers.append(direct)
+    if "cleaned_json" in files or "enriched_xml" in files:
+        from input_process.text_cleaning import CleanedRecordWriter
+        from input_process.xml_to_cleaned_xml_txt import EnrichedXmlWriter
+
+        sinks = []
+        if "cleaned_json" in files:
+            sinks.append(JsonArrayWriter(files["cleaned_json"], indent=2))
+        if "enriched_xml" in files:
+            sinks.append(EnrichedXmlWriter(files["enriched_xml"]))
+        writers.append(CleanedRecordWriter(sinks))
+
+    closed = dict(zip(writers, stream_records(xml_file_path, writers)))
+    # Like xml_to_json_txt, a root without records is converted in one piece
+    return direct is None or closed[direct]
+
+
+def _convert_in_memory(xml_content, files):
+    document = parse_xml_document(xml_content)
+    if "plain" in files:
+        from input_process.convert_xml_to_txt import pretty_xml
+
+        files["plain"].write(pretty_xml(xml_content, document))
+
+    if "cleaned_json" in files or "enriched_xml" in files:
+        from input_process.text_cleaning import clean_partitioned_element, partition_document
+        from input_process.xml_serializer import write_elements_as_xml
+        from input_process.xml_to_cleaned_json_txt import cleaned_json
+        from input_process.xml_to_cleaned_xml_txt import relabel_languages
+
+        elements = partition_document(xml_content, document=document)
+        cleaned = [clean_partitioned_element(element) for element in elements]
+        if "cleaned_json" in files:
+            files["cleaned_json"].write(cleaned_json(cleaned))
+        if "enriched_xml" in files:
+            write_elements_as_xml(map(relabel_languages, cleaned), files["enriched_xml"])
+
+    if "direct_json" in files:
+        from input_process.xml_to_json_direct_xml2json_txt import xml_to_json
+
+        files["direct_json"].write(xml_to_json(xml_content, document))
+
+
+def output_paths(xml_file_path, outputs=OUTPUTS, output_dir=None):
+    """Where convert_document writes each output, by default in data/ next to the input"""
+    output_dir = output_dir or os.path.join(os.path.dirname(xml_file_path), "data")
+    stem = os.path.splitext(os.path.basename(xml_file_path))[0]
+    return {name: os.path.join(output_dir, stem + OUTPUT_SUFFIXES[name]) for name in outputs}
+
+
+def convert_document(xml_file_path, outputs=OUTPUTS, output_dir=None, streaming=False):
+    """Write every requested output of an XML file in one pass and map each to its path
+
+    Returns None if the conversion fails.
+    """
+    paths = output_paths(xml_file_path, outputs, output_dir)
+    try:
+        os.makedirs(os.path.dirname(next(iter(paths.values()))), exist_ok=True)
+        files = {name: open(path, "w", encoding='utf-8') for name, path in paths.items()}
+        try:
+            if streaming:
+                if not _convert_streaming(xml_file_path, files):
+                    with open(xml_file_path, 'r', encoding='utf-8') as f:
+                        files["direct_json"].seek(0)
+                        files["direct_json"].truncate()
+                        _convert_in_memory(f.read(), {"direct_json": files["direct_json"]})
+            else:
+                with open(xml_file_path, 'r', encoding='utf-8') as f:
+                    _convert_in_memory(f.read(), files)
+        finally:
+            for f in files.values():
+                f.close()
+
+        print(f"Converted XML file: {xml_file_path}")
+        for name, path in paths.items():
+            print(f"Created {name} output: {path}")
+        return paths
+
+    except Exception as e:
+        print(f"Error converting XML file {xml_file_path}: {str(e)}")
+        return None
+
+
+def cached_output(xml_file_path, output, cache_root, streaming=False, max_bytes=None):
+    """Path of one output of an XML file, converting it with its companions if needed
+
+    Outputs are kept under cache_root by content hash, so evaluating another mode on
+    the same upload reuses the earlier pass; only the outputs not cached yet are
+    converted, and if a companion cannot be produced the output is converted alone.
+    Each conversion writes into its own temporary directory and moves finished files
+    into place, so concurrent sessions never see each other's partial files. With max_bytes, the least recently used
+    conversions are evicted once the cache grows past it.
+    """
+    key = file_sha256(xml_file_path)[:32] + ("-streaming" if streaming else "")
+    cache_dir = os.path.join(cache_root, key)
+    path = output_paths(xml_file_path, [output], cache_dir)[output]
+    if os.path.exists(path):
+        # The directory's modification time orders the conversions for eviction
+        os.utime(cache_dir)
+        return path
+
+    work_dir = os.path.join(cache_root, f".{key}-{uuid.uuid4().hex}")
+    try:
+        cached = output_paths(xml_file_path, COMPANION_OUTPUTS[output], cache_dir)
+        missing = [name for name, cached_path in cached.items() if not os.path.exists(cached_path)]
+        paths = convert_document(xml_file_path, missing, work_dir, streaming)
+        if paths is None and missing != [output]:
+            # A companion may need what this environment lacks, e.g. the language models
+            paths = convert_document(xml_file_path, [output], work_dir, streaming)
+        if paths is None:
+            return None
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, work_path in paths.items():
+            os.replace(work_path, os.path.join(cache_dir, os.path.basename(work_path)))
+    finally:
+        if os.path.isdir(work_dir):
+            for name in os.listdir(work_dir):
+                os.remove(os.path.join(work_dir, name))
+            os.rmdir(work_dir)
+    if max_bytes is not None:
+        evict_conversions(cache_root, max_bytes, keep=key)
+    return path
+
+
+def evict_conversions(cache_root, max_bytes, keep=None):
+    """Remove the least recently used conversions until cache_root holds at most max_bytes
+
+    Conversions still in progress and the one named `keep` are never removed. Returns
+    the number of conversions removed.
+    """
+    entries = []
+    for name in os.listdir(cache_root):
+        entry = os.path.join(cache_root, name)
+        if name.startswith(".") or not os.path.isdir(entry):
+            continue
+        try:
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, name))
+        except OSError:
+            # Evicted by another session meanwhile
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
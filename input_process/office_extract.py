@@ -0,0 +1,211 @@
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+OFFICE_EXTENSIONS = (".pdf", ".docx", ".xlsx", ".pptx")
+
+# Pages and slides handed to a worker at a time; spreadsheets are split by sheet
+PDF_PAGES_PER_TASK = 16
+SLIDES_PER_TASK = 16
+# Word documents have no pages, their body is cut into blocks of paragraphs and tables
+DOCX_BLOCKS_PER_PART = 200
+
+
+@lru_cache(maxsize=2)
+def _open_pdf(path, mtime):
+    from PyPDF2 import PdfReader
+
+    return PdfReader(path)
+
+
+@lru_cache(maxsize=2)
+def _open_xlsx(path, mtime, pid):
+    # Read-only workbooks keep reading from the open archive, so one cached in a parent
+    # must not be reused by forked workers sharing its file offset: the pid is in the key
+    from openpyxl import load_workbook
+
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def _xlsx_sheet_names(path):
+    # Straight from the workbook part, loading the workbook would scan every sheet
+    import xml.etree.ElementTree as ET
+
+    with zipfile.ZipFile(path) as archive:
+        root = ET.fromstring(archive.read("xl/workbook.xml"))
+    return [sheet.get("name") for sheet in root.iter() if sheet.tag.rsplit("}", 1)[-1] == "sheet"]
+
+
+@lru_cache(maxsize=2)
+def _open_pptx(path, mtime):
+    from pptx import Presentation
+
+    return Presentation(path)
+
+
+def _pdf_pages(path, start, end):
+    # Workers keep the parsed file between tasks so each page range does not reparse it
+    reader = _open_pdf(path, os.path.getmtime(path))
+    return [(f"page {number + 1}", reader.pages[number].extract_text() or "") for number in range(start, end)]
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _xlsx_sheet(path, sheet_name):
+    workbook = _open_xlsx(path, os.path.getmtime(path), os.getpid())
+    lines = []
+    header = None
+    for row in workbook[sheet_name].iter_rows(values_only=True):
+        cells = [_cell_text(value) for value in row]
+        if not any(cells):
+            continue
+        if header is None:
+            # Pair every later value with its column heading so rows read on their own
+            header = cells
+            lines.append(" | ".join(cell for cell in cells if cell))
+            continue
+        pairs = []
+        for i, cell in enumerate(cells):
+            if not cell:
+                continue
+            name = header[i] if i < len(header) else ""
+            pairs.append(f"{name}: {cell}" if name else cell)
+        lines.append("; ".join(pairs))
+    return [(f"sheet {sheet_name}", "\n".join(lines))]
+
+
+def _shape_texts(shape):
+    if shape.has_text_frame:
+        yield shape.text_frame.text
+    if getattr(shape, "has_table", False) and shape.has_table:
+        for row in shape.table.rows:
+            yield " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+    # Grouped shapes hold their own shapes
+    for child in getattr(shape, "shapes", ()):
+        yield from _shape_texts(child)
+
+
+def _pptx_slides(path, start, end):
+    presentation = _open_pptx(path, os.path.getmtime(path))
+    slides = presentation.slides
+    parts = []
+    for number in range(start, end):
+        slide = slides[number]
+        texts = [text for shape in slide.shapes for text in _shape_texts(shape)]
+        if slide.has_notes_slide:
+            texts.append(slide.notes_slide.notes_text_frame.text)
+        parts.append((f"slide {number + 1}", "\n".join(texts)))
+    return parts
+
+
+def _docx_parts(path):
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    document = Document(path)
+    lines = []
+    first = 1
+    for block, child in enumerate(document.element.body.iterchildren(), 1):
+        tag = child.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            lines.append(Paragraph(child, document).text)
+        elif tag == "tbl":
+            for row in Table(child, document).rows:
+                lines.append(" | ".join(cell.text.strip() for cell in row.cells if cell.text.strip()))
+        if block - first + 1 >= DOCX_BLOCKS_PER_PART:
+            yield f"blocks {first}-{block}", "\n".join(lines)
+            lines = []
+            first = block + 1
+    if lines:
+        yield f"blocks {first}-{block}", "\n".join(lines)
+
+
+def _ranges(total, size):
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def _tasks(path, extension):
+    if extension == ".pdf":
+        reader = _open_pdf(path, os.path.getmtime(path))
+        return _pdf_pages, [(path, start, end) for start, end in _ranges(len(reader.pages), PDF_PAGES_PER_TASK)]
+    if extension == ".xlsx":
+        return _xlsx_sheet, [(path, name) for name in _xlsx_sheet_names(path)]
+    if extension == ".pptx":
+        slides = len(_open_pptx(path, os.path.getmtime(path)).slides)
+        return _pptx_slides, [(path, start, end) for start, end in _ranges(slides, SLIDES_PER_TASK)]
+    raise ValueError(f"Unsupported file type {extension!r}, expected one of {', '.join(OFFICE_EXTENSIONS)}")
+
+
+def _run_ordered(function, tasks, workers):
+    # Results come back in document order while later tasks are still running. Only a
+    # couple of tasks per worker are in flight, so memory stays bounded by that window
+    # rather than by the size of the document.
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        remaining = iter(tasks)
+        pending = deque(executor.submit(function, *task) for task in islice(remaining, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            task = next(remaining, None)
+            if task is not None:
+                pending.append(executor.submit(function, *task))
+            yield result
+
+
+def iter_office_text(file_path, workers=None):
+    """Stream (label, text) parts of a PDF, DOCX, XLSX or PPTX file in document order
+
+    PDF pages, spreadsheet sheets and slides are extracted in parallel across a process
+    pool. Labels name where a part came from, e.g. "page 12" or "sheet Prices".
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".docx":
+        yield from _docx_parts(file_path)
+        return
+    function, tasks = _tasks(file_path, extension)
+    for parts in _run_ordered(function, tasks, workers or os.cpu_count() or 1):
+        yield from parts
+
+
+def process_office_to_txt(file_path, streaming=False, workers=None):
+    """Extract the text of an office document into data/<name>.txt next to it
+
+    Parts are written as they are extracted, so the whole document is never held in
+    memory; `streaming` is accepted for parity with the XML converters.
+    """
+    try:
+        data_dir = os.path.join(os.path.dirname(file_path), "data")
+        os.makedirs(data_dir, exist_ok=True)
+        txt_filename = os.path.splitext(os.path.basename(file_path))[0] + '.txt'
+        txt_file_path = os.path.join(data_dir, txt_filename)
+
+        parts = 0
+        with open(txt_file_path, "w", encoding='utf-8') as f:
+            for label, text in iter_office_text(file_path, workers):
+                lines = [line.strip() for line in text.splitlines() if line.strip()]
+                if lines:
+                    f.write(f"[{label}]\n")
+                    f.write("\n".join(lines) + "\n")
+                parts += 1
+
+        print(f"Extracted {parts} parts from: {file_path}")
+        print(f"Created TXT file with document text: {txt_file_path}")
+
+        return txt_file_path
+
+    except Exception as e:
+        print(f"Error extracting text from {file_path}: {str(e)}")
+        return None
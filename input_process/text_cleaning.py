@@ -0,0 +1,206 @@
+import re
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+from unstructured.cleaners.core import (
+    clean, clean_bullets, clean_extra_whitespace,
+    clean_dashes, clean_trailing_punctuation,
+    group_broken_paragraphs, replace_unicode_quotes
+)
+from unstructured.nlp.patterns import E_BULLET_PATTERN, UNICODE_BULLETS
+
+# Machine-generated metadata that the cleaners never change, so they are passed through
+SKIPPED_FIELDS = frozenset({"element_id", "parent_id", "filetype", "languages"})
+
+CACHE_SIZE = 2 ** 16
+
+_TRAILING_PUNCTUATION = ".,:;"
+
+# Dashes and the whitespace clean_extra_whitespace rewrites all become a single space
+_TO_SPACE = str.maketrans({"-": " ", "–": " ", "\xa0": " ", "\n": " "})
+_SPACE_RUNS = re.compile(r"[ ]{2,}")
+_E_BULLET = re.compile(E_BULLET_PATTERN)
+
+# An XML declaration naming another encoding than UTF-8, which partition_xml encodes text to
+_OTHER_ENCODING = re.compile(r"""\s*<\?xml[^>]*encoding\s*=\s*["'](?!utf-?8["'])""", re.IGNORECASE)
+
+# Bullet glyphs other than the dashes (clean_bullets and group_broken_paragraphs act on
+# them) and the mojibake replace_unicode_quotes rewrites send a string down the exact path
+_BULLET_CHARACTERS = {bullet.replace("\\", "") for bullet in UNICODE_BULLETS if bullet} - {"-", "–"}
+_EXACT_PATH = re.compile(
+    "[" + re.escape("".join(sorted(_BULLET_CHARACTERS))) + "\x80-\x9fâ]|&apos;"
+)
+
+
+def reference_clean_text(text):
+    """The original unstructured cleaning sequence, kept as the source of truth"""
+    text = clean(text, bullets=True, extra_whitespace=True, dashes=True, trailing_punctuation=True)
+    text = clean_bullets(text)
+    text = clean_extra_whitespace(text)
+    text = clean_dashes(text)
+    text = clean_trailing_punctuation(text)
+    text = replace_unicode_quotes(text)
+    text = group_broken_paragraphs(text)
+    return text
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_text(text):
+    """Clean a string exactly like reference_clean_text, in a single fused pass"""
+    if _EXACT_PATH.search(text):
+        return reference_clean_text(text)
+
+    # clean(): trailing punctuation, then dashes and extra whitespace in one translate
+    cleaned = text.strip().rstrip(_TRAILING_PUNCTUATION)
+    cleaned = _SPACE_RUNS.sub(" ", cleaned.translate(_TO_SPACE)).strip()
+    # The repeated passes only matter for punctuation uncovered by removing a dash
+    cleaned = cleaned.rstrip(_TRAILING_PUNCTUATION)
+    if _E_BULLET.match(cleaned):
+        # group_broken_paragraphs treats a leading "e " as a bullet
+        return reference_clean_text(text)
+    # A single line is returned by group_broken_paragraphs as is, unless it is blank
+    return cleaned if cleaned.strip() else ""
+
+
+def clean_element(element):
+    """Recursively clean every string in an element dict, skipping identifier fields"""
+    if isinstance(element, dict):
+        return {k: v if k in SKIPPED_FIELDS else clean_element(v) for k, v in element.items()}
+    elif isinstance(element, list):
+        return [clean_element(item) for item in element]
+    elif isinstance(element, str):
+        return clean_text(element)
+    else:
+        return element
+
+
+def remove_tags(element, tags_to_remove):
+    """Drop every descendant of an ElementTree element whose tag is in tags_to_remove"""
+    for parent in element.iter():
+        for child in list(parent):
+            if child.tag in tags_to_remove:
+                parent.remove(child)
+
+
+def clean_partitioned_element(element):
+    """Drop the file metadata partition_xml adds to an element dict, then clean it"""
+    if isinstance(element, dict) and 'metadata' in element:
+        metadata = element['metadata']
+        metadata.pop('file_directory', None)
+        metadata.pop('last_modified', None)
+    return clean_element(element)
+
+
+def _filter_xml(xml_content, tags_to_remove):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(xml_content, 'xml')
+    for tag in tags_to_remove:
+        for element in soup.find_all(tag):
+            element.decompose()
+    return str(soup)
+
+
+def element_texts(root):
+    """Texts partition_xml reads from a tree: each element's leading text, in closing order"""
+    for child in root:
+        # Comments and processing instructions are nodes of the tree, not elements
+        if isinstance(child.tag, str):
+            yield from element_texts(child)
+    if root.text is not None and root.text.strip():
+        yield root.text
+
+
+@lru_cache(maxsize=1)
+def _text_partitioner():
+    import copy
+
+    from unstructured.chunking import add_chunking_strategy
+    from unstructured.documents.elements import ElementMetadata
+    from unstructured.file_utils.model import FileType
+    from unstructured.partition.common.metadata import apply_metadata
+    from unstructured.partition.text import element_from_text
+    from unstructured.partition.xml import DETECTION_ORIGIN
+
+    # partition_xml after it has read the texts of the elements, with the same metadata
+    @apply_metadata(FileType.XML)
+    @add_chunking_strategy
+    def partition_texts(texts, **kwargs):
+        metadata = ElementMetadata(filename=None, last_modified=None)
+        metadata.detection_origin = DETECTION_ORIGIN
+        elements = []
+        for text in texts:
+            element = element_from_text(text)
+            element.metadata = copy.deepcopy(metadata)
+            elements.append(element)
+        return elements
+
+    return partition_texts
+
+
+def partition_document(xml_content, tags_to_remove=(), document=None):
+    """Partition a whole XML document into element dicts, without tags_to_remove
+
+    document is xml_content parsed by input_process.xml_stream.parse_xml_document,
+    which is done here if it is not given; its texts are partitioned like partition_xml
+    would without parsing the document again. Documents the tree cannot stand in for
+    are partitioned by partition_xml. Their text goes through BeautifulSoup, which
+    drops the tags and repairs broken markup, only when there are tags to remove,
+    the document declares an encoding other than UTF-8 or lxml cannot parse it as it
+    is. BeautifulSoup keeps every text node, so the elements are the same either way.
+    """
+    from lxml import etree
+    from unstructured.partition.xml import partition_xml
+    from unstructured.staging.base import convert_to_dict
+
+    from input_process.xml_stream import parse_xml_document
+
+    if not tags_to_remove:
+        if document is None:
+            document = parse_xml_document(xml_content)
+        if document is not None:
+            return convert_to_dict(_text_partitioner()(list(element_texts(document.root))))
+    if not tags_to_remove and not _OTHER_ENCODING.match(xml_content):
+        try:
+            return convert_to_dict(partition_xml(text=xml_content))
+        except etree.XMLSyntaxError:
+            pass
+    return convert_to_dict(partition_xml(text=_filter_xml(xml_content, tags_to_remove)))
+
+
+def partition_record(record, tags_to_remove=()):
+    """Partition one record from iter_xml_records into element dicts, without tags_to_remove"""
+    from unstructured.partition.xml import partition_xml
+    from unstructured.staging.base import convert_to_dict
+
+    if record.tag in tags_to_remove:
+        return []
+    remove_tags(record, tags_to_remove)
+    return convert_to_dict(partition_xml(text=ET.tostring(record, encoding='unicode')))
+
+
+class CleanedRecordWriter:
+    """Stream writer for stream_records that partitions and cleans each record once
+
+    Every cleaned element dict goes to the write() of each sink, and close() closes
+    them, so the cleaned JSON and enriched XML outputs can share the partitioning.
+    Memory is bounded by the largest record.
+    """
+
+    def __init__(self, sinks, tags_to_remove=()):
+        self.sinks = sinks
+        self.tags_to_remove = tags_to_remove
+
+    def start(self, name, attributes, declarations):
+        pass
+
+    def write(self, record, prefixes):
+        for element in partition_record(record, self.tags_to_remove):
+            cleaned = clean_partitioned_element(element)
+            for sink in self.sinks:
+                sink.write(cleaned)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        return True
@@ -0,0 +1,171 @@
+import io
+from functools import lru_cache
+from xml.dom import minidom
+
+# Characters whose escaping minidom's writer changes between Python versions
+_PROBE_CHARACTERS = "&<>\"'\t\n\r"
+
+
+def _probe_minidom_escaping():
+    # Learn how this Python's minidom escapes text and attribute values so the output
+    # matches toprettyxml() byte for byte
+    document = minidom.Document()
+    text_table = {}
+    attribute_table = {}
+    for character in _PROBE_CHARACTERS:
+        out = io.StringIO()
+        document.createTextNode(character).writexml(out)
+        if out.getvalue() != character:
+            text_table[ord(character)] = out.getvalue()
+
+        element = document.createElement("a")
+        element.setAttribute("v", character)
+        out = io.StringIO()
+        element.writexml(out)
+        value = out.getvalue()[len('<a v="'):-len('"/>')]
+        if value != character:
+            attribute_table[ord(character)] = value
+    return text_table, attribute_table
+
+
+# What minidom's writer replaces in text and attribute values, for str.translate
+TEXT_ESCAPES, ATTRIBUTE_ESCAPES = _probe_minidom_escaping()
+
+
+def _text(value):
+    # The XML parser normalizes line endings before minidom sees the text
+    return value.replace("\r\n", "\n").replace("\r", "\n").translate(TEXT_ESCAPES)
+
+
+def _attribute(value):
+    value = value.replace("\r\n", " ").replace("\r", " ").replace("\n", " ").replace("\t", " ")
+    return value.translate(ATTRIBUTE_ESCAPES)
+
+
+def _dicttoxml_escape(value):
+    return value.replace('&', '&amp;').replace('"', '&quot;').replace('\'', '&apos;') \
+        .replace('<', '&lt;').replace('>', '&gt;')
+
+
+@lru_cache(maxsize=4096)
+def _parsed_name(name):
+    # The tag minidom ends up with for <name>, or None when that is not valid XML
+    try:
+        document = minidom.parseString(f'<?xml version="1.0" encoding="UTF-8" ?><{name}>foo</{name}>')
+        return document.documentElement.tagName
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _element_name(key):
+    """Tag name and attributes dicttoxml gives a dict key"""
+    escaped = _dicttoxml_escape(key)
+    name = _parsed_name(escaped)
+    if name is not None:
+        return name, ""
+    if escaped.isdigit():
+        return f"n{escaped}", ""
+    try:
+        return f"n{float(escaped)}", ""
+    except ValueError:
+        pass
+    name = _parsed_name(escaped.replace(' ', '_'))
+    if name is not None:
+        return name, ""
+    return "key", f' name="{_attribute(key)}"'
+
+
+def _json_key(key):
+    # Keys as they come back from a json.dumps/json.loads round trip
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, (int, float)):
+        return repr(float(key)) if isinstance(key, float) else str(int(key))
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+class ElementXmlWriter:
+    """Stream JSON-like element dicts as indented XML
+
+    The output is byte-identical to wrapping the items in a list, round-tripping them
+    through json, converting with dicttoxml(custom_root=root, attr_type=False) and
+    pretty-printing with minidom's toprettyxml(), but items are written one at a time
+    without building any intermediate document.
+    """
+
+    def __init__(self, f, root="root", indent="\t"):
+        self.f = f
+        self.root = root
+        self.indent = indent
+        self.count = 0
+        self.f.write('<?xml version="1.0" ?>\n')
+
+    def write(self, item):
+        if not self.count:
+            self.f.write(f"<{self.root}>\n")
+        self.count += 1
+        self._write_list_item(item, 1)
+
+    def close(self):
+        self.f.write(f"</{self.root}>\n" if self.count else f"<{self.root}/>\n")
+
+    def _write_element(self, name, attributes, value, level):
+        pad = self.indent * level
+        if value is True or value is False:
+            self.f.write(f"{pad}<{name}{attributes}>{'true' if value else 'false'}</{name}>\n")
+        elif isinstance(value, str):
+            self._write_text(name, attributes, value, pad)
+        elif value is None:
+            self.f.write(f"{pad}<{name}{attributes}/>\n")
+        elif isinstance(value, (int, float)):
+            self.f.write(f"{pad}<{name}{attributes}>{_text('%s' % value)}</{name}>\n")
+        elif isinstance(value, dict):
+            if not value:
+                self.f.write(f"{pad}<{name}{attributes}/>\n")
+                return
+            self.f.write(f"{pad}<{name}{attributes}>\n")
+            self._write_dict(value, level + 1)
+            self.f.write(f"{pad}</{name}>\n")
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                self.f.write(f"{pad}<{name}{attributes}/>\n")
+                return
+            self.f.write(f"{pad}<{name}{attributes}>\n")
+            for item in value:
+                self._write_list_item(item, level + 1)
+            self.f.write(f"{pad}</{name}>\n")
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def _write_text(self, name, attributes, value, pad):
+        if value:
+            self.f.write(f"{pad}<{name}{attributes}>{_text(value)}</{name}>\n")
+        else:
+            self.f.write(f"{pad}<{name}{attributes}/>\n")
+
+    def _write_dict(self, value, level):
+        for key, child in value.items():
+            name, attributes = _element_name(_json_key(key))
+            self._write_element(name, attributes, child, level)
+
+    def _write_list_item(self, item, level):
+        if item is True or item is False:
+            # dicttoxml checks for numbers before booleans inside lists
+            self._write_text("item", "", str(item), self.indent * level)
+        else:
+            self._write_element("item", "", item, level)
+
+
+def write_elements_as_xml(elements, f, root="root", indent="\t"):
+    """Write a sequence of element dicts as one indented XML document"""
+    writer = ElementXmlWriter(f, root=root, indent=indent)
+    for element in elements:
+        writer.write(element)
+    writer.close()
@@ -0,0 +1,209 @@
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from xml.sax.saxutils import escape, quoteattr
+
+
+# Bound to the xml: prefix by definition, it is never declared in the document
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+def qualified_name(tag, prefixes):
+    # ElementTree reports namespaced tags as {uri}local, map them back to prefix:local
+    if tag[:1] != "{":
+        return tag
+    uri, local = tag[1:].split("}", 1)
+    prefix = prefixes.get(uri)
+    return f"{prefix}:{local}" if prefix else local
+
+
+def iter_xml_records(xml_file_path, record_depth=1):
+    """Stream the elements at `record_depth` below the root of a large XML file
+
+    Yields (event, payload) tuples: ("root", (tag, attributes, namespace declarations))
+    once for the root element, then ("record", (element, prefixes)) for each record.
+    Namespace declarations of elements below the root are kept as xmlns attributes,
+    ahead of the other attributes, as minidom and xmltodict report them. Records are
+    removed from the tree after they are consumed, so memory stays bounded by the size
+    of a single record rather than the whole document.
+    """
+    prefixes = {XML_NAMESPACE: "xml"}
+    pending_namespaces = []
+    stack = []
+    for event, item in ET.iterparse(xml_file_path, events=("start-ns", "start", "end")):
+        if event == "start-ns":
+            prefix, uri = item
+            prefixes[uri] = prefix
+            pending_namespaces.append(item)
+        elif event == "start":
+            if not stack:
+                yield "root", (qualified_name(item.tag, prefixes), dict(item.attrib), pending_namespaces)
+            elif pending_namespaces:
+                _declare(item, pending_namespaces)
+            pending_namespaces = []
+            stack.append(item)
+        else:
+            stack.pop()
+            if len(stack) == record_depth:
+                yield "record", (item, prefixes)
+                # Drop the consumed record so the tree never grows past one record
+                stack[-1].remove(item)
+
+
+XmlDocument = namedtuple("XmlDocument", ["root", "prefixes", "declarations"])
+
+# Constructs ElementTree drops or rewrites, minidom and lxml keep them
+_UNKEPT = re.compile(r"<!DOCTYPE|<!\[CDATA\[")
+_XML_DECLARATION = re.compile(r"\ufeff?\s*<\?xml\s")
+
+
+def parse_xml_document(xml_content):
+    """Parse a whole document into one ElementTree tree for every in-memory output
+
+    Returns an XmlDocument: the root element, the uri to prefix map, and the root's
+    namespace declarations, with those of other elements kept as xmlns attributes like
+    iter_xml_records does. Comments and processing instructions are kept as nodes.
+    Returns None if the document is malformed or holds what the tree cannot stand in
+    for: a DOCTYPE, CDATA sections, or comments and processing instructions outside
+    the root element. Callers then fall back to the parser their output is defined by.
+    """
+    if _UNKEPT.search(xml_content):
+        return None
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True, insert_pis=True))
+    prefixes = {XML_NAMESPACE: "xml"}
+    pending_namespaces = []
+    declarations = None
+    try:
+        events = ET.iterparse(io.StringIO(xml_content), events=("start-ns", "start"), parser=parser)
+        for event, item in events:
+            if event == "start-ns":
+                prefix, uri = item
+                prefixes[uri] = prefix
+                pending_namespaces.append(item)
+                continue
+            if declarations is None:
+                declarations = pending_namespaces
+            elif pending_namespaces:
+                _declare(item, pending_namespaces)
+            pending_namespaces = []
+    except ET.ParseError:
+        return None
+    root = events.root
+
+    # Every comment and processing instruction must have ended up inside the tree
+    instructions = xml_content.count("<?") - bool(_XML_DECLARATION.match(xml_content))
+    if (xml_content.count("<!--") != sum(1 for _ in root.iter(ET.Comment))
+            or instructions != sum(1 for _ in root.iter(ET.PI))):
+        return None
+    return XmlDocument(root, prefixes, declarations)
+
+
+def stream_records(xml_file_path, writers):
+    """Read an XML file once, handing the root and every record to each writer
+
+    A writer has start(name, attributes, declarations), called for the root element,
+    write(element, prefixes), called for each record, and close(). Returns what each
+    writer's close() returned.
+    """
+    for event, payload in iter_xml_records(xml_file_path):
+        for writer in writers:
+            if event == "root":
+                writer.start(*payload)
+            else:
+                writer.write(*payload)
+    return [writer.close() for writer in writers]
+
+
+def _declaration(prefix):
+    return f"xmlns:{prefix}" if prefix else "xmlns"
+
+
+def _declare(element, namespaces):
+    # Declarations go ahead of the attributes, as minidom and xmltodict report them
+    element.attrib = {**{_declaration(prefix): uri for prefix, uri in namespaces}, **element.attrib}
+
+
+def start_tag(name, attributes, declarations=()):
+    """Opening tag without its closing bracket, namespace declarations first"""
+    parts = [name]
+    for prefix, uri in declarations:
+        parts.append(f"{_declaration(prefix)}={quoteattr(uri)}")
+    for key, value in attributes.items():
+        parts.append(f"{key}={quoteattr(value)}")
+    return "<" + " ".join(parts)
+
+
+def write_pretty_element(element, f, prefixes, level=1, indent="  "):
+    """Write an ElementTree element as indented XML, one tag or text run per line"""
+    pad = indent * level
+    name = qualified_name(element.tag, prefixes)
+    attributes = {qualified_name(k, prefixes): v for k, v in element.attrib.items()}
+    start = start_tag(name, attributes)
+    text = (element.text or "").strip()
+    children = list(element)
+
+    if not children:
+        if text:
+            f.write(f"{pad}{start}>{escape(text)}</{name}>\n")
+        else:
+            f.write(f"{pad}{start}/>\n")
+        return
+
+    f.write(f"{pad}{start}>\n")
+    if text:
+        f.write(f"{pad}{indent}{escape(text)}\n")
+    for child in children:
+        write_pretty_element(child, f, prefixes, level + 1, indent)
+        tail = (child.tail or "").strip()
+        if tail:
+            f.write(f"{pad}{indent}{escape(tail)}\n")
+    f.write(f"{pad}</{name}>\n")
+
+
+class PrettyXmlWriter:
+    """Stream writer for stream_records that pretty-prints the document"""
+
+    def __init__(self, f, indent="  "):
+        self.f = f
+        self.indent = indent
+        self.root_name = None
+        self.f.write('<?xml version="1.0" ?>\n')
+
+    def start(self, name, attributes, declarations):
+        self.root_name = name
+        self.f.write(start_tag(name, attributes, declarations) + ">\n")
+
+    def write(self, element, prefixes):
+        write_pretty_element(element, self.f, prefixes, 1, self.indent)
+
+    def close(self):
+        if self.root_name is not None:
+            self.f.write(f"</{self.root_name}>\n")
+        return True
+
+
+def stream_pretty_xml(xml_file_path, f, indent="  "):
+    """Pretty-print an XML file record by record without building the whole tree"""
+    stream_records(xml_file_path, [PrettyXmlWriter(f, indent)])
+
+
+class JsonArrayWriter:
+    """Write a JSON array one item at a time, formatted like json.dumps(items, indent=...)"""
+
+    def __init__(self, f, indent=2, level=0):
+        self.f = f
+        self.indent = indent
+        self.pad = " " * (indent * (level + 1))
+        self.closing_pad = " " * (indent * level)
+        self.count = 0
+        self.f.write("[")
+
+    def write(self, item):
+        text = json.dumps(item, indent=self.indent).replace("\n", "\n" + self.pad)
+        self.f.write(("," if self.count else "") + "\n" + self.pad + text)
+        self.count += 1
+
+    def close(self):
+        self.f.write(("\n" + self.closing_pad if self.count else "") + "]")
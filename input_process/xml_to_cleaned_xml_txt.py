@@ -1,79 +1,35 @@
 import os
-from unstructured.partition.xml import partition_xml
-from unstructured.staging.base import convert_to_dict
-from unstructured.cleaners.core import (
-    clean, clean_bullets, clean_extra_whitespace,
-    clean_dashes, clean_trailing_punctuation,
-    group_broken_paragraphs, replace_unicode_quotes
-)
-import json
-from bs4 import BeautifulSoup
-from dicttoxml import dicttoxml
-from xml.dom.minidom import parseString
 
-def process_and_clean_xml_to_txt(xml_file_path):
-    def filter_xml(xml_content, tags_to_remove):
-        soup = BeautifulSoup(xml_content, 'xml')
-        for tag in tags_to_remove:
-            for element in soup.find_all(tag):
-                element.decompose()
-        return str(soup)
+from input_process.text_cleaning import CleanedRecordWriter, clean_partitioned_element, partition_document
+from input_process.xml_serializer import ElementXmlWriter, write_elements_as_xml
+from input_process.xml_stream import stream_records
 
-    def clean_text(text):
-        text = clean(text, bullets=True, extra_whitespace=True, dashes=True, trailing_punctuation=True)
-        text = clean_bullets(text)
-        text = clean_extra_whitespace(text)
-        text = clean_dashes(text)
-        text = clean_trailing_punctuation(text)
-        text = replace_unicode_quotes(text)
-        text = group_broken_paragraphs(text)
-        return text
+def relabel_languages(element):
+    """Label German elements as English, leaving the element passed in unchanged"""
+    metadata = element.get('metadata') if isinstance(element, dict) else None
+    if metadata and metadata.get('languages') == ['deu']:
+        return dict(element, metadata=dict(metadata, languages=['eng']))
+    return element
 
-    def process_element(element):
-        if isinstance(element, dict):
-            return {k: process_element(v) for k, v in element.items()}
-        elif isinstance(element, list):
-            return [process_element(item) for item in element]
-        elif isinstance(element, str):
-            return clean_text(element)
-        else:
-            return element
+class EnrichedXmlWriter(ElementXmlWriter):
+    """ElementXmlWriter for cleaned element dicts that relabels German elements as English"""
 
-    def process_metadata(element):
-        if isinstance(element, dict) and 'metadata' in element:
-            metadata = element['metadata']
-            metadata.pop('file_directory', None)
-            metadata.pop('last_modified', None)
-            if 'languages' in metadata and metadata['languages'] == ['deu']:
-                metadata['languages'] = ['eng']
-        return process_element(element)
+    def write(self, item):
+        super().write(relabel_languages(item))
 
+def process_and_clean_xml_to_txt(xml_file_path, streaming=False):
     try:
-        # Read the XML file
-        with open(xml_file_path, 'r', encoding='utf-8') as file:
-            xml_content = file.read()
-
         # Filter out unwanted tags (if any)
         tags_to_remove = []  # Add tags to remove if needed
-        filtered_xml = filter_xml(xml_content, tags_to_remove)
-
-        # Partition the filtered XML
-        elements = partition_xml(text=filtered_xml)
-
-        # Convert the elements to a dictionary, process metadata, and clean text
-        data_dict = convert_to_dict(elements)
-        data_dict = [process_metadata(element) for element in data_dict]
-
-        # Convert the dictionary to JSON
-        json_data = json.dumps(data_dict, indent=2)
 
-        # Convert JSON back to XML
-        json_dict = json.loads(json_data)
-        xml = dicttoxml(json_dict, custom_root='root', attr_type=False)
+        if not streaming:
+            # Read the XML file
+            with open(xml_file_path, 'r', encoding='utf-8') as file:
+                xml_content = file.read()
 
-        # Make the XML more readable
-        dom = parseString(xml)
-        pretty_xml = dom.toprettyxml()
+            # Partition the filtered XML, process metadata, and clean text
+            cleaned_elements = [clean_partitioned_element(element)
+                                for element in partition_document(xml_content, tags_to_remove)]
 
         # Create "data" folder
         xml_dir = os.path.dirname(xml_file_path)
@@ -85,9 +41,12 @@ def process_and_clean_xml_to_txt(xml_file_path):
         cleaned_txt_filename = os.path.splitext(xml_filename)[0] + '_cleaned_xml.txt'
         cleaned_txt_file_path = os.path.join(data_dir, cleaned_txt_filename)
 
-        # Save the pretty XML to a TXT file in the "data" folder
+        # Write the cleaned elements as pretty XML to a TXT file in the "data" folder
         with open(cleaned_txt_file_path, "w", encoding='utf-8') as f:
-            f.write(pretty_xml)
+            if streaming:
+                stream_records(xml_file_path, [CleanedRecordWriter([EnrichedXmlWriter(f)], tags_to_remove)])
+            else:
+                write_elements_as_xml(map(relabel_languages, cleaned_elements), f)
 
         print(f"Processed and cleaned XML file: {xml_file_path}")
         print(f"Created cleaned XML content in TXT file: {cleaned_txt_file_path}")
@@ -99,5 +58,5 @@ def process_and_clean_xml_to_txt(xml_file_path):
         return None
 
 # Example usage
-xml_file_path = "parts.xml"
-cleaned_txt_file_path = process_and_clean_xml_to_txt(xml_file_path)
\ No newline at end of file
+# xml_file_path = "parts.xml"
+# cleaned_txt_file_path = process_and_clean_xml_to_txt(xml_file_path)
\ No newline at end of file
@@ -2,27 +2,159 @@ import json
 import xmltodict
 import os
 
-def xml_to_json_txt(xml_file):
+from input_process.xml_stream import JsonArrayWriter, parse_xml_document, qualified_name, stream_records
+
+
+class _StopParsing(Exception):
+    pass
+
+
+def _root_start_tag(blocks):
+    """Name and attributes of the root element as written, namespace declarations included
+
+    ElementTree separates namespace declarations from attributes and loses their
+    order, xmltodict keeps both as they appear; blocks are only read up to the root.
+    """
+    from xml.parsers import expat
+
+    parser = expat.ParserCreate()
+    parser.ordered_attributes = True
+    found = []
+
+    def start(name, attributes):
+        found.append((name, list(zip(attributes[0::2], attributes[1::2]))))
+        raise _StopParsing
+
+    parser.StartElementHandler = start
     try:
-        # Read the XML file
-        with open(xml_file, 'r') as file:
-            xml_data = file.read()
+        for block in blocks:
+            parser.Parse(block, False)
+    except _StopParsing:
+        pass
+    return found[0]
+
+
+def _file_blocks(path, block_size=1 << 16):
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(block_size), b"")
+
+
+def _xmltodict_value(element, prefixes, attributes=None):
+    """What xmltodict stores for an element, given its attributes as written or not"""
+    if attributes is None:
+        attributes = ((qualified_name(k, prefixes), v) for k, v in element.attrib.items())
+    item = {f"@{key}": value for key, value in attributes} or None
+    # Comments and processing instructions are skipped, the text around them is kept
+    text = (element.text or "") + "".join(child.tail or "" for child in element)
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        item = item if item is not None else {}
+        name = qualified_name(child.tag, prefixes)
+        value = _xmltodict_value(child, prefixes)
+        if name in item:
+            if isinstance(item[name], list):
+                item[name].append(value)
+            else:
+                item[name] = [item[name], value]
+        else:
+            item[name] = value
+    text = text.strip() or None
+    if item is None:
+        return text
+    if text:
+        item["#text"] = text
+    return item
+
+
+def _xmltodict_record(element, prefixes):
+    # At the streaming depth xmltodict hands over the raw text of leaf records and
+    # leaves out the text of records that have attributes or children
+    if not element.attrib and not len(element):
+        return element.text or None
+    value = _xmltodict_value(element, prefixes)
+    value.pop("#text", None)
+    return value
 
-        # Parse XML to OrderedDict
-        xml_dict = xmltodict.parse(xml_data)
 
-        # Convert OrderedDict to JSON
-        json_data = json.dumps(xml_dict, indent=4)
+class DirectJsonWriter:
+    """Stream writer for stream_records producing the streaming form of xml_to_json_txt
 
+    The output is {"<root>": {"@attr": ..., "#items": [{"<tag>": {...}}, ...]}}, keeping
+    every child of the root in document order, each item as xmltodict.parse with
+    item_depth=2 reports it. close() returns False if the root has no child elements,
+    in which case nothing is written.
+    """
+
+    def __init__(self, f, xml_file_path):
+        self.f = f
+        self.xml_file_path = xml_file_path
+        self.writer = None
+
+    def start(self, name, attributes, declarations):
+        pass
+
+    def write(self, element, prefixes):
+        if self.writer is None:
+            name, attributes = _root_start_tag(_file_blocks(self.xml_file_path))
+            self.f.write("{\n    " + json.dumps(name) + ": {\n")
+            for key, value in attributes:
+                self.f.write(f"        {json.dumps('@' + key)}: {json.dumps(value)},\n")
+            self.f.write('        "#items": ')
+            self.writer = JsonArrayWriter(self.f, indent=4, level=2)
+        self.writer.write({qualified_name(element.tag, prefixes): _xmltodict_record(element, prefixes)})
+
+    def close(self):
+        if self.writer is None:
+            return False
+        self.writer.close()
+        self.f.write("\n    }\n}")
+        return True
+
+
+def stream_xml_to_json(xml_file, f):
+    """Write an XML file as JSON record by record, see DirectJsonWriter
+
+    Returns False if the root has no child elements, in which case nothing is written.
+    """
+    return stream_records(xml_file, [DirectJsonWriter(f, xml_file)])[0]
+
+
+def xml_to_json(xml_content, document=None, block_size=1 << 16):
+    """The whole document as xmltodict.parse reads it, formatted as JSON
+
+    document is xml_content parsed by parse_xml_document, which is done here if it is
+    not given. The tree is converted directly, xmltodict only parses the documents the
+    tree cannot stand in for.
+    """
+    if document is None:
+        document = parse_xml_document(xml_content)
+    if document is None:
+        return json.dumps(xmltodict.parse(xml_content), indent=4)
+    head = (xml_content[i:i + block_size] for i in range(0, len(xml_content), block_size))
+    name, attributes = _root_start_tag(head)
+    return json.dumps({name: _xmltodict_value(document.root, document.prefixes, attributes)}, indent=4)
+
+
+def xml_to_json_txt(xml_file, streaming=False):
+    try:
         # Generate TXT file name and path
         xml_dir = os.path.dirname(xml_file)
         xml_filename = os.path.basename(xml_file)
         txt_filename = os.path.splitext(xml_filename)[0] + '_direct_json.txt'
         txt_file_path = os.path.join(xml_dir, txt_filename)
 
-        # Write JSON content to a new TXT file
-        with open(txt_file_path, 'w') as file:
-            file.write(json_data)
+        if streaming:
+            with open(txt_file_path, 'w') as file:
+                streamed = stream_xml_to_json(xml_file, file)
+        if not streaming or not streamed:
+            # Read the XML file
+            with open(xml_file, 'r') as file:
+                xml_data = file.read()
+
+            # Write JSON content to a new TXT file
+            with open(txt_file_path, 'w') as file:
+                file.write(xml_to_json(xml_data))
 
         print(f"Conversion complete. TXT file with JSON content created at {txt_file_path}")
         return txt_file_path
@@ -32,7 +164,7 @@ def xml_to_json_txt(xml_file):
         return None
 
 # Usage
-xml_file_path = "parts.xml"
-txt_file = xml_to_json_txt(xml_file_path)
+# xml_file_path = "parts.xml"
+# txt_file = xml_to_json_txt(xml_file_path)
 # if txt_file:
 #     print(f"Conversion complete. TXT file created at {txt_file}")
\ No newline at end of file
@@ -0,0 +1,93 @@
+import logging
+import math
+
+import faiss
+import numpy as np
+
+INDEX_KINDS = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+METRICS = ("l2", "ip", "cosine")
+
+# Below this many vectors the trained indexes are not worth it and we build a flat one
+MIN_TRAINING_POINTS = 1000
+MAX_TRAINING_POINTS_PER_LIST = 256
+
+
+def default_nlist(n):
+    """Number of IVF lists for n vectors, keeping at least 39 training points per list"""
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def default_pq_m(dimension):
+    """Largest sub-quantizer count up to dimension/16 that divides the dimension"""
+    for m in range(max(1, dimension // 16), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def _make_index(kind, dimension, metric_type, n, nlist, hnsw_m, pq_m, pq_bits):
+    if kind == "flat":
+        return faiss.IndexFlat(dimension, metric_type)
+    if kind == "hnsw":
+        return faiss.IndexHNSWFlat(dimension, hnsw_m, metric_type)
+
+    nlist = nlist or default_nlist(n)
+    quantizer = faiss.IndexFlat(dimension, metric_type)
+    if kind == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, metric_type)
+    if kind == "ivf_pq":
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m or default_pq_m(dimension), pq_bits, metric_type)
+    raise ValueError(f"Unknown index kind {kind!r}, expected one of {INDEX_KINDS}")
+
+
+def build_index(embeddings, kind="flat", metric="l2", ids=None, nlist=None, nprobe=None,
+                hnsw_m=32, ef_search=64, pq_m=None, pq_bits=8, seed=1234):
+    """Build, train and fill a FAISS index that returns ids from search
+
+    kind selects flat (exact), ivf_flat, hnsw or ivf_pq. metric is l2, ip (inner
+    product) or cosine, which normalizes both stored and query vectors. Trained kinds
+    fall back to flat when there are too few vectors to train on.
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind {kind!r}, expected one of {INDEX_KINDS}")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    n, dimension = embeddings.shape
+
+    if kind in ("ivf_flat", "ivf_pq") and n < MIN_TRAINING_POINTS:
+        logging.info(f"Only {n} vectors, building a flat index instead of {kind}")
+        kind = "flat"
+
+    metric_type = faiss.METRIC_L2 if metric == "l2" else faiss.METRIC_INNER_PRODUCT
+    index = _make_index(kind, dimension, metric_type, n, nlist, hnsw_m, pq_m, pq_bits)
+    if metric == "cosine":
+        index = faiss.IndexPreTransform(faiss.NormalizationTransform(dimension, 2.0), index)
+
+    if not index.is_trained:
+        # Train on a bounded random sample of the built embeddings
+        sample_size = min(n, MAX_TRAINING_POINTS_PER_LIST * (nlist or default_nlist(n)))
+        sample = embeddings[np.random.default_rng(seed).choice(n, sample_size, replace=False)]
+        index.train(sample)
+
+    parameters = faiss.ParameterSpace()
+    if kind in ("ivf_flat", "ivf_pq"):
+        lists = nlist or default_nlist(n)
+        parameters.set_index_parameter(index, "nprobe", nprobe or min(lists, max(8, lists // 16)))
+    elif kind == "hnsw":
+        parameters.set_index_parameter(index, "efSearch", ef_search)
+
+    if kind in ("flat", "hnsw"):
+        # IVF lists store the ids themselves. Wrapping them in an IDMap2 would break
+        # remove_ids, which compacts the id map but not the ids held in the lists
+        index = faiss.IndexIDMap2(index)
+    if ids is None:
+        ids = np.arange(n, dtype='int64')
+    if n:
+        index.add_with_ids(embeddings, ids)
+    return index
+
+
+def index_memory_bytes(index):
+    """Size of the serialized index, a close proxy for its resident memory"""
+    return int(faiss.serialize_index(index).size)
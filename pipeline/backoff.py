@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import random
+import time
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Seconds to wait before retry number `attempt`: exponential backoff with full jitter"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_call(call, is_retryable, max_retries, base_delay, max_delay, description="Request"):
+    """Return call(), retrying errors is_retryable accepts up to max_retries times
+
+    The last error is raised once the retries run out, and any other error at once.
+    """
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if not is_retryable(e) or attempt >= max_retries:
+                raise
+            attempt += 1
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logging.warning(f"{description} failed ({e}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def retry_call_async(call, is_retryable, max_retries, base_delay, max_delay, description="Request"):
+    """retry_call for a coroutine function, sleeping without blocking the event loop"""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if not is_retryable(e) or attempt >= max_retries:
+                raise
+            attempt += 1
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logging.warning(f"{description} failed ({e}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
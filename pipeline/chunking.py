@@ -0,0 +1,126 @@
+import json
+import re
+from collections import namedtuple
+
+from pipeline.embeddings import count_tokens
+
+MAX_CHUNK_TOKENS = 256
+OVERLAP_TOKENS = 32
+
+# `start` and `end` are the first and last line numbers (1-based) for files, or
+# element positions for partitioned elements
+Chunk = namedtuple("Chunk", ["text", "source", "start", "end", "metadata"])
+
+_TAG = re.compile(r"<[^>]*>")
+# A JSON key opening an object or array, e.g. `"metadata": {`
+_JSON_OPENER = re.compile(r'^"[^"]*"\s*:\s*[\[{]$')
+_WORD = re.compile(r"\w")
+
+
+def is_structural(line):
+    """True for lines that carry no content: blank lines, lone tags, brackets and JSON keys"""
+    stripped = line.strip()
+    if not stripped or stripped.startswith("<?xml"):
+        return True
+    if _JSON_OPENER.match(stripped):
+        return True
+    return not _WORD.search(_TAG.sub("", stripped))
+
+
+def _split_oversized(text, max_tokens, overlap_tokens):
+    # Word windows for a single unit that is larger than a whole chunk
+    words = text.split()
+    counts = [count_tokens(" " + word) for word in words]
+    pieces = []
+    start = 0
+    while start < len(words):
+        end = start
+        tokens = 0
+        while end < len(words) and (end == start or tokens + counts[end] <= max_tokens):
+            tokens += counts[end]
+            end += 1
+        pieces.append(" ".join(words[start:end]))
+        if end == len(words):
+            break
+        # Step back far enough to repeat `overlap_tokens` of context
+        back = end
+        overlap = 0
+        while back - 1 > start and overlap + counts[back - 1] <= overlap_tokens:
+            back -= 1
+            overlap += counts[back]
+        start = back
+    return pieces
+
+
+def chunk_units(units, source=None, max_tokens=MAX_CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    """Pack (text, position, metadata) units into overlapping, token-bounded chunks
+
+    Consecutive units are joined with newlines until the next one would exceed
+    `max_tokens`; each new chunk starts with the trailing units of the previous one
+    that fit in `overlap_tokens`. Units larger than a chunk are split into word windows.
+    Repeated chunks are kept, pipeline.dedup collapses them with their positions.
+    """
+    window = []
+    window_tokens = 0
+
+    def emit():
+        text = "\n".join(unit[0] for unit in window)
+        metadata = [unit[2] for unit in window if unit[2]]
+        return Chunk(text, source, window[0][1], window[-1][1], metadata)
+
+    for text, position, metadata in units:
+        text = text.strip()
+        if not text:
+            continue
+        tokens = count_tokens(text)
+        if tokens > max_tokens:
+            pieces = _split_oversized(text, max_tokens, overlap_tokens)
+        else:
+            pieces = [text]
+
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece)
+            if window and window_tokens + piece_tokens + 1 > max_tokens:
+                yield emit()
+                # Carry the tail of the window over as overlap
+                kept = []
+                kept_tokens = 0
+                for unit in reversed(window):
+                    if kept_tokens + unit[3] > overlap_tokens or kept_tokens + unit[3] + piece_tokens > max_tokens:
+                        break
+                    kept.insert(0, unit)
+                    kept_tokens += unit[3] + 1
+                window = kept
+                window_tokens = kept_tokens
+            window.append((piece, position, metadata, piece_tokens))
+            window_tokens += piece_tokens + 1
+
+    if window:
+        yield emit()
+
+
+def chunk_lines(lines, source=None, max_tokens=MAX_CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    """Chunk the lines of a processed file, dropping blank and structural-only lines"""
+    units = ((line, number, None) for number, line in enumerate(lines, 1) if not is_structural(line))
+    return list(chunk_units(units, source, max_tokens, overlap_tokens))
+
+
+def chunk_elements(elements, source=None, max_tokens=MAX_CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    """Chunk partition_xml elements (as dicts from convert_to_dict) by their text"""
+    def units():
+        for position, element in enumerate(elements):
+            text = element.get('text') if isinstance(element, dict) else None
+            if not text or is_structural(text):
+                continue
+            metadata = {key: element[key] for key in ("type", "element_id") if key in element}
+            yield text, position, metadata
+
+    return list(chunk_units(units(), source, max_tokens, overlap_tokens))
+
+
+def chunk_file(path, source=None, max_tokens=MAX_CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS, elements=False):
+    """Chunk a processed file line by line, or as a JSON list of elements with `elements=True`"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if elements:
+            return chunk_elements(json.load(f), source, max_tokens, overlap_tokens)
+        return chunk_lines(f, source, max_tokens, overlap_tokens)
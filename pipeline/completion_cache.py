@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def completion_key(model, temperature, messages):
+    """Hash of everything that determines a completion"""
+    payload = json.dumps([model, temperature, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Hits whose last-access time is held in memory before being written in one batch
+ACCESS_FLUSH_EVERY = 256
+# Eviction trims the cache to this share of its limits, so it does not run on every put
+EVICT_TO_RATIO = 0.9
+
+
+class CompletionCache:
+    """Persistent SQLite cache of chat completions keyed by (model, temperature, messages)
+
+    Entries older than `ttl_seconds` are treated as misses. Once the cache holds more
+    than `max_entries` rows or `max_bytes` of responses, the least recently used
+    entries are deleted. Row and byte totals are kept up to date by triggers, so
+    checking the limits does not scan the table, and last-access times are written
+    in batches rather than on every hit.
+    """
+
+    def __init__(self, path, ttl_seconds=None, max_entries=None, max_bytes=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._accessed = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            # Seeded once from whatever an older version of the cache already holds
+            self._db.execute(
+                "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS completions_insert AFTER INSERT ON completions BEGIN "
+                "UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0; END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS completions_delete AFTER DELETE ON completions BEGIN "
+                "UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0; END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS completions_resize AFTER UPDATE OF size ON completions BEGIN "
+                "UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END"
+            )
+
+    def get(self, model, temperature, messages):
+        key = completion_key(model, temperature, messages)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                with self._db:
+                    self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._accessed.pop(key, None)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_EVERY:
+                with self._db:
+                    self._flush_accessed()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model, temperature, messages, response):
+        key = completion_key(model, temperature, messages)
+        now = time.time()
+        with self._lock, self._db:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the triggers
+            self._db.execute(
+                "INSERT INTO completions (key, response, created, accessed, size) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET response = excluded.response, created = excluded.created, "
+                "accessed = excluded.accessed, size = excluded.size",
+                (key, response, now, now, len(response.encode('utf-8')))
+            )
+            self._accessed.pop(key, None)
+            self._evict()
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._db.executemany("UPDATE completions SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def _totals(self):
+        return self._db.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+
+    def _evict(self):
+        entries, total = self._totals()
+        over_entries = self.max_entries is not None and entries > self.max_entries
+        over_bytes = self.max_bytes is not None and total > self.max_bytes
+        if not over_entries and not over_bytes:
+            return
+        # Recent hits must count before picking the least recently used rows
+        self._flush_accessed()
+        keep_entries = int(self.max_entries * EVICT_TO_RATIO) if over_entries else entries
+        keep_bytes = int(self.max_bytes * EVICT_TO_RATIO) if over_bytes else total
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY accessed ASC"):
+            if entries <= keep_entries and total <= keep_bytes:
+                break
+            stale.append((key,))
+            entries -= 1
+            total -= size
+        self._db.executemany("DELETE FROM completions WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            with self._db:
+                self._flush_accessed()
+            self._db.close()
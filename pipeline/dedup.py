@@ -0,0 +1,94 @@
+import hashlib
+
+import numpy as np
+
+from pipeline.embedding_cache import normalize_text
+
+SIMHASH_BITS = 64
+# Words per shingle, the features a SimHash fingerprint is built from
+SHINGLE_WORDS = 3
+# Fingerprints this many bits apart or closer are near duplicates; 0 keeps exact dedup only
+MAX_HAMMING_DISTANCE = 3
+
+
+def text_key(text):
+    """Content hash of the normalized text, equal for exact duplicates"""
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).digest()
+
+
+def simhash(text, shingle_words=SHINGLE_WORDS):
+    """64-bit SimHash of a text's word shingles
+
+    Every shingle votes on each bit with its own hash, so texts sharing most of their
+    shingles get fingerprints a few bits apart.
+    """
+    words = normalize_text(text).lower().split()
+    if len(words) > shingle_words:
+        # Each distinct shingle votes once, otherwise the markup repeated in every
+        # extract outweighs the content
+        features = list({" ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)})
+    else:
+        features = [" ".join(words)]
+    digests = b"".join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest() for feature in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(features), 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(features)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def dedup_texts(texts, max_distance=MAX_HAMMING_DISTANCE):
+    """Collapse exact and near-duplicate texts, keeping the first occurrence of each
+
+    Returns (kept, groups): the positions of the texts to keep, and for each kept text
+    the positions of every text it stands for, itself included.
+
+    Exact duplicates share a hash of their normalized text. Near duplicates are found
+    with locality-sensitive hashing: the fingerprint is cut into max_distance + 1 bands,
+    and any two fingerprints at most max_distance bits apart agree on at least one
+    whole band, so only texts sharing a band are compared.
+    """
+    kept = []
+    groups = []
+    by_key = {}
+    bands = max_distance + 1
+    band_bits = SIMHASH_BITS // bands
+    band_mask = (1 << band_bits) - 1
+    buckets = [{} for _ in range(bands)]
+    fingerprints = []
+
+    for position, text in enumerate(texts):
+        key = text_key(text)
+        group = by_key.get(key)
+        if group is None and max_distance > 0:
+            fingerprint = simhash(text)
+            candidates = set()
+            for band in range(bands):
+                candidates.update(buckets[band].get((fingerprint >> (band * band_bits)) & band_mask, ()))
+            for candidate in sorted(candidates):
+                if hamming_distance(fingerprint, fingerprints[candidate]) <= max_distance:
+                    group = candidate
+                    break
+            if group is None:
+                for band in range(bands):
+                    buckets[band].setdefault((fingerprint >> (band * band_bits)) & band_mask, []).append(len(kept))
+                fingerprints.append(fingerprint)
+        if group is None:
+            group = len(kept)
+            kept.append(position)
+            groups.append([])
+        by_key[key] = group
+        groups[group].append(position)
+    return kept, groups
+
+
+def dedup_chunks(chunks, max_distance=MAX_HAMMING_DISTANCE):
+    """Collapse duplicate chunks, returning (unique chunks, occurrences of each)
+
+    Occurrences are the chunks, and so the source positions, each unique chunk stands
+    for, in document order.
+    """
+    kept, groups = dedup_texts([chunk.text for chunk in chunks], max_distance)
+    return [chunks[i] for i in kept], [[chunks[i] for i in group] for group in groups]
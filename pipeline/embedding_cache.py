@@ -0,0 +1,206 @@
+import hashlib
+import os
+import threading
+import unicodedata
+from contextlib import contextmanager
+
+import numpy as np
+
+from pipeline.embeddings import EMBEDDING_DIMENSION, embed_texts
+from pipeline.locks import file_lock
+
+INITIAL_CAPACITY = 1024
+EMPTY_KEY = bytes(16)
+
+
+def normalize_text(text):
+    """Normalize unicode and whitespace so trivially different texts share a cache entry"""
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(model, text):
+    """16-byte content hash of (model, normalized text)"""
+    data = model.encode('utf-8') + b"\0" + normalize_text(text).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache backed by a memory-mapped float32 matrix
+
+    `vectors.f32` holds one embedding per row and `index.npz` holds the row keys and
+    their last-use clock. When `max_entries` (or `max_bytes`) is exceeded the least
+    recently used rows are evicted and their slots reused. Processes sharing the
+    directory use the cache inside shared(), which keeps their views consistent.
+    """
+
+    def __init__(self, cache_dir, dimension=EMBEDDING_DIMENSION, max_entries=None, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.dimension = dimension
+        if max_bytes is not None:
+            max_entries = min(max_entries or max_bytes, max_bytes // (dimension * 4))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._index_path = os.path.join(cache_dir, "index.npz")
+        self._lock_path = os.path.join(cache_dir, ".lock")
+        # Last use of the entries hit since the index was last written, by key
+        self._used = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        keys = np.zeros(0, dtype='V16')
+        last_used = np.zeros(0, dtype='int64')
+        if os.path.exists(self._index_path) and os.path.exists(self._vectors_path):
+            index = np.load(self._index_path)
+            if int(index['dimension']) == self.dimension:
+                keys = index['keys']
+                last_used = index['last_used']
+        self._keys = keys
+        self._last_used = last_used
+        self._rows = {key: row for row, key in enumerate(keys.tolist()) if key != EMPTY_KEY}
+        self._free = [row for row, key in enumerate(keys.tolist()) if key == EMPTY_KEY]
+        self._clock = int(last_used.max()) if len(last_used) else 0
+        self._open(max(len(keys), INITIAL_CAPACITY))
+
+    def _open(self, capacity):
+        # Grow the backing file before mapping it, existing rows keep their offsets
+        size = capacity * self.dimension * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(self._vectors_path, dtype='float32', mode='r+',
+                                  shape=(capacity, self.dimension))
+        if len(self._keys) < capacity:
+            grow = capacity - len(self._keys)
+            self._free.extend(range(len(self._keys), capacity))
+            self._keys = np.concatenate([self._keys, np.zeros(grow, dtype='V16')])
+            self._last_used = np.concatenate([self._last_used, np.zeros(grow, dtype='int64')])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get_many(self, model, texts):
+        """Return (vectors, missing) where missing lists the positions not found in the cache"""
+        vectors = np.zeros((len(texts), self.dimension), dtype='float32')
+        missing = []
+        with self._lock:
+            self._clock += 1
+            for i, text in enumerate(texts):
+                key = cache_key(model, text)
+                row = self._rows.get(key)
+                if row is None:
+                    missing.append(i)
+                    continue
+                vectors[i] = self._vectors[row]
+                self._last_used[row] = self._clock
+                self._used[key] = self._clock
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return vectors, missing
+
+    def put_many(self, model, texts, vectors):
+        """Store embeddings for texts, evicting least recently used entries when full"""
+        with self._lock:
+            self._clock += 1
+            new_keys = {}
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model, text)
+                row = self._rows.get(key)
+                if row is not None:
+                    self._last_used[row] = self._clock
+                    self._used[key] = self._clock
+                else:
+                    new_keys[key] = vector
+            if self.max_entries is not None:
+                self._evict(len(self._rows) + len(new_keys) - self.max_entries)
+            if len(new_keys) > len(self._free):
+                needed = len(self._rows) + len(new_keys)
+                capacity = len(self._keys)
+                while capacity < needed:
+                    capacity *= 2
+                self._vectors.flush()
+                self._open(capacity)
+            for key, vector in new_keys.items():
+                row = self._free.pop()
+                self._vectors[row] = vector
+                self._keys[row] = key
+                self._last_used[row] = self._clock
+                self._rows[key] = row
+
+    def _evict(self, count):
+        if count <= 0:
+            return
+        occupied = np.fromiter(self._rows.values(), dtype='int64', count=len(self._rows))
+        count = min(count, len(occupied))
+        oldest = occupied[np.argpartition(self._last_used[occupied], count - 1)[:count]]
+        for row in oldest.tolist():
+            del self._rows[self._keys[row].tobytes()]
+            self._keys[row] = EMPTY_KEY
+            self._last_used[row] = 0
+            self._free.append(row)
+
+    def reload(self):
+        """Re-read the key index, picking up entries flushed by other processes
+
+        Hits not flushed yet keep their last use, so reloading never makes a
+        recently used entry look stale.
+        """
+        with self._lock:
+            self._vectors.flush()
+            clock = self._clock
+            self._load()
+            for key, used in self._used.items():
+                row = self._rows.get(key)
+                if row is not None and used > self._last_used[row]:
+                    self._last_used[row] = used
+            self._clock = max(self._clock, clock)
+
+    def flush(self):
+        """Write the vectors and the key index to disk"""
+        with self._lock:
+            self._vectors.flush()
+            tmp_path = self._index_path + ".tmp.npz"
+            np.savez(tmp_path, keys=self._keys, last_used=self._last_used,
+                     dimension=np.int64(self.dimension))
+            os.replace(tmp_path, self._index_path)
+            self._used = {}
+
+    @contextmanager
+    def shared(self):
+        """Hold the lock of the cache directory, re-reading the index before and writing it after
+
+        Other processes then see this one's entries and hits, and no two processes
+        fill the same free slot.
+        """
+        with file_lock(self._lock_path):
+            self.reload()
+            yield self
+            self.flush()
+
+
+def cached_embed_texts(texts, backend, cache, **kwargs):
+    """Embed texts through the cache, calling the backend only for unseen texts
+
+    The cache directory is locked while the cache is read and while it is updated,
+    but not while the backend embeds the missing texts.
+    """
+    if cache is None:
+        return embed_texts(texts, backend, **kwargs)
+
+    with cache.shared():
+        embeddings, missing = cache.get_many(backend.model, texts)
+    if missing:
+        # Embed each distinct missing text once
+        unique = {}
+        for i in missing:
+            unique.setdefault(normalize_text(texts[i]), []).append(i)
+        unique_texts = [texts[positions[0]] for positions in unique.values()]
+        vectors = embed_texts(unique_texts, backend, **kwargs)
+        for vector, positions in zip(vectors, unique.values()):
+            embeddings[positions] = vector
+        with cache.shared():
+            cache.put_many(backend.model, unique_texts, vectors)
+    return embeddings
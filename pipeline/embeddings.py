@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import tiktoken
+
+from pipeline import instrumentation
+from pipeline.backoff import retry_call
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSION = 1536
+
+# OpenAI limits for a single embeddings request
+MAX_TOKENS_PER_INPUT = 8191
+MAX_INPUTS_PER_BATCH = 2048
+MAX_TOKENS_PER_BATCH = 50000
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    # Loaded on first use, tiktoken reads (or downloads) its BPE ranks when asked
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.warning(f"Could not load the cl100k_base encoding ({e}), "
+                        f"estimating token counts at ~4 characters per token")
+        return None
+
+
+def count_tokens(text):
+    """Count the tokens of a text, estimating ~4 characters per token if the encoding cannot be loaded"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _prepare_input(text):
+    # The API rejects empty strings and inputs over the per-input token limit
+    if not text or not text.strip():
+        return " "
+    if count_tokens(text) > MAX_TOKENS_PER_INPUT:
+        encoding = _get_encoding()
+        if encoding is not None:
+            return encoding.decode(encoding.encode(text, disallowed_special=())[:MAX_TOKENS_PER_INPUT])
+        return text[:MAX_TOKENS_PER_INPUT * 3]
+    return text
+
+
+def make_batches(texts, max_tokens=MAX_TOKENS_PER_BATCH, max_inputs=MAX_INPUTS_PER_BATCH, token_counts=None):
+    """Split texts into (start, end) ranges that respect the per-request token and input limits"""
+    if token_counts is None:
+        token_counts = [min(count_tokens(text), MAX_TOKENS_PER_INPUT) for text in texts]
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if i > start and (batch_tokens + tokens > max_tokens or i - start >= max_inputs):
+            batches.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+class OpenAIEmbeddingBackend:
+    """Embeds batches of texts with the OpenAI embeddings endpoint"""
+
+    def __init__(self, api_key, model=EMBEDDING_MODEL, dimension=EMBEDDING_DIMENSION):
+        import openai
+
+        self.api_key = api_key
+        self.model = model
+        self.dimension = dimension
+        self.retryable_errors = (
+            openai.error.RateLimitError,
+            openai.error.ServiceUnavailableError,
+            openai.error.TryAgain,
+        )
+        self._openai = openai
+
+    def embed(self, texts):
+        response = self._openai.Embedding.create(model=self.model, input=texts, api_key=self.api_key)
+        data = sorted(response['data'], key=lambda item: item['index'])
+        return [item['embedding'] for item in data]
+
+
+class StubRateLimitError(Exception):
+    """Raised by StubEmbeddingBackend to simulate a rate-limited request"""
+
+
+class StubEmbeddingBackend:
+    """Deterministic local embedding backend for running the pipeline without a network
+
+    Each text maps to a fixed unit vector derived from its hash. `latency` adds a delay
+    per request and `rate_limit_every` makes every n-th request fail with a retryable error.
+    """
+
+    retryable_errors = (StubRateLimitError,)
+
+    def __init__(self, model="stub-embedding", dimension=EMBEDDING_DIMENSION, latency=0.0, rate_limit_every=0):
+        self.model = model
+        self.dimension = dimension
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.calls = 0
+        self.inputs = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_every and call_number % self.rate_limit_every == 0:
+            raise StubRateLimitError(f"Simulated rate limit on request {call_number}")
+        with self._lock:
+            self.inputs += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype('float32')
+        return vector / np.linalg.norm(vector)
+
+
+def _embed_with_retry(backend, texts, max_retries, base_delay, max_delay):
+    return retry_call(lambda: backend.embed(texts), lambda e: isinstance(e, backend.retryable_errors),
+                      max_retries, base_delay, max_delay, "Embedding request")
+
+
+def embed_texts(texts, backend, max_workers=4, max_tokens=MAX_TOKENS_PER_BATCH,
+                max_inputs=MAX_INPUTS_PER_BATCH, max_retries=6, base_delay=1.0, max_delay=60.0):
+    """Embed texts in batched requests and return a (len(texts), dimension) float32 array
+
+    At most `max_workers` batches are in flight at once. Rate-limited batches are retried
+    with exponential backoff, and each batch is written straight into the output array.
+    """
+    inputs = [_prepare_input(text) for text in texts]
+    embeddings = np.empty((len(inputs), backend.dimension), dtype='float32')
+    token_counts = [min(count_tokens(text), MAX_TOKENS_PER_INPUT) for text in inputs]
+    batches = make_batches(inputs, max_tokens=max_tokens, max_inputs=max_inputs, token_counts=token_counts)
+    instrumentation.add_tokens("embedding", backend.model, tokens_in=sum(token_counts))
+
+    def run_batch(batch):
+        start, end = batch
+        vectors = _embed_with_retry(backend, inputs[start:end], max_retries, base_delay, max_delay)
+        embeddings[start:end] = vectors
+
+    if len(batches) <= 1 or max_workers <= 1:
+        for batch in batches:
+            run_batch(batch)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # list() re-raises the first failed batch
+            list(executor.map(run_batch, batches))
+
+    return embeddings
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from pipeline import instrumentation
+
+# None scores with bert_score's default English model (roberta-large); a distilled
+# model such as distilbert-base-uncased is several times faster on CPU
+BERTSCORE_MODEL = os.environ.get("BERTSCORE_MODEL") or None
+BERTSCORE_BATCH_SIZE = 64
+
+
+@lru_cache(maxsize=4)
+def load_scorer(model_type=None, lang="en", batch_size=BERTSCORE_BATCH_SIZE, device=None):
+    """Load a BERTScorer once per process and model"""
+    from bert_score import BERTScorer
+
+    return BERTScorer(model_type=model_type, lang=lang, batch_size=batch_size, device=device)
+
+
+def scorer_id(scorer):
+    # Scores depend on the model, the layer used and the baseline rescaling
+    return f"{scorer.model_type}:{scorer.num_layers}:{int(scorer.idf)}:{int(scorer.rescale_with_baseline)}"
+
+
+def pair_key(model_id, candidate, reference):
+    payload = json.dumps([model_id, candidate, reference], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """Persistent SQLite cache of BERTScore (P, R, F1) keyed by model and text pair"""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, precision REAL NOT NULL, recall REAL NOT NULL, f1 REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, keys):
+        """Map each cached key to its (P, R, F1)"""
+        found = {}
+        with self._lock:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, precision, recall, f1 FROM scores WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                found.update((key, (p, r, f)) for key, p, r, f in rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, (P, R, F1)) items"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scores (key, precision, recall, f1) VALUES (?, ?, ?, ?)",
+                [(key, float(p), float(r), float(f)) for key, (p, r, f) in items]
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def score_pairs(candidates, references, scorer=None, cache=None):
+    """BERTScore every (candidate, reference) pair, returning (P, R, F1) float arrays
+
+    Only pairs missing from the cache are scored, all in one call so the scorer can
+    sort them by length into padded batches. Repeated pairs are scored once.
+    """
+    if len(candidates) != len(references):
+        raise ValueError(f"{len(candidates)} candidates but {len(references)} references")
+    scores = np.zeros((len(candidates), 3), dtype='float32')
+    if not candidates:
+        return scores[:, 0], scores[:, 1], scores[:, 2]
+
+    scorer = scorer or load_scorer(BERTSCORE_MODEL)
+    model_id = scorer_id(scorer)
+    keys = [pair_key(model_id, c, r) for c, r in zip(candidates, references)]
+    known = cache.get_many(sorted(set(keys))) if cache is not None else {}
+    instrumentation.add_cache("scores", len(known), len(set(keys)) - len(known))
+
+    # First position of each uncached pair
+    pending = {}
+    for i, key in enumerate(keys):
+        if key not in known and key not in pending:
+            pending[key] = i
+    if pending:
+        positions = list(pending.values())
+        with instrumentation.stage("scoring", items=len(positions)):
+            P, R, F1 = scorer.score([candidates[i] for i in positions], [references[i] for i in positions])
+        computed = {key: (float(p), float(r), float(f))
+                    for key, p, r, f in zip(pending, P.tolist(), R.tolist(), F1.tolist())}
+        if cache is not None:
+            cache.put_many(computed.items())
+        known.update(computed)
+
+    for i, key in enumerate(keys):
+        scores[i] = known[key]
+    return scores[:, 0], scores[:, 1], scores[:, 2]
+
+
+def score_responses(responses, references, scorer=None, cache=None):
+    """Mean (P, R, F1) of each question's candidate responses against its reference
+
+    `responses` holds a list of candidate answers per question. Questions without any
+    response get None.
+    """
+    candidates = []
+    pair_references = []
+    owners = []
+    for i, (answers, reference) in enumerate(zip(responses, references)):
+        for answer in answers:
+            candidates.append(answer)
+            pair_references.append(str(reference))
+            owners.append(i)
+
+    P, R, F1 = score_pairs(candidates, pair_references, scorer, cache)
+    owners = np.asarray(owners, dtype='int64')
+    results = []
+    for i in range(len(references)):
+        mask = owners == i
+        if not mask.any():
+            results.append(None)
+        else:
+            results.append((float(P[mask].mean()), float(R[mask].mean()), float(F1[mask].mean())))
+    return results
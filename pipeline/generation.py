@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import instrumentation
+from pipeline.backoff import retry_call_async
+from pipeline.embeddings import count_tokens
+
+CHAT_MODEL = "gpt-3.5-turbo"
+TEMPERATURE = 0.2
+
+# Completion tokens reserved per request when charging the tokens-per-minute bucket
+EXPECTED_COMPLETION_TOKENS = 256
+
+CompletionRequest = namedtuple("CompletionRequest", ["messages", "model", "temperature"])
+
+
+def build_messages(extract, question):
+    """Prompt asking the model to answer a question from a single extract"""
+    individual_prompt = f"Based on the following context, answer the question:\n\nContext: {extract}\n\nQuestion: {question}"
+    return [
+        {"role": "system", "content": individual_prompt},
+        {"role": "user", "content": question}
+    ]
+
+
+def estimate_request_tokens(messages):
+    return sum(count_tokens(message["content"]) for message in messages) + EXPECTED_COMPLETION_TOKENS
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class OpenAIChatClient:
+    """Async client for the OpenAI chat completions endpoint"""
+
+    def __init__(self, api_key):
+        import openai
+
+        self.api_key = api_key
+        self.retryable_errors = (
+            openai.error.RateLimitError,
+            openai.error.ServiceUnavailableError,
+            openai.error.APIConnectionError,
+            openai.error.Timeout,
+            openai.error.TryAgain,
+        )
+        self._openai = openai
+
+    async def complete(self, messages, model, temperature):
+        completion = await self._openai.ChatCompletion.acreate(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            api_key=self.api_key
+        )
+        return completion.choices[0].message.content
+
+
+class FakeRateLimitError(Exception):
+    """Raised by FakeChatClient when its simulated requests-per-minute limit is exceeded"""
+
+
+class FakeChatClient:
+    """Local stand-in for the chat endpoint to exercise and benchmark the scheduler offline
+
+    Each call sleeps for `latency` seconds (plus up to `jitter`) and returns a
+    deterministic answer. With `rate_limit_rpm` set, requests beyond that many in
+    the trailing minute fail with FakeRateLimitError like a throttled API would.
+    """
+
+    retryable_errors = (FakeRateLimitError,)
+
+    def __init__(self, latency=0.5, jitter=0.0, rate_limit_rpm=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rpm = rate_limit_rpm
+        self.calls = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._recent = []
+
+    async def complete(self, messages, model, temperature):
+        self.calls += 1
+        if self.rate_limit_rpm:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 60]
+            if len(self._recent) >= self.rate_limit_rpm:
+                self.throttled += 1
+                raise FakeRateLimitError("Rate limit reached for requests")
+            self._recent.append(now)
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        digest = hashlib.sha1(repr(messages).encode('utf-8')).hexdigest()[:8]
+        return f"Answer {digest} to: {messages[-1]['content']}"
+
+
+async def _complete_with_retry(client, request, max_retries, base_delay, max_delay):
+    return await retry_call_async(
+        lambda: client.complete(request.messages, request.model, request.temperature),
+        lambda e: isinstance(e, client.retryable_errors), max_retries, base_delay, max_delay, "Completion")
+
+
+async def generate_completions(requests, client, max_concurrency=8, requests_per_minute=3500,
+                               tokens_per_minute=90000, max_retries=6, base_delay=1.0, max_delay=60.0,
+                               cache=None):
+    """Run completion requests concurrently and return their results in request order
+
+    At most `max_concurrency` requests are in flight and both rate limits are enforced
+    client-side with token buckets. A failed request yields its exception in place of
+    the response text. With a CompletionCache, cached requests skip the API entirely
+    and new responses are stored.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+
+    async def run(request):
+        if cache is not None:
+            cached = cache.get(request.model, request.temperature, request.messages)
+            if cached is not None:
+                return cached
+        async with semaphore:
+            tokens = estimate_request_tokens(request.messages)
+            await request_bucket.acquire(1)
+            await token_bucket.acquire(tokens)
+            response = await _complete_with_retry(client, request, max_retries, base_delay, max_delay)
+        instrumentation.add_tokens("generation", request.model, tokens_in=tokens - EXPECTED_COMPLETION_TOKENS,
+                                   tokens_out=count_tokens(response))
+        if cache is not None:
+            cache.put(request.model, request.temperature, request.messages, response)
+        return response
+
+    return await asyncio.gather(*(run(request) for request in requests), return_exceptions=True)
+
+
+def run_completions(requests, client, **kwargs):
+    """Synchronous entry point for generate_completions"""
+    coroutine = generate_completions(requests, client, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Already inside an event loop, run ours on a separate thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
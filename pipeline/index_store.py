@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+import faiss
+import numpy as np
+
+from pipeline.ann_index import build_index
+from pipeline.locks import file_lock
+
+INDEX_FILE = "index.faiss"
+EXTRACTS_FILE = "extracts.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "manifest.json"
+
+# Rebuild instead of patching once this share of the stored rows has been removed
+COMPACT_RATIO = 0.5
+
+
+def extracts_digest(extracts):
+    """Hash of the extracts to index, so changing the chunking or dedup settings misses the store"""
+    return hashlib.sha256(json.dumps(extracts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def document_key(source_bytes, mode, index_options=None, extracts=None):
+    """Hash of the uploaded document contents plus the processing mode, index options and extracts"""
+    digest = hashlib.sha256(source_bytes)
+    digest.update(b"\0" + mode.encode('utf-8'))
+    if index_options:
+        digest.update(b"\0" + json.dumps(index_options, sort_keys=True).encode('utf-8'))
+    if extracts is not None:
+        digest.update(b"\0" + extracts_digest(extracts).encode('ascii'))
+    return digest.hexdigest()[:32]
+
+
+def mode_slug(mode):
+    return re.sub(r"[^a-z0-9]+", "_", mode.lower()).strip("_")
+
+
+def store_path(store_root, source_bytes, mode, index_options=None, extracts=None):
+    """Directory holding the persisted index for a document processed in a given mode"""
+    return os.path.join(store_root, mode_slug(mode), document_key(source_bytes, mode, index_options, extracts))
+
+
+def build_id_index(embeddings, ids=None, index_options=None):
+    """Index whose search results are ids rather than insertion positions
+
+    index_options are passed to pipeline.ann_index.build_index; the default is an
+    exact L2 index.
+    """
+    return build_index(embeddings, ids=ids, **(index_options or {}))
+
+
+def _write_atomic(path, write):
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_vectordb(path, index, extracts, embeddings, manifest=None):
+    """Persist the index, extracts and embeddings; the manifest is written last"""
+    os.makedirs(path, exist_ok=True)
+    _write_atomic(os.path.join(path, INDEX_FILE), lambda p: faiss.write_index(index, p))
+
+    def write_extracts(p):
+        with open(p, "w", encoding='utf-8') as f:
+            json.dump(extracts, f)
+    _write_atomic(os.path.join(path, EXTRACTS_FILE), write_extracts)
+
+    def write_embeddings(p):
+        with open(p, "wb") as f:
+            np.save(f, np.asarray(embeddings, dtype='float32'))
+    _write_atomic(os.path.join(path, EMBEDDINGS_FILE), write_embeddings)
+
+    manifest = dict(manifest or {})
+    manifest.update(ntotal=int(index.ntotal), rows=len(extracts), created=time.time())
+
+    def write_manifest(p):
+        with open(p, "w", encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    _write_atomic(os.path.join(path, MANIFEST_FILE), write_manifest)
+
+
+def load_vectordb(path, mmap=True):
+    """Load a persisted store as (index, extracts, embeddings), or None if there is none
+
+    With mmap the index and embeddings are memory-mapped read-only; load with
+    mmap=False to get an index that can be updated.
+    """
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return None
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(os.path.join(path, INDEX_FILE), flags)
+    with open(os.path.join(path, EXTRACTS_FILE), "r", encoding='utf-8') as f:
+        extracts = json.load(f)
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode='r' if mmap else None)
+    return index, extracts, embeddings
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_vectordb(index, extracts, embeddings, new_extracts, embed_fn, index_options=None):
+    """Patch a loaded store so it indexes new_extracts, embedding only the added ones
+
+    Row ids stay stable: removed extracts become None in the returned extracts list and
+    are dropped from the index, added extracts are appended with new ids. Returns
+    (index, extracts, embeddings) and rebuilds compactly once too many rows are dead.
+    """
+    # Match new extracts against stored rows, honouring repeated lines
+    stored = {}
+    for row, text in enumerate(extracts):
+        if text is not None:
+            stored.setdefault(text, []).append(row)
+    added = []
+    for text in new_extracts:
+        rows = stored.get(text)
+        if rows:
+            rows.pop()
+        else:
+            added.append(text)
+    removed = [row for rows in stored.values() for row in rows]
+
+    extracts = list(extracts)
+    rebuild = False
+    if removed:
+        for row in removed:
+            extracts[row] = None
+        try:
+            index.remove_ids(np.array(removed, dtype='int64'))
+        except RuntimeError:
+            # HNSW graphs do not support removal
+            rebuild = True
+
+    embeddings = np.asarray(embeddings, dtype='float32')
+    if added:
+        added_embeddings = embed_fn(added)
+        ids = np.arange(len(extracts), len(extracts) + len(added), dtype='int64')
+        if not rebuild:
+            index.add_with_ids(np.ascontiguousarray(added_embeddings, dtype='float32'), ids)
+        extracts.extend(added)
+        embeddings = np.concatenate([embeddings, added_embeddings])
+    logging.info(f"Updated vector store: {len(added)} extracts added, {len(removed)} removed")
+
+    dead = sum(text is None for text in extracts)
+    if dead > COMPACT_RATIO * len(extracts):
+        live = np.array([row for row, text in enumerate(extracts) if text is not None], dtype='int64')
+        extracts = [extracts[row] for row in live]
+        embeddings = embeddings[live]
+        index = build_id_index(embeddings, index_options=index_options)
+    elif rebuild:
+        live = np.array([row for row, text in enumerate(extracts) if text is not None], dtype='int64')
+        index = build_id_index(embeddings[live], ids=live, index_options=index_options)
+    return index, extracts, embeddings
+
+
+def _latest_store(mode_dir, source_name, index_options):
+    # Most recent store built from an earlier version of the same file in this mode
+    candidates = []
+    if os.path.isdir(mode_dir):
+        for key in os.listdir(mode_dir):
+            path = os.path.join(mode_dir, key)
+            try:
+                manifest = read_manifest(path)
+            except (OSError, ValueError):
+                continue
+            if manifest.get('source_name') == source_name and manifest.get('index') == index_options:
+                candidates.append((manifest.get('created', 0), path))
+    return max(candidates)[1] if candidates else None
+
+
+def load_or_build_vectordb(store_root, source_bytes, source_name, mode, extracts, embed_fn,
+                           index_options=None):
+    """Return (index, extracts, embeddings) for a processed document, reusing saved work
+
+    The same document, mode and extracts are memory-mapped from disk. An edited version
+    of a previously stored file, or the same file chunked differently, is patched
+    incrementally; anything else is built from scratch. Each store is built under its
+    own lock, so processes building the same store wait for the first one and reuse
+    its result while other stores are built concurrently.
+    """
+    index_options = index_options or {}
+    path = store_path(store_root, source_bytes, mode, index_options, extracts)
+    loaded = load_vectordb(path)
+    if loaded is None:
+        with file_lock(path + ".lock"):
+            loaded = load_vectordb(path)
+            if loaded is None:
+                return _build_vectordb(path, source_bytes, source_name, mode, extracts, embed_fn, index_options)
+    logging.info(f"Loaded vector store from {path}")
+    return loaded
+
+
+def _build_vectordb(path, source_bytes, source_name, mode, extracts, embed_fn, index_options):
+    manifest = {
+        'source_name': source_name,
+        'source_sha256': hashlib.sha256(source_bytes).hexdigest(),
+        'extracts_sha256': extracts_digest(extracts),
+        'mode': mode,
+        'index': index_options,
+    }
+    base_path = _latest_store(os.path.dirname(path), source_name, index_options)
+    base = load_vectordb(base_path, mmap=False) if base_path else None
+    if base is not None:
+        index, stored_extracts, embeddings = update_vectordb(*base, extracts, embed_fn, index_options)
+        extracts = stored_extracts
+    else:
+        embeddings = embed_fn(extracts)
+        index = build_id_index(embeddings, index_options=index_options)
+
+    save_vectordb(path, index, extracts, embeddings, manifest)
+    return index, extracts, embeddings
@@ -0,0 +1,145 @@
+import csv
+import json
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# USD per 1000 tokens (input, output) used for the cost estimate
+PRICES_PER_1K_TOKENS = {
+    "text-embedding-ada-002": (0.0001, 0.0),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+CSV_FIELDS = ["stage", "calls", "seconds", "items", "tokens_in", "tokens_out", "cost_usd", "process_peak_rss_mb"]
+
+
+def peak_rss_mb():
+    # The high-water mark of the whole process so far, not of any one run or stage;
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class RunMetrics:
+    """Per-stage wall time, call and item counts, tokens and cache hits of a run
+
+    Stages nest freely; each keeps its own totals. Safe to record into from several
+    threads. Memory is the peak RSS of the whole process, which a long-lived worker
+    carries over from earlier runs, so it is reported as process_peak_rss_mb.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.started = time.time()
+        self.stages = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'seconds': 0.0, 'items': 0, 'tokens_in': 0, 'tokens_out': 0,
+                                 'cost_usd': 0.0, 'process_peak_rss_mb': 0.0}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, items=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stage = self._stage(name)
+                stage['calls'] += 1
+                stage['seconds'] += seconds
+                stage['items'] += items
+                # The process high-water mark when the stage ended shows which stage raised it
+                stage['process_peak_rss_mb'] = max(stage['process_peak_rss_mb'], peak_rss_mb())
+
+    def add_tokens(self, name, model, tokens_in=0, tokens_out=0):
+        price_in, price_out = PRICES_PER_1K_TOKENS.get(model, (0.0, 0.0))
+        with self._lock:
+            stage = self._stage(name)
+            stage['tokens_in'] += tokens_in
+            stage['tokens_out'] += tokens_out
+            stage['cost_usd'] += (tokens_in * price_in + tokens_out * price_out) / 1000
+
+    def add_cache(self, name, hits, misses):
+        with self._lock:
+            cache = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+            cache['hits'] += hits
+            cache['misses'] += misses
+
+    def report(self):
+        with self._lock:
+            stages = {name: dict(values) for name, values in self.stages.items()}
+            caches = {}
+            for name, values in self.caches.items():
+                lookups = values['hits'] + values['misses']
+                caches[name] = dict(values, hit_rate=values['hits'] / lookups if lookups else 0.0)
+        return {
+            'name': self.name,
+            'started': self.started,
+            'wall_seconds': time.time() - self.started,
+            'process_peak_rss_mb': peak_rss_mb(),
+            'tokens_in': sum(stage['tokens_in'] for stage in stages.values()),
+            'tokens_out': sum(stage['tokens_out'] for stage in stages.values()),
+            'cost_usd': sum(stage['cost_usd'] for stage in stages.values()),
+            'stages': stages,
+            'caches': caches,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_csv(self, path):
+        report = self.report()
+        with open(path, "w", newline="", encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for name, values in report['stages'].items():
+                writer.writerow({'stage': name, **{k: values[k] for k in CSV_FIELDS[1:]}})
+
+
+# The run being recorded in this process; recording is a no-op without one
+_current = None
+
+
+def start_run(name=None):
+    global _current
+    _current = RunMetrics(name)
+    return _current
+
+
+def end_run():
+    global _current
+    run, _current = _current, None
+    return run
+
+
+def current_run():
+    return _current
+
+
+@contextmanager
+def stage(name, items=0):
+    """Time a block as `name` in the current run, if any"""
+    run = _current
+    if run is None:
+        yield
+        return
+    with run.stage(name, items):
+        yield
+
+
+def add_tokens(name, model, tokens_in=0, tokens_out=0):
+    if _current is not None:
+        _current.add_tokens(name, model, tokens_in, tokens_out)
+
+
+def add_cache(name, hits, misses):
+    if _current is not None:
+        _current.add_cache(name, hits, misses)
@@ -0,0 +1,321 @@
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+import uuid
+
+from pipeline.locks import file_lock
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs")
+# Converted XML uploads by content hash, shared by every job and processing mode
+CONVERSIONS_DIR = os.path.join(os.path.dirname(JOBS_DIR), "conversions")
+# Least recently used conversions are evicted once the directory grows past this
+CONVERSIONS_MAX_BYTES = 2 * 1024 ** 3
+STATE_FILE = "state.json"
+# Held while a job's state is checked and claimed, by submitters and workers alike
+LOCK_FILE = ".lock"
+INPUTS_FILE = "inputs.json"
+REPORT_JSON_FILE = "report.json"
+REPORT_CSV_FILE = "report.csv"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Questions answered and scored per step; partial results are saved after each step
+QUESTIONS_PER_STEP = 20
+
+# Converter for each operation offered by the frontend
+OPERATIONS = {
+    "Only XML": ("input_process.convert_xml_to_txt", "process_xml_to_txt"),
+    "XML to JSON": ("input_process.xml_to_cleaned_json_txt", "process_xml_to_json_txt"),
+    "XML to ENRICHED XML": ("input_process.xml_to_cleaned_xml_txt", "process_and_clean_xml_to_txt"),
+    "OFFICE File": ("input_process.office_extract", "process_office_to_txt"),
+}
+
+# XML operations are served by input_process.multi_output, which converts an upload
+# into the outputs of related operations in the same pass
+XML_OUTPUTS = {
+    "Only XML": "plain",
+    "XML to JSON": "cleaned_json",
+    "XML to ENRICHED XML": "enriched_xml",
+}
+
+
+def job_id(source_bytes, questions, operation, streaming=False):
+    """Hash of everything that determines a job's results"""
+    digest = hashlib.sha256(source_bytes)
+    payload = json.dumps([[str(q) for q in questions], operation, bool(streaming)], ensure_ascii=False)
+    digest.update(b"\0" + payload.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def read_state(path):
+    try:
+        with open(os.path.join(path, STATE_FILE), "r", encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_state(path, state):
+    state['updated'] = time.time()
+    tmp_path = os.path.join(path, STATE_FILE + ".tmp")
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, STATE_FILE))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _convert(operation, source_path, streaming):
+    import importlib
+
+    if operation in XML_OUTPUTS:
+        from input_process.multi_output import cached_output
+
+        return cached_output(source_path, XML_OUTPUTS[operation], CONVERSIONS_DIR, streaming,
+                             max_bytes=CONVERSIONS_MAX_BYTES)
+    module_name, function_name = OPERATIONS[operation]
+    return getattr(importlib.import_module(module_name), function_name)(source_path, streaming=streaming)
+
+
+def _describe_occurrences(group):
+    first = group[0]
+    text = f"{first.source} {first.start}-{first.end}"
+    return text + f" (+{len(group) - 1} more)" if len(group) > 1 else text
+
+
+def _occurrences(occurrences_by_text, text):
+    try:
+        return occurrences_by_text[text]
+    except KeyError:
+        raise RuntimeError(f"Retrieved extract is not among this job's extracts: {text[:80]!r}") from None
+
+
+def run_job(path):
+    """Run the evaluation pipeline of the job stored in `path`, saving progress as it goes"""
+    from pipeline import instrumentation
+    from pipeline.chunking import chunk_file
+    from pipeline.dedup import dedup_chunks
+    from pipeline.evaluation import BERTSCORE_MODEL, load_scorer, score_responses
+    from pipeline.retrieval import (
+        CHUNKING_OPTIONS, DEDUP_OPTIONS, generate_responses_for_questions, get_score_cache,
+        load_vectordb_for_document, retrieve_for_questions
+    )
+
+    with file_lock(os.path.join(os.path.dirname(path), LOCK_FILE)):
+        state = read_state(path)
+        # The same job may have been queued twice, only the first worker to claim it runs it
+        if state is None or state['status'] in (DONE, RUNNING):
+            return
+        state.update(status=RUNNING, worker_pid=os.getpid(), started=time.time(), error=None)
+        write_state(path, state)
+    run = instrumentation.start_run(state['id'])
+
+    def stage(name, done=0, total=0):
+        state.update(stage=name, progress={'done': done, 'total': total}, metrics=run.report())
+        write_state(path, state)
+
+    try:
+        with open(os.path.join(path, INPUTS_FILE), "r", encoding='utf-8') as f:
+            inputs = json.load(f)
+        source_path = os.path.join(path, inputs['source_file'])
+        with open(source_path, "rb") as f:
+            source_bytes = f.read()
+        questions = inputs['questions']
+        operation = inputs['operation']
+        openai_api_key = os.environ.get("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise RuntimeError("OPENAI_API_KEY is not set")
+
+        stage("Converting")
+        with instrumentation.stage("conversion"):
+            processed_file_path = _convert(operation, source_path, inputs['streaming'])
+        if not processed_file_path:
+            raise RuntimeError(f"Error processing {inputs['source_name']}")
+        state['processed_file_path'] = processed_file_path
+
+        stage("Chunking")
+        with instrumentation.stage("chunking"):
+            chunks = chunk_file(processed_file_path, inputs['source_name'],
+                                elements=operation == "XML to JSON", **CHUNKING_OPTIONS)
+        state['extracts'] = len(chunks)
+
+        # Only one of each group of repeated extracts is embedded and searched, the
+        # occurrences keep every position it stands for
+        stage("Deduplicating")
+        with instrumentation.stage("dedup", items=len(chunks)):
+            unique_chunks, occurrences = dedup_chunks(chunks, **DEDUP_OPTIONS)
+        occurrences_by_text = {chunk.text: group for chunk, group in zip(unique_chunks, occurrences)}
+        state['unique_extracts'] = len(unique_chunks)
+
+        stage("Indexing")
+        vector_db, extracts, _ = load_vectordb_for_document(
+            source_bytes, inputs['source_name'], operation, [chunk.text for chunk in unique_chunks],
+            openai_api_key)
+
+        stage("Retrieving")
+        all_indices, _ = retrieve_for_questions(vector_db, questions, openai_api_key)
+
+        with instrumentation.stage("scorer loading"):
+            scorer = load_scorer(BERTSCORE_MODEL)
+        state['results'] = []
+        for start in range(0, len(questions), QUESTIONS_PER_STEP):
+            stage("Answering and scoring", start, len(questions))
+            step_questions = questions[start:start + QUESTIONS_PER_STEP]
+            step_indices = all_indices[start:start + QUESTIONS_PER_STEP]
+            responses, errors = generate_responses_for_questions(extracts, step_questions, step_indices,
+                                                                 openai_api_key)
+            scores = score_responses(responses, step_questions, scorer, get_score_cache())
+            for question, indices, response, error, score in zip(step_questions, step_indices, responses,
+                                                                  errors, scores):
+                # FAISS pads with -1 when the index holds fewer than k extracts
+                groups = [_occurrences(occurrences_by_text, extracts[idx]) for idx in indices if idx >= 0]
+                state['results'].append({
+                    'question': question,
+                    'response': response,
+                    'errors': error,
+                    'sources': [_describe_occurrences(group) for group in groups],
+                    'scores': score,
+                })
+
+        stage("Finished", len(questions), len(questions))
+        state.update(status=DONE, finished=time.time())
+    except Exception as e:
+        logging.error(traceback.format_exc())
+        state.update(status=FAILED, error=f"{type(e).__name__}: {e}", finished=time.time())
+    finally:
+        instrumentation.end_run()
+    run.write_json(os.path.join(path, REPORT_JSON_FILE))
+    run.write_csv(os.path.join(path, REPORT_CSV_FILE))
+    state['metrics'] = run.report()
+    write_state(path, state)
+
+
+def warm_up():
+    """Import the heavy pipeline modules ahead of the first job"""
+    import importlib
+
+    modules = ["pipeline.retrieval", "pipeline.chunking", "pipeline.evaluation", "bert_score",
+               "input_process.multi_output"]
+    modules += [module_name for module_name, _ in OPERATIONS.values()]
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logging.warning(f"Could not preload {module}: {e}")
+
+
+def _worker(jobs_dir, queue, preload=True):
+    if preload:
+        warm_up()
+    while True:
+        job = queue.get()
+        if job is None:
+            return
+        run_job(os.path.join(jobs_dir, job))
+
+
+class JobRunner:
+    """Run evaluation jobs in background worker processes fed from a queue
+
+    Each job lives in `jobs_dir/<job id>` with its inputs and a state.json that the
+    worker rewrites as the job progresses, so any process can poll it. Submitting
+    the same inputs again returns the existing job while it is queued, running or
+    done.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, workers=2):
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.runner_id = uuid.uuid4().hex
+        os.makedirs(jobs_dir, exist_ok=True)
+        context = multiprocessing.get_context("spawn")
+        self._queue = context.Queue()
+        self._processes = []
+        for _ in range(workers):
+            # Not daemonic, daemonic processes cannot start the process pools that office
+            # extraction fans out over; they are stopped when this process exits instead
+            process = context.Process(target=_worker, args=(jobs_dir, self._queue))
+            process.start()
+            self._processes.append(process)
+        atexit.register(self._terminate)
+
+    def submit(self, source_name, source_bytes, questions, operation, streaming=False, retry=False):
+        """Queue a job for these inputs unless an equivalent one is pending or done"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}")
+        job = job_id(source_bytes, questions, operation, streaming)
+        path = os.path.join(self.jobs_dir, job)
+        # Two sessions submitting the same inputs must not both queue the job
+        with file_lock(os.path.join(self.jobs_dir, LOCK_FILE)):
+            state = read_state(path)
+            if state is not None and not self._needs_restart(state, retry):
+                return job
+            self._create(job, path, source_name, source_bytes, questions, operation, streaming)
+        self._queue.put(job)
+        return job
+
+    def _create(self, job, path, source_name, source_bytes, questions, operation, streaming):
+        os.makedirs(path, exist_ok=True)
+        source_file = "source" + os.path.splitext(os.path.basename(source_name))[1]
+        with open(os.path.join(path, source_file), "wb") as f:
+            f.write(source_bytes)
+        with open(os.path.join(path, INPUTS_FILE), "w", encoding='utf-8') as f:
+            json.dump({
+                'source_name': source_name,
+                'source_file': source_file,
+                'questions': [str(q) for q in questions],
+                'operation': operation,
+                'streaming': bool(streaming),
+            }, f, indent=2)
+        write_state(path, {
+            'id': job,
+            'status': QUEUED,
+            'stage': "Queued",
+            'progress': {'done': 0, 'total': len(questions)},
+            'runner_id': self.runner_id,
+            'source_name': source_name,
+            'operation': operation,
+            'created': time.time(),
+            'results': [],
+        })
+
+    def _needs_restart(self, state, retry):
+        if state['status'] == DONE:
+            return False
+        if state['status'] == FAILED:
+            return retry
+        if state['status'] == RUNNING:
+            return not _pid_alive(state.get('worker_pid', 0))
+        # Queued jobs are lost when the runner that queued them goes away
+        return state.get('runner_id') != self.runner_id
+
+    def status(self, job):
+        return read_state(os.path.join(self.jobs_dir, job))
+
+    def shutdown(self):
+        for _ in self._processes:
+            self._queue.put(None)
+        for process in self._processes:
+            process.join()
+        atexit.unregister(self._terminate)
+
+    def _terminate(self):
+        # Jobs left running are picked up again by the next runner, see _needs_restart
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout=5)
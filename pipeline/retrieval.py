@@ -0,0 +1,174 @@
+import logging
+import os
+
+import numpy as np
+
+from pipeline import instrumentation
+from pipeline.chunking import MAX_CHUNK_TOKENS, OVERLAP_TOKENS
+from pipeline.completion_cache import CompletionCache
+from pipeline.dedup import MAX_HAMMING_DISTANCE
+from pipeline.embedding_cache import EmbeddingCache, cached_embed_texts
+from pipeline.embeddings import OpenAIEmbeddingBackend
+from pipeline.evaluation import ScoreCache
+from pipeline.generation import (
+    CHAT_MODEL, TEMPERATURE, CompletionRequest, OpenAIChatClient,
+    build_messages, run_completions
+)
+from pipeline.index_store import build_id_index, load_or_build_vectordb
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+EMBEDDING_CACHE_DIR = os.path.join(DATA_DIR, ".cache", "embeddings")
+EMBEDDING_CACHE_MAX_BYTES = 2 * 1024 ** 3
+VECTOR_STORE_DIR = os.path.join(DATA_DIR, "index")
+COMPLETION_CACHE_PATH = os.path.join(DATA_DIR, ".cache", "completions.sqlite")
+COMPLETION_CACHE_TTL = 30 * 24 * 3600
+COMPLETION_CACHE_MAX_BYTES = 512 * 1024 ** 2
+SCORE_CACHE_PATH = os.path.join(DATA_DIR, ".cache", "scores.sqlite")
+
+# flat, ivf_flat, hnsw or ivf_pq over l2, ip or cosine distance, see pipeline.ann_index
+VECTOR_INDEX_OPTIONS = {
+    "kind": os.environ.get("VECTOR_INDEX_KIND", "flat"),
+    "metric": os.environ.get("VECTOR_INDEX_METRIC", "l2"),
+}
+
+# Token budget of each extract and the context repeated between neighbouring extracts
+CHUNKING_OPTIONS = {
+    "max_tokens": int(os.environ.get("CHUNK_MAX_TOKENS", MAX_CHUNK_TOKENS)),
+    "overlap_tokens": int(os.environ.get("CHUNK_OVERLAP_TOKENS", OVERLAP_TOKENS)),
+}
+
+# Extracts whose SimHash fingerprints are this many bits apart or closer are indexed
+# once, see pipeline.dedup; 0 collapses exact duplicates only
+DEDUP_OPTIONS = {
+    "max_distance": int(os.environ.get("DEDUP_MAX_DISTANCE", MAX_HAMMING_DISTANCE)),
+}
+
+# Concurrency cap and client-side rate limits for chat completions
+GENERATION_LIMITS = {
+    "max_concurrency": int(os.environ.get("OPENAI_MAX_CONCURRENCY", 16)),
+    "requests_per_minute": int(os.environ.get("OPENAI_RPM_LIMIT", 3500)),
+    "tokens_per_minute": int(os.environ.get("OPENAI_TPM_LIMIT", 90000)),
+}
+
+# Shared by everything running in this process
+_embedding_cache = None
+_completion_cache = None
+_score_cache = None
+
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, max_bytes=EMBEDDING_CACHE_MAX_BYTES)
+    return _embedding_cache
+
+
+def get_completion_cache():
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = CompletionCache(COMPLETION_CACHE_PATH, ttl_seconds=COMPLETION_CACHE_TTL,
+                                            max_bytes=COMPLETION_CACHE_MAX_BYTES)
+    return _completion_cache
+
+
+def get_score_cache():
+    global _score_cache
+    if _score_cache is None:
+        _score_cache = ScoreCache(SCORE_CACHE_PATH)
+    return _score_cache
+
+
+def embed_with_cache(texts, openai_api_key):
+    """Embed texts through the on-disk cache shared by every job worker"""
+    backend = OpenAIEmbeddingBackend(openai_api_key)
+    with instrumentation.stage("embedding", items=len(texts)):
+        cache = get_embedding_cache()
+        hits, misses = cache.hits, cache.misses
+        embeddings = cached_embed_texts(texts, backend, cache)
+        instrumentation.add_cache("embeddings", cache.hits - hits, cache.misses - misses)
+        return embeddings
+
+
+def create_vectordb(extracts, openai_api_key):
+    # Embed the extracts in batched requests, skipping those already cached
+    embeddings_array = embed_with_cache(extracts, openai_api_key)
+
+    # Create the FAISS index
+    index = build_id_index(embeddings_array, index_options=VECTOR_INDEX_OPTIONS)
+
+    return index, embeddings_array
+
+
+def load_vectordb_for_document(source_bytes, source_name, operation, extracts, openai_api_key):
+    """Reuse the saved index for this document and mode, building or patching it if needed"""
+    def embed_fn(texts):
+        return embed_with_cache(texts, openai_api_key)
+
+    with instrumentation.stage("indexing", items=len(extracts)):
+        return load_or_build_vectordb(VECTOR_STORE_DIR, source_bytes, source_name,
+                                      operation, extracts, embed_fn, VECTOR_INDEX_OPTIONS)
+
+
+def query_vectordb(vector_db, question_embedding, k=5):
+    indices, _ = query_vectordb_batch(vector_db, [question_embedding], k)
+    return indices[0]
+
+
+def query_vectordb_batch(vector_db, question_embeddings, k=5):
+    """Search all questions in one call, returning (n_questions, k) indices and distances"""
+    question_embeddings = np.ascontiguousarray(question_embeddings, dtype='float32')
+    question_embeddings = question_embeddings.reshape(len(question_embeddings), -1)
+    with instrumentation.stage("search", items=len(question_embeddings)):
+        distances, indices = vector_db.search(question_embeddings, k)  # Get top k relevant extracts
+    return indices, distances
+
+
+def retrieve_for_questions(vector_db, questions, openai_api_key, k=5):
+    """Embed every question in batched requests and search them with a single matrix query"""
+    question_embeddings = embed_with_cache([str(q) for q in questions], openai_api_key)
+    return query_vectordb_batch(vector_db, question_embeddings, k)
+
+
+def generate_responses_for_questions(extracts, questions, all_indices, openai_api_key):
+    """Answer every question from each of its retrieved extracts with concurrent completions
+
+    Returns (responses, errors): the answers and the error messages of each question.
+    """
+    requests = []
+    owners = []
+    for i, (question, indices) in enumerate(zip(questions, all_indices)):
+        for idx in indices:
+            # FAISS pads with -1 when the index holds fewer than k extracts
+            if idx < 0:
+                continue
+            messages = build_messages(extracts[idx], str(question))
+            requests.append(CompletionRequest(messages, CHAT_MODEL, TEMPERATURE))
+            owners.append(i)
+
+    cache = get_completion_cache()
+    hits, misses = cache.hits, cache.misses
+    with instrumentation.stage("generation", items=len(requests)):
+        results = run_completions(requests, OpenAIChatClient(openai_api_key), cache=cache, **GENERATION_LIMITS)
+    instrumentation.add_cache("completions", cache.hits - hits, cache.misses - misses)
+    logging.info(f"Completion cache: {cache.hits - hits} hits, {cache.misses - misses} misses")
+
+    combined_responses = [[] for _ in questions]
+    errors = [[] for _ in questions]
+    for i, result in zip(owners, results):
+        if isinstance(result, Exception):
+            errors[i].append(f"An error occurred: {result}")
+        else:
+            combined_responses[i].append(result.strip())
+    return combined_responses, errors
+
+
+def generate_initial_responses(vector_db, embeddings, extracts, question, openai_api_key, indices=None):
+    if indices is None:
+        # Generate embedding for the question
+        question_embedding = embed_with_cache([question], openai_api_key)[0]
+
+        # Query the vector database for relevant extracts
+        indices = query_vectordb(vector_db, question_embedding)
+
+    responses, _ = generate_responses_for_questions(extracts, [question], [indices], openai_api_key)
+    return responses[0]
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Fake AWS credentials and region with every call served by moto"""
+    moto = pytest.importorskip("moto")
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_SESSION_TOKEN", "testing"), ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        yield
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from pipeline.ann_index import INDEX_KINDS, build_index
+from pipeline.index_store import build_id_index, update_vectordb
+
+ROWS = 1200
+DIMENSION = 32
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+def test_search_after_update_returns_stored_ids(kind, metric):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((ROWS, DIMENSION)).astype('float32')
+    extracts = [f"extract {i}" for i in range(ROWS)]
+    options = {"kind": kind, "metric": metric, "pq_m": 16}
+    index = build_id_index(embeddings, index_options=options)
+
+    added = rng.standard_normal((2, DIMENSION)).astype('float32')
+    index, extracts, embeddings = update_vectordb(index, extracts, embeddings, extracts[100:] + ["new 1", "new 2"],
+                                                  lambda texts: added, options)
+
+    live = [row for row, text in enumerate(extracts) if text is not None]
+    _, found = index.search(np.ascontiguousarray(embeddings[live]), 5)
+    assert not set(found.ravel().tolist()) & set(range(100))
+    hits = sum(row in neighbours for row, neighbours in zip(live, found.tolist()))
+    assert hits >= 0.95 * len(live)
+    assert extracts[found[-1][0]] == "new 2"
+
+
+def test_unknown_index_kind_is_rejected():
+    with pytest.raises(ValueError):
+        build_index(np.zeros((10, 4), dtype='float32'), kind="ivf-flat")
@@ -0,0 +1,64 @@
+import pytest
+
+from pipeline import backoff
+from pipeline.backoff import backoff_delay, retry_call, retry_call_async
+
+
+class Throttled(Exception):
+    pass
+
+
+def failing(times, error=Throttled):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= times:
+            raise error("try again")
+        return len(calls)
+    return call, calls
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(backoff.time, "sleep", slept.append)
+    return slept
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(1, 12):
+        assert 0 <= backoff_delay(attempt, 0.5, 4.0) <= min(4.0, 0.5 * 2 ** (attempt - 1))
+
+
+def test_retry_call_retries_until_success(no_sleep):
+    call, calls = failing(3)
+    assert retry_call(call, lambda e: isinstance(e, Throttled), 5, 0.1, 1.0) == 4
+    assert len(no_sleep) == 3
+
+
+def test_retry_call_raises_after_max_retries(no_sleep):
+    call, calls = failing(10)
+    with pytest.raises(Throttled):
+        retry_call(call, lambda e: isinstance(e, Throttled), 2, 0.1, 1.0)
+    assert len(calls) == 3
+
+
+def test_retry_call_does_not_retry_other_errors(no_sleep):
+    call, calls = failing(1, ValueError)
+    with pytest.raises(ValueError):
+        retry_call(call, lambda e: isinstance(e, Throttled), 5, 0.1, 1.0)
+    assert len(calls) == 1 and no_sleep == []
+
+
+def test_retry_call_async_retries(monkeypatch):
+    import asyncio
+
+    async def no_wait(delay):
+        pass
+    monkeypatch.setattr(backoff.asyncio, "sleep", no_wait)
+    call, calls = failing(2)
+
+    async def call_async():
+        return call()
+    assert asyncio.run(retry_call_async(call_async, lambda e: isinstance(e, Throttled), 3, 0.1, 1.0)) == 3
@@ -0,0 +1,16 @@
+import contextlib
+import io
+
+from input_process.batch import find_inputs
+from input_process.convert_xml_to_txt import process_xml_to_txt
+
+
+def test_find_inputs_keeps_exports_in_data_folders_and_skips_outputs(tmp_path):
+    export = tmp_path / "data" / "parts.xml"
+    export.parent.mkdir()
+    export.write_text("<catalog><part>Washer</part></catalog>", encoding='utf-8')
+    # Converting it leaves its output in data/data/
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert process_xml_to_txt(str(export))
+
+    assert find_inputs(str(tmp_path)) == [str(export)]
@@ -0,0 +1,96 @@
+import pytest
+
+from pipeline import chunking
+from pipeline.chunking import chunk_elements, chunk_lines, chunk_units, is_structural
+from pipeline.embeddings import count_tokens
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count one token per word, so budgets do not depend on the encoding"""
+    monkeypatch.setattr(chunking, "count_tokens", lambda text: len(text.split()))
+
+
+def _units(lines):
+    return [(line, number, None) for number, line in enumerate(lines, 1)]
+
+
+def test_chunks_overlap_by_the_trailing_units(word_tokens):
+    lines = [f"line {i} text" for i in range(1, 6)]
+
+    chunks = list(chunk_units(_units(lines), "doc.txt", max_tokens=10, overlap_tokens=4))
+
+    # Three words and a newline per line: two lines fit, the second is repeated
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(1, 2), (2, 3), (3, 4), (4, 5)]
+    assert chunks[0].text == "line 1 text\nline 2 text"
+    assert all(chunk.source == "doc.txt" for chunk in chunks)
+
+
+def test_chunks_without_overlap(word_tokens):
+    lines = [f"line {i} text" for i in range(1, 6)]
+
+    chunks = list(chunk_units(_units(lines), max_tokens=10, overlap_tokens=0))
+
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(1, 2), (3, 4), (5, 5)]
+
+
+def test_oversized_unit_is_split_into_overlapping_word_windows(word_tokens):
+    words = [f"w{i}" for i in range(25)]
+
+    chunks = list(chunk_units([(" ".join(words), 7, None)], max_tokens=10, overlap_tokens=3))
+
+    assert [chunk.text.split() for chunk in chunks] == [words[0:10], words[7:17], words[14:24], words[21:25]]
+    assert all((chunk.start, chunk.end) == (7, 7) for chunk in chunks)
+
+
+def test_chunks_stay_within_the_token_budget():
+    lines = [" ".join(f"word{i}-{j}" for j in range(i % 7 + 1)) for i in range(200)]
+
+    chunks = chunk_lines(lines, max_tokens=64, overlap_tokens=8)
+
+    for chunk in chunks:
+        assert sum(count_tokens(unit) + 1 for unit in chunk.text.split("\n")) <= 64
+    covered = {word for chunk in chunks for word in chunk.text.split()}
+    assert covered == {word for line in lines for word in line.split()}
+
+
+@pytest.mark.parametrize("line", [
+    "", "   \n", '<?xml version="1.0" ?>', "<catalog>", "</p:part>", "<br/>", "{", "],",
+    '"metadata": {', '  "items": [',
+])
+def test_structural_lines(line):
+    assert is_structural(line)
+
+
+@pytest.mark.parametrize("line", [
+    "<name>Washer</name>", '"text": "Schraube M6",', "Plain text", "<n>7</n>",
+])
+def test_content_lines(line):
+    assert not is_structural(line)
+
+
+def test_chunk_lines_drops_structural_lines_and_keeps_line_numbers(word_tokens):
+    lines = ['<?xml version="1.0" ?>', "<catalog>", "  <name>Washer</name>", "", "  <name>Nut</name>", "</catalog>"]
+
+    chunks = chunk_lines(lines)
+
+    assert len(chunks) == 1
+    assert chunks[0].text == "<name>Washer</name>\n<name>Nut</name>"
+    assert (chunks[0].start, chunks[0].end) == (3, 5)
+
+
+def test_chunk_elements_keeps_positions_and_metadata(word_tokens):
+    elements = [
+        {"type": "Title", "element_id": "e1", "text": "Catalog"},
+        {"type": "Text", "text": "   "},
+        "not an element",
+        {"type": "NarrativeText", "element_id": "e4", "text": "Washers and nuts"},
+    ]
+
+    chunks = chunk_elements(elements, "doc.json")
+
+    assert len(chunks) == 1
+    assert chunks[0].text == "Catalog\nWashers and nuts"
+    assert (chunks[0].start, chunks[0].end) == (0, 3)
+    assert chunks[0].metadata == [{"type": "Title", "element_id": "e1"},
+                                  {"type": "NarrativeText", "element_id": "e4"}]
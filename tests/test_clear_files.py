@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+
+from awsutils.fakes import FakePineconeIndex
+
+BUCKET = "processed"
+
+
+@pytest.fixture
+def clear_files(aws):
+    from awsutils import clear_files
+
+    return clear_files
+
+
+def _fill_bucket(client, count, prefix):
+    for i in range(count):
+        client.put_object(Bucket=BUCKET, Key=f"{prefix}{i:05d}.txt", Body=b"x")
+
+
+def _keys(client):
+    paginator = client.get_paginator('list_objects_v2')
+    return [obj['Key'] for page in paginator.paginate(Bucket=BUCKET) for obj in page.get('Contents', [])]
+
+
+def test_clear_s3_bucket_deletes_every_page(clear_files):
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    # More than one listing page and one delete_objects batch
+    _fill_bucket(client, 2100, "processed/")
+    progress = []
+
+    assert clear_files.clear_s3_bucket(BUCKET, client=client, max_workers=2,
+                                       progress=lambda deleted, failed, elapsed: progress.append(deleted))
+    assert _keys(client) == []
+    assert progress[-1] == 2100
+
+
+def test_clear_s3_bucket_only_touches_the_prefix(clear_files):
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    _fill_bucket(client, 5, "old/")
+    _fill_bucket(client, 3, "keep/")
+
+    assert clear_files.clear_s3_bucket(BUCKET, prefix="old/", client=client)
+    assert sorted(_keys(client)) == [f"keep/{i:05d}.txt" for i in range(3)]
+
+
+def _fill_index(index, namespaces, count):
+    for namespace in namespaces:
+        index.upsert([(f"{namespace}-{i:05d}", [0.0] * index.dimension) for i in range(count)], namespace=namespace)
+
+
+@pytest.mark.parametrize("supports_delete_all, supports_list, method", [
+    (True, True, "delete_all"),
+    (False, True, "list"),
+    (False, False, "query"),
+])
+def test_clear_pinecone_namespace_falls_back(clear_files, supports_delete_all, supports_list, method):
+    index = FakePineconeIndex(supports_delete_all=supports_delete_all, supports_list=supports_list)
+    _fill_index(index, ["a"], 2500)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert clear_files.clear_pinecone_namespace(index, "a", index.dimension, executor) == method
+    assert index.describe_index_stats()['total_vector_count'] == 0
+
+
+def test_clear_pinecone_index_clears_only_the_given_namespaces(clear_files):
+    index = FakePineconeIndex(supports_delete_all=False)
+    _fill_index(index, ["a", "b", "c"], 1200)
+
+    assert clear_files.clear_pinecone_index("test", namespaces=["a", "b"], index=index, verify_timeout=1)
+    assert {name: ns['vector_count'] for name, ns in index.describe_index_stats()['namespaces'].items()} == {"c": 1200}
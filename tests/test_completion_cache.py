@@ -0,0 +1,91 @@
+import pytest
+
+from pipeline import completion_cache
+from pipeline.completion_cache import CompletionCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(completion_cache.time, "time", clock)
+    return clock
+
+
+def _messages(i):
+    return [{"role": "user", "content": f"question {i}"}]
+
+
+def _put(cache, clock, i, response="answer"):
+    # One tick per entry, so they were last used in order
+    clock.now += 1
+    cache.put("model", 0, _messages(i), response)
+
+
+def _cached(cache, count):
+    return [i for i in range(count) if cache.get("model", 0, _messages(i)) is not None]
+
+
+def test_expired_entries_are_misses_and_deleted(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"), ttl_seconds=60)
+    cache.put("model", 0, _messages(0), "answer")
+
+    clock.now += 60
+    assert cache.get("model", 0, _messages(0)) == "answer"
+    clock.now += 1
+    assert cache.get("model", 0, _messages(0)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache._totals() == (0, 0)
+
+    # Putting it again starts a new lifetime
+    cache.put("model", 0, _messages(0), "fresh")
+    assert cache.get("model", 0, _messages(0)) == "fresh"
+    cache.close()
+
+
+def test_eviction_trims_to_nine_tenths_of_max_entries(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"), max_entries=10)
+    for i in range(10):
+        _put(cache, clock, i)
+    # A hit makes the oldest entry the most recently used
+    clock.now += 1
+    assert cache.get("model", 0, _messages(0)) == "answer"
+
+    _put(cache, clock, 10)
+
+    assert cache._totals()[0] == 9
+    assert _cached(cache, 11) == [0, 3, 4, 5, 6, 7, 8, 9, 10]
+    cache.close()
+
+
+def test_eviction_trims_to_nine_tenths_of_max_bytes(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"), max_bytes=1000)
+    for i in range(10):
+        _put(cache, clock, i, "x" * 100)
+
+    _put(cache, clock, 10, "y" * 150)
+
+    entries, size = cache._totals()
+    assert size <= 900 and (entries, size) == (8, 850)
+    assert _cached(cache, 11) == [3, 4, 5, 6, 7, 8, 9, 10]
+    cache.close()
+
+
+def test_totals_survive_reopening(tmp_path, clock):
+    path = str(tmp_path / "completions.sqlite")
+    cache = CompletionCache(path)
+    for i in range(3):
+        _put(cache, clock, i, "abc")
+    cache.put("model", 0, _messages(0), "abcdef")
+    cache.close()
+
+    reopened = CompletionCache(path)
+    assert reopened._totals() == (3, 12)
+    reopened.close()
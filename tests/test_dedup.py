@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from pipeline import dedup
+from pipeline.chunking import Chunk
+from pipeline.dedup import MAX_HAMMING_DISTANCE, dedup_chunks, dedup_texts, hamming_distance, simhash
+
+BASE = 0x0123456789ABCDEF
+
+
+def _flip(fingerprint, bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+@pytest.fixture
+def fingerprints(monkeypatch):
+    """Fingerprint texts from a table filled by the test instead of by their SimHash"""
+    table = {}
+
+    def fake_simhash(text):
+        return table[text]
+
+    monkeypatch.setattr(dedup, "simhash", fake_simhash)
+    return table
+
+
+def test_exact_duplicates_collapse_after_normalization():
+    texts = ["Washer M6", "Nut M6", "  Washer\nM6 ", "Washer M6"]
+
+    kept, groups = dedup_texts(texts, max_distance=0)
+
+    assert kept == [0, 1]
+    assert groups == [[0, 2, 3], [1]]
+
+
+@pytest.mark.parametrize("distance", range(MAX_HAMMING_DISTANCE + 3))
+def test_near_duplicates_collapse_up_to_the_max_distance(fingerprints, distance):
+    # Flip bits spread over different bands, the hardest case for the banding
+    fingerprints["original"] = BASE
+    fingerprints["edited"] = _flip(BASE, [1 + 17 * i for i in range(distance)])
+    assert hamming_distance(fingerprints["original"], fingerprints["edited"]) == distance
+
+    kept, groups = dedup_texts(["original", "edited"])
+
+    if distance <= MAX_HAMMING_DISTANCE:
+        assert (kept, groups) == ([0], [[0, 1]])
+    else:
+        assert (kept, groups) == ([0, 1], [[0], [1]])
+
+
+def test_banding_finds_every_near_duplicate(fingerprints):
+    rng = random.Random(7)
+    texts = []
+    for i in range(300):
+        source = rng.choice(texts) if texts and rng.random() < 0.5 else None
+        if source is None:
+            fingerprint = rng.getrandbits(64)
+        else:
+            fingerprint = _flip(fingerprints[source], rng.sample(range(64), rng.randint(1, 5)))
+        texts.append(f"text {i}")
+        fingerprints[texts[-1]] = fingerprint
+
+    kept, groups = dedup_texts(texts)
+
+    # Each text joins the first kept text within range, as a pairwise comparison finds it
+    expected = []
+    for position, text in enumerate(texts):
+        for group in expected:
+            if hamming_distance(fingerprints[text], fingerprints[texts[group[0]]]) <= MAX_HAMMING_DISTANCE:
+                group.append(position)
+                break
+        else:
+            expected.append([position])
+    assert groups == expected
+    assert kept == [group[0] for group in expected]
+
+
+def test_simhash_keeps_similar_texts_close():
+    text = " ".join(f"part{i} washer zinc plated" for i in range(60))
+    edited = text.replace("part30 ", "part30b ")
+    other = " ".join(f"bolt{i} steel hex head" for i in range(60))
+
+    assert hamming_distance(simhash(text), simhash(edited)) < hamming_distance(simhash(text), simhash(other))
+    assert simhash(text) == simhash(" " + text.upper() + "\n")
+
+
+def test_dedup_chunks_keeps_every_occurrence():
+    chunks = [Chunk("Washer M6", "a.xml", 1, 2, []), Chunk("Nut", "a.xml", 3, 3, []),
+              Chunk("Washer\tM6", "b.xml", 7, 8, [])]
+
+    unique, occurrences = dedup_chunks(chunks, max_distance=0)
+
+    assert unique == chunks[:2]
+    assert occurrences == [[chunks[0], chunks[2]], [chunks[1]]]
@@ -0,0 +1,138 @@
+import fcntl
+
+import numpy as np
+
+from pipeline.embedding_cache import INITIAL_CAPACITY, EmbeddingCache, cached_embed_texts
+from pipeline.embeddings import StubEmbeddingBackend
+
+MODEL = "stub-model"
+
+
+def _vectors(texts, dimension=4):
+    return np.array([[len(text), i, 0, 1] for i, text in enumerate(texts)], dtype='float32')[:, :dimension]
+
+
+def _fill(cache, texts):
+    # One put per text, so they were last used in order
+    for text in texts:
+        cache.put_many(MODEL, [text], _vectors([text]))
+
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=4)
+    cache.put_many(MODEL, ["a b", "c"], _vectors(["a b", "c"]))
+
+    vectors, missing = cache.get_many(MODEL, ["c", "x", " a  b\n"])
+
+    assert missing == [1]
+    np.testing.assert_array_equal(vectors[[0, 2]], _vectors(["a b", "c"])[::-1])
+    assert not vectors[1].any()
+    assert (cache.hits, cache.misses) == (2, 1)
+    # Entries belong to the model that embedded them
+    assert cache.get_many("other-model", ["c"])[1] == [0]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=4, max_entries=3)
+    _fill(cache, ["a", "b", "c"])
+    cache.get_many(MODEL, ["a"])
+    cache.put_many(MODEL, ["b"], _vectors(["b"]))
+
+    _fill(cache, ["d", "e"])
+
+    _, missing = cache.get_many(MODEL, ["a", "b", "c", "d", "e"])
+    assert missing == [0, 2]
+    assert len(cache) == 3
+
+
+def test_reopens_from_disk(tmp_path):
+    texts = [f"text {i}" for i in range(INITIAL_CAPACITY + 10)]
+    vectors = np.arange(len(texts) * 4, dtype='float32').reshape(-1, 4)
+    cache = EmbeddingCache(str(tmp_path), dimension=4)
+    cache.put_many(MODEL, texts, vectors)
+    cache.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), dimension=4)
+    found, missing = reopened.get_many(MODEL, texts)
+
+    assert missing == []
+    assert len(reopened) == len(texts)
+    np.testing.assert_array_equal(found, vectors)
+
+
+def test_dimension_mismatch_starts_empty(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=4)
+    cache.put_many(MODEL, ["a"], _vectors(["a"]))
+    cache.flush()
+
+    wider = EmbeddingCache(str(tmp_path), dimension=8)
+    assert len(wider) == 0
+    assert wider.get_many(MODEL, ["a"])[1] == [0]
+    wider.put_many(MODEL, ["a"], np.ones((1, 8), dtype='float32'))
+    wider.flush()
+
+    found, missing = EmbeddingCache(str(tmp_path), dimension=8).get_many(MODEL, ["a"])
+    assert missing == []
+    np.testing.assert_array_equal(found, np.ones((1, 8)))
+
+
+def test_hit_survives_reload_before_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=4, max_entries=5)
+    texts = ["a", "b", "c", "d", "e"]
+    _fill(cache, texts)
+    cache.flush()
+
+    _, missing = cache.get_many(MODEL, ["a"])
+    assert missing == []
+    # Another process's entries are picked up before writing, the hit on "a" must survive it
+    cache.reload()
+    cache.put_many(MODEL, ["f"], _vectors(["f"]))
+
+    _, missing = cache.get_many(MODEL, texts)
+    assert [texts[i] for i in missing] == ["b"]
+
+
+def test_shared_use_persists_hits_for_other_processes(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=4, max_entries=5)
+    texts = ["a", "b", "c", "d", "e"]
+    with cache.shared():
+        _fill(cache, texts)
+    with cache.shared():
+        cache.get_many(MODEL, ["a"])
+
+    other = EmbeddingCache(str(tmp_path), dimension=4, max_entries=5)
+    with other.shared():
+        other.put_many(MODEL, ["f"], _vectors(["f"]))
+        _, missing = other.get_many(MODEL, texts)
+    assert [texts[i] for i in missing] == ["b"]
+
+
+class LockProbingBackend(StubEmbeddingBackend):
+    """Records whether the cache directory was locked while texts were embedded"""
+
+    def __init__(self, lock_path, **kwargs):
+        super().__init__(**kwargs)
+        self.lock_path = lock_path
+        self.locked = []
+
+    def embed(self, texts):
+        with open(self.lock_path, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(f, fcntl.LOCK_UN)
+                self.locked.append(False)
+            except BlockingIOError:
+                self.locked.append(True)
+        return super().embed(texts)
+
+
+def test_cached_embed_texts_embeds_outside_the_lock(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimension=8)
+    backend = LockProbingBackend(str(tmp_path / ".lock"), dimension=8)
+
+    first = cached_embed_texts(["a", "b"], backend, cache)
+    again = cached_embed_texts(["b", "a", "c"], backend, cache)
+
+    assert backend.locked == [False, False]
+    assert backend.inputs == 3
+    np.testing.assert_array_equal(again[:2], first[::-1])
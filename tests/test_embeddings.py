@@ -0,0 +1,43 @@
+import logging
+
+import numpy as np
+
+from pipeline import backoff, embeddings
+from pipeline.embeddings import StubEmbeddingBackend, count_tokens, embed_texts
+
+
+def test_embed_texts_batches_and_keeps_order():
+    backend = StubEmbeddingBackend(dimension=8)
+    texts = [f"extract {i}" for i in range(50)]
+
+    embeddings = embed_texts(texts, backend, max_inputs=8, max_workers=4)
+
+    assert embeddings.shape == (50, 8)
+    assert backend.calls == 7 and backend.inputs == 50
+    np.testing.assert_allclose(embeddings, np.asarray(StubEmbeddingBackend(dimension=8).embed(texts)))
+
+
+def test_embed_texts_retries_rate_limited_batches(monkeypatch):
+    monkeypatch.setattr(backoff.time, "sleep", lambda delay: None)
+    backend = StubEmbeddingBackend(dimension=8, rate_limit_every=3)
+    texts = [f"extract {i}" for i in range(40)]
+
+    embeddings = embed_texts(texts, backend, max_inputs=5, max_workers=1)
+
+    # Every third request fails once and is sent again
+    assert backend.inputs == 40 and backend.calls > 8
+    np.testing.assert_allclose(embeddings, np.asarray(StubEmbeddingBackend(dimension=8).embed(texts)))
+
+
+def test_count_tokens_estimates_when_the_encoding_cannot_be_loaded(monkeypatch, caplog):
+    def offline(name):
+        raise ConnectionError("BPE ranks not cached and no network")
+
+    monkeypatch.setattr(embeddings.tiktoken, "get_encoding", offline)
+    embeddings._get_encoding.cache_clear()
+    try:
+        with caplog.at_level(logging.WARNING):
+            assert count_tokens("x" * 40) == 11
+        assert "estimating token counts" in caplog.text
+    finally:
+        embeddings._get_encoding.cache_clear()
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from pipeline import backoff
+from pipeline.completion_cache import CompletionCache
+from pipeline.generation import CompletionRequest, run_completions
+
+
+class Throttled(Exception):
+    pass
+
+
+class StubChatClient:
+    """Records how many calls overlap and fails the first `throttle` calls of each prompt"""
+
+    retryable_errors = (Throttled,)
+
+    def __init__(self, latency=0.01, throttle=0, fail=()):
+        self.latency = latency
+        self.throttle = throttle
+        self.fail = set(fail)
+        self.calls = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def complete(self, messages, model, temperature):
+        prompt = messages[-1]['content']
+        self.calls[prompt] = self.calls.get(prompt, 0) + 1
+        if prompt in self.fail:
+            raise ValueError(f"bad request {prompt}")
+        if self.calls[prompt] <= self.throttle:
+            raise Throttled("rate limited")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return f"answer {prompt}"
+
+
+def requests(count):
+    return [CompletionRequest([{"role": "user", "content": str(i)}], "model", 0.2) for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(backoff, "backoff_delay", lambda attempt, base_delay, max_delay: 0)
+
+
+def test_completions_run_concurrently_in_request_order():
+    client = StubChatClient()
+    results = run_completions(requests(30), client, max_concurrency=4)
+    assert results == [f"answer {i}" for i in range(30)]
+    assert client.peak_in_flight == 4
+
+
+def test_throttled_completions_are_retried():
+    client = StubChatClient(throttle=2)
+    results = run_completions(requests(5), client, max_retries=3)
+    assert results == [f"answer {i}" for i in range(5)]
+    assert all(calls == 3 for calls in client.calls.values())
+
+
+def test_failures_come_back_in_place_of_responses():
+    client = StubChatClient(throttle=5, fail={"1"})
+    results = run_completions(requests(3), client, max_retries=2)
+    assert isinstance(results[1], ValueError) and client.calls["1"] == 1
+    assert isinstance(results[0], Throttled) and client.calls["0"] == 3
+
+
+def test_cached_completions_skip_the_client(tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"))
+    run_completions(requests(3), StubChatClient(), cache=cache)
+    client = StubChatClient()
+    assert run_completions(requests(4), client, cache=cache) == [f"answer {i}" for i in range(4)]
+    assert client.calls == {"3": 1}
+    cache.close()
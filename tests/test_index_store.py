@@ -0,0 +1,58 @@
+import fcntl
+
+import numpy as np
+
+from pipeline.embeddings import StubEmbeddingBackend
+from pipeline.index_store import load_or_build_vectordb, store_path
+
+
+def test_rechunked_document_does_not_reuse_stored_extracts(tmp_path):
+    backend = StubEmbeddingBackend(dimension=16)
+    embedded = []
+
+    def embed_fn(texts):
+        embedded.extend(texts)
+        return np.asarray(backend.embed(texts), dtype='float32')
+
+    source = b"<catalog/>"
+    first = ["a b", "c d", "e f"]
+    load_or_build_vectordb(str(tmp_path), source, "c.xml", "Only XML", first, embed_fn)
+    rechunked = ["a b c d", "e f"]
+    _, extracts, _ = load_or_build_vectordb(str(tmp_path), source, "c.xml", "Only XML", rechunked, embed_fn)
+
+    assert sorted(text for text in extracts if text is not None) == sorted(rechunked)
+    # The unchanged extract is patched in place rather than embedded again
+    assert embedded == first + ["a b c d"]
+
+    embedded.clear()
+    _, extracts, _ = load_or_build_vectordb(str(tmp_path), source, "c.xml", "Only XML", first, embed_fn)
+    assert extracts == first
+    assert embedded == []
+
+
+
+def _locked(path):
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+
+def test_building_a_store_locks_only_that_store(tmp_path):
+    backend = StubEmbeddingBackend(dimension=16)
+    root = str(tmp_path)
+    own = store_path(root, b"<a/>", "Only XML", extracts=["x y"]) + ".lock"
+    other = store_path(root, b"<b/>", "Only XML", extracts=["z"]) + ".lock"
+    probes = []
+
+    def embed_fn(texts):
+        probes.append((_locked(own), _locked(other)))
+        return np.asarray(backend.embed(texts), dtype='float32')
+
+    load_or_build_vectordb(root, b"<a/>", "a.xml", "Only XML", ["x y"], embed_fn)
+
+    # Builds of the same store wait for this one, builds of other stores do not
+    assert probes == [(True, False)]
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pipeline import evaluation, jobs, retrieval
+from pipeline.embeddings import StubEmbeddingBackend
+from pipeline.generation import FakeChatClient
+from pipeline.jobs import DONE, FAILED, LOCK_FILE, QUEUED, RUNNING, JobRunner, read_state, run_job
+from pipeline.locks import file_lock
+
+CATALOG = "<catalog>\n" + "".join(
+    f"  <part id=\"{i}\"><name>Part {i}</name><note>Zinc plated washer number {i}</note></part>\n"
+    for i in range(30)
+) + "</catalog>\n"
+QUESTIONS = [f"What is part {i}?" for i in range(25)]
+
+
+class FakeScorer:
+    model_type = "fake"
+    num_layers = 1
+    idf = False
+    rescale_with_baseline = False
+
+    def score(self, candidates, references):
+        scores = np.full(len(candidates), 0.5)
+        return scores, scores, scores
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Run jobs against the stub embedding backend, the fake chat client and caches under tmp_path"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(retrieval, "OpenAIEmbeddingBackend", lambda key: StubEmbeddingBackend())
+    monkeypatch.setattr(retrieval, "OpenAIChatClient", lambda key: FakeChatClient(latency=0))
+    monkeypatch.setattr(retrieval, "EMBEDDING_CACHE_DIR", str(tmp_path / "cache" / "embeddings"))
+    monkeypatch.setattr(retrieval, "VECTOR_STORE_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(retrieval, "COMPLETION_CACHE_PATH", str(tmp_path / "cache" / "completions.sqlite"))
+    monkeypatch.setattr(retrieval, "SCORE_CACHE_PATH", str(tmp_path / "cache" / "scores.sqlite"))
+    for name in ("_embedding_cache", "_completion_cache", "_score_cache"):
+        monkeypatch.setattr(retrieval, name, None)
+    monkeypatch.setattr(evaluation, "load_scorer", lambda *args, **kwargs: FakeScorer())
+    monkeypatch.setattr(jobs, "CONVERSIONS_DIR", str(tmp_path / "conversions"))
+    yield
+    for cache in (retrieval._completion_cache, retrieval._score_cache):
+        if cache is not None:
+            cache.close()
+
+
+@pytest.fixture
+def runner(tmp_path):
+    # No workers, the tests run the queued jobs themselves
+    runner = JobRunner(str(tmp_path / "jobs"), workers=0)
+    yield runner
+    runner.shutdown()
+
+
+@pytest.fixture
+def transitions(monkeypatch):
+    """Every (status, stage) written to a job's state file, in order"""
+    written = []
+    write_state = jobs.write_state
+
+    def recording(path, state):
+        written.append((state['status'], state.get('stage')))
+        write_state(path, state)
+
+    monkeypatch.setattr(jobs, "write_state", recording)
+    return written
+
+
+def test_run_job_answers_every_question(offline, runner, transitions):
+    job = runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML")
+    path = os.path.join(runner.jobs_dir, job)
+
+    run_job(path)
+
+    state = runner.status(job)
+    assert state['status'] == DONE and state['error'] is None
+    assert state['worker_pid'] == os.getpid()
+    assert [result['question'] for result in state['results']] == QUESTIONS
+    assert all(result['response'] and result['scores'] == [0.5, 0.5, 0.5] for result in state['results'])
+    assert all(source.startswith("catalog.xml ") for result in state['results'] for source in result['sources'])
+    assert os.path.exists(os.path.join(path, jobs.REPORT_JSON_FILE))
+    assert os.path.exists(os.path.join(path, jobs.REPORT_CSV_FILE))
+
+    statuses = [status for status, _ in transitions]
+    assert statuses[0] == QUEUED and statuses[-1] == DONE
+    assert set(statuses[1:-1]) == {RUNNING}
+    stages = [stage for _, stage in transitions]
+    assert stages.index("Converting") < stages.index("Indexing") < stages.index("Finished")
+    # Partial results are saved after every step of QUESTIONS_PER_STEP questions
+    assert stages.count("Answering and scoring") == 2
+
+    # The same inputs map to the finished job instead of queueing it again
+    assert runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML") == job
+    assert runner._queue.get(timeout=1) == job
+    assert runner._queue.empty()
+
+
+def test_failed_job_records_the_error_and_is_retried_on_request(offline, runner, transitions, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY")
+    job = runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML")
+
+    run_job(os.path.join(runner.jobs_dir, job))
+
+    state = runner.status(job)
+    assert state['status'] == FAILED
+    assert state['error'] == "RuntimeError: OPENAI_API_KEY is not set"
+    assert [status for status, _ in transitions] == [QUEUED, RUNNING, FAILED]
+
+    assert runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML") == job
+    assert runner.status(job)['status'] == FAILED
+    runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML", retry=True)
+    assert runner.status(job)['status'] == QUEUED
+
+
+def test_job_is_claimed_under_the_lock_and_only_once(offline, runner):
+    job = runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML")
+    path = os.path.join(runner.jobs_dir, job)
+
+    with file_lock(os.path.join(runner.jobs_dir, LOCK_FILE)):
+        worker = threading.Thread(target=run_job, args=(path,))
+        worker.start()
+        worker.join(timeout=0.5)
+        # The worker waits for the lock before claiming the job
+        assert worker.is_alive()
+        assert runner.status(job)['status'] == QUEUED
+    worker.join(timeout=60)
+    assert runner.status(job)['status'] == DONE
+
+    # A job queued twice is run by the first worker to claim it only
+    finished = runner.status(job)['finished']
+    run_job(path)
+    assert runner.status(job)['finished'] == finished
+
+
+def test_spawned_worker_runs_queued_jobs(tmp_path, monkeypatch):
+    # The worker process cannot see the test's fakes, without a key its job fails early
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    runner = JobRunner(str(tmp_path / "jobs"), workers=1)
+    try:
+        job = runner.submit("catalog.xml", CATALOG.encode('utf-8'), QUESTIONS, "Only XML")
+        deadline = time.monotonic() + 120
+        while runner.status(job)['status'] in (QUEUED, RUNNING) and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        runner.shutdown()
+
+    state = read_state(os.path.join(runner.jobs_dir, job))
+    assert state['status'] == FAILED
+    assert state['error'] == "RuntimeError: OPENAI_API_KEY is not set"
+    assert state['worker_pid'] not in (None, os.getpid())
+    assert os.path.exists(os.path.join(runner.jobs_dir, job, jobs.REPORT_JSON_FILE))
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import json
+import os
+
+from xml.dom import minidom
+
+import pytest
+import xmltodict
+
+import input_process.multi_output as multi_output
+import input_process.text_cleaning as text_cleaning
+from input_process.convert_xml_to_txt import process_xml_to_txt
+from input_process.multi_output import OUTPUTS, cached_output, convert_document
+from input_process.xml_to_json_direct_xml2json_txt import xml_to_json_txt
+
+NAMESPACED = """<?xml version="1.0" encoding="UTF-8"?>
+<catalog xmlns="urn:d" xmlns:p="urn:p" version="2">
+  <p:part id="1" xml:lang="de"><name>Schraube M6</name><p:note>Verzinkt, lang - gut.</p:note></p:part>
+  <q:item xmlns:q="urn:q" q:code="A7"><q:title>Nut M6</q:title>Loose text</q:item>
+  <entry>Plain entry with several words here</entry>
+  <p:part id="2"><name xmlns:r="urn:r" r:kind="x">Washer</name><name>Second</name></p:part>
+</catalog>
+"""
+
+MIXED = """<?xml version="1.0"?>
+<doc a="1 &amp; 2" xmlns:x="urn:x"><!-- note -->Lead <b>bold</b> tail<?render fast?>
+  <x:e x:k="v"/><e></e>Text &lt;escaped&gt; "quoted"
+</doc>"""
+
+
+@pytest.fixture
+def namespaced(tmp_path):
+    path = tmp_path / "catalog.xml"
+    path.write_text(NAMESPACED, encoding='utf-8')
+    return str(path)
+
+
+def _read(path):
+    with open(path, "r", encoding='utf-8') as f:
+        return f.read()
+
+
+def _run(converter, path, streaming):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _read(converter(path, streaming=streaming))
+
+
+def _convert_document(path, outputs, streaming):
+    with contextlib.redirect_stdout(io.StringIO()):
+        paths = convert_document(path, outputs, os.path.join(os.path.dirname(path), "multi"), streaming)
+    return {name: _read(output) for name, output in paths.items()}
+
+
+@pytest.mark.parametrize("streaming", [True, False], ids=["streaming", "in-memory"])
+def test_single_pass_matches_converters(namespaced, streaming):
+    outputs = _convert_document(namespaced, ("plain", "direct_json"), streaming)
+
+    assert outputs["plain"] == _run(process_xml_to_txt, namespaced, streaming)
+    assert outputs["direct_json"] == _run(xml_to_json_txt, namespaced, streaming)
+
+
+@pytest.mark.parametrize("streaming", [True, False], ids=["streaming", "in-memory"])
+def test_single_pass_matches_cleaned_converters(namespaced, streaming):
+    from input_process.text_cleaning import partition_document
+    from input_process.xml_to_cleaned_json_txt import process_xml_to_json_txt
+    from input_process.xml_to_cleaned_xml_txt import process_and_clean_xml_to_txt
+
+    try:
+        partition_document("<a>Partitioning needs the language models</a>")
+    except Exception as e:
+        pytest.skip(f"unstructured cannot partition here: {e}")
+
+    outputs = _convert_document(namespaced, ("cleaned_json", "enriched_xml"), streaming)
+
+    assert outputs["cleaned_json"] == _run(process_xml_to_json_txt, namespaced, streaming)
+    assert outputs["enriched_xml"] == _run(process_and_clean_xml_to_txt, namespaced, streaming)
+
+
+@pytest.mark.parametrize("content", [NAMESPACED, MIXED], ids=["namespaced", "mixed"])
+def test_in_memory_outputs_match_minidom_and_xmltodict(tmp_path, content):
+    path = tmp_path / "doc.xml"
+    path.write_text(content, encoding='utf-8')
+    outputs = _convert_document(str(path), ("plain", "direct_json"), False)
+
+    assert outputs["plain"] == minidom.parseString(content).toprettyxml(indent="  ")
+    assert outputs["direct_json"] == json.dumps(xmltodict.parse(content), indent=4)
+
+
+def test_cached_output_converts_missing_companions(namespaced, tmp_path, monkeypatch):
+    calls = []
+    convert = multi_output.convert_document
+
+    def recording(path, outputs, *args):
+        calls.append(list(outputs))
+        return convert(path, outputs, *args)
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("language models unavailable")
+
+    monkeypatch.setattr(multi_output, "convert_document", recording)
+    monkeypatch.setattr(text_cleaning, "partition_document", unavailable)
+    cache_root = str(tmp_path / "conversions")
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Without the cleaned outputs the requested one is converted alone
+        assert cached_output(namespaced, "plain", cache_root)
+        assert calls == [list(OUTPUTS), ["plain"]]
+
+        monkeypatch.setattr(text_cleaning, "partition_document", lambda *args, **kwargs: [])
+        calls.clear()
+        assert cached_output(namespaced, "direct_json", cache_root)
+        assert calls == [["cleaned_json", "enriched_xml", "direct_json"]]
+
+        # Every output is cached now
+        calls.clear()
+        for output in OUTPUTS:
+            assert os.path.exists(cached_output(namespaced, output, cache_root))
+        assert calls == []
+
+
+def test_streaming_direct_json_keeps_record_namespace_declarations(namespaced):
+    expected = []
+
+    def collect(path, item):
+        expected.append({path[-1][0]: item})
+        return True
+
+    xmltodict.parse(NAMESPACED, item_depth=2, item_callback=collect)
+    streamed = json.loads(_convert_document(namespaced, ("direct_json",), True)["direct_json"])
+
+    assert streamed["catalog"]["#items"] == json.loads(json.dumps(expected))
+    assert streamed["catalog"]["#items"][1]["q:item"]["@xmlns:q"] == "urn:q"
+    assert streamed["catalog"]["@xmlns:p"] == "urn:p"
+
+
+def test_cached_output_evicts_least_recently_used(tmp_path):
+    cache_root = str(tmp_path / "conversions")
+    paths = []
+    for i in range(3):
+        source = tmp_path / f"doc{i}.xml"
+        source.write_text(f"<catalog><item>{'x' * 1000} {i}</item></catalog>", encoding='utf-8')
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths.append(cached_output(str(source), "plain", cache_root, max_bytes=2500))
+        # Order the conversions by use even on filesystems with coarse timestamps
+        os.utime(os.path.dirname(paths[-1]), (i, i))
+
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
@@ -0,0 +1,70 @@
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from awsutils.fakes import FakeBedrockAgentRuntime
+
+
+@pytest.fixture
+def rag(aws, monkeypatch):
+    from awsutils import RAG
+    from pipeline import backoff
+
+    monkeypatch.setattr(backoff, "backoff_delay", lambda attempt, base_delay, max_delay: 0)
+    return RAG
+
+
+def test_limiter_halves_on_throttling_and_grows_back(rag):
+    limiter = rag.AdaptiveLimiter(max_in_flight=8)
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 2
+    for _ in range(2 + 3):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_throttled_questions_are_all_answered_in_order(rag):
+    client = FakeBedrockAgentRuntime(latency=0.01, max_concurrent=3)
+    questions = [f"question {i}" for i in range(20)]
+
+    responses = rag.process_questions(questions, "kb", "arn", max_in_flight=8, client=client)
+
+    assert [response['output']['text'] for response in responses] == [f"Answer to: {q}" for q in questions]
+    assert client.throttled and client.peak_in_flight <= 3
+
+
+class FlakyClient:
+    """Times out on the first call for each question, rejects "bad" outright"""
+
+    def __init__(self, timeouts=1):
+        self.timeouts = timeouts
+        self.calls = {}
+
+    def retrieve_and_generate(self, input, retrieveAndGenerateConfiguration, sessionId=None):
+        text = input['text']
+        self.calls[text] = self.calls.get(text, 0) + 1
+        if self.calls[text] <= self.timeouts:
+            raise ReadTimeoutError(endpoint_url="https://bedrock")
+        if text == "bad":
+            raise ClientError({'Error': {'Code': "ValidationException", 'Message': "bad input"}}, "RetrieveAndGenerate")
+        return {'output': {'text': f"Answer to: {text}"}, 'sessionId': "session"}
+
+
+def test_connection_errors_are_retried_and_failures_return_none(rag):
+    client = FlakyClient()
+    responses = rag.process_questions(["a", "bad", "b"], "kb", "arn", max_in_flight=2, client=client)
+    assert [response and response['output']['text'] for response in responses] == ["Answer to: a", None, "Answer to: b"]
+
+
+def test_exhausted_retries_release_every_slot(rag):
+    # With leaked slots the second round of questions would block forever
+    client = FlakyClient(timeouts=100)
+    responses = rag.process_questions([f"q{i}" for i in range(6)], "kb", "arn", max_in_flight=2, client=client,
+                                      max_retries=2)
+    assert responses == [None] * 6
+    assert all(calls == 3 for calls in client.calls.values())
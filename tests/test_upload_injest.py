@@ -0,0 +1,95 @@
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+BUCKET = "uploads"
+
+
+class CountingAgentClient:
+    def __init__(self):
+        self.jobs = 0
+
+    def start_ingestion_job(self, knowledgeBaseId, dataSourceId):
+        self.jobs += 1
+        return {'ingestionJob': {'status': "STARTING"}}
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_upload_skips_unchanged_objects(aws, tmp_path):
+    from awsutils.upload_injest import upload_files_to_s3
+
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    # Small parts so the larger file goes up as a multipart upload
+    config = TransferConfig(multipart_threshold=5 * 1024 ** 2, multipart_chunksize=5 * 1024 ** 2)
+    paths = [_write(tmp_path / "a.txt", b"a" * 100), _write(tmp_path / "b.txt", b"b" * (11 * 1024 ** 2))]
+
+    assert set(upload_files_to_s3(paths, BUCKET, client=client, transfer_config=config).values()) == {"uploaded"}
+    assert set(upload_files_to_s3(paths, BUCKET, client=client, transfer_config=config).values()) == {"skipped"}
+
+    _write(tmp_path / "a.txt", b"changed")
+    results = upload_files_to_s3(paths, BUCKET, client=client, transfer_config=config)
+    assert results == {paths[0]: "uploaded", paths[1]: "skipped"}
+    assert client.get_object(Bucket=BUCKET, Key="a.txt")['Body'].read() == b"changed"
+
+
+class NoListBucketClient:
+    """S3 client for a role without s3:ListBucket, whose HEAD requests are all forbidden"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def head_object(self, Bucket, Key):
+        raise ClientError({'Error': {'Code': "403", 'Message': "Forbidden"}}, "HeadObject")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def test_forbidden_head_uploads_anyway(aws, tmp_path):
+    from awsutils.upload_injest import upload_file_to_s3
+
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    path = _write(tmp_path / "a.txt", b"a" * 100)
+
+    assert upload_file_to_s3(path, BUCKET, "a.txt", client=NoListBucketClient(client)) == "uploaded"
+    assert client.get_object(Bucket=BUCKET, Key="a.txt")['Body'].read() == b"a" * 100
+
+
+def test_files_with_the_same_name_get_their_own_keys(aws, tmp_path):
+    from awsutils.upload_injest import upload_files_to_s3
+
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    paths = [_write(tmp_path / "one" / "parts.txt", b"1"), _write(tmp_path / "two" / "parts.txt", b"2")]
+
+    upload_files_to_s3(paths, BUCKET, prefix="processed/", client=client)
+    keys = sorted(obj['Key'] for obj in client.list_objects_v2(Bucket=BUCKET)['Contents'])
+    assert keys == ["processed/one/parts.txt", "processed/two/parts.txt"]
+
+
+def test_one_ingestion_job_per_batch_with_changes(aws, tmp_path, monkeypatch):
+    from awsutils.upload_injest import upload_and_ingest_many
+
+    client = boto3.client("s3")
+    client.create_bucket(Bucket=BUCKET)
+    _write(tmp_path / "data" / "a.txt", b"a")
+    _write(tmp_path / "data" / "nested" / "b.txt", b"b")
+    monkeypatch.chdir(tmp_path)
+    agent = CountingAgentClient()
+
+    ok, _, results = upload_and_ingest_many(["a.txt", "nested/b.txt"], BUCKET, "ds", "kb", client=client,
+                                            agent_client=agent)
+    assert ok and set(results.values()) == {"uploaded"} and agent.jobs == 1
+    keys = sorted(obj['Key'] for obj in client.list_objects_v2(Bucket=BUCKET)['Contents'])
+    assert keys == ["a.txt", "nested/b.txt"]
+
+    ok, _, results = upload_and_ingest_many(["a.txt", "nested/b.txt"], BUCKET, "ds", "kb", client=client,
+                                            agent_client=agent)
+    assert ok and set(results.values()) == {"skipped"} and agent.jobs == 1